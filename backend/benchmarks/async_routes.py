@@ -0,0 +1,61 @@
+"""
+Throughput of an async route that calls Firestore on the event loop versus
+the same call handed to async_db.run_blocking, as /api/iot/mismatch does,
+at increasing numbers of requests in flight. Firestore is the fake store
+from tests/ with a simulated round trip per call.
+
+    cd backend && python -m benchmarks.async_routes [round_trip_ms]
+"""
+import asyncio
+import contextlib
+import io
+import sys
+import time
+import httpx
+from fastapi import FastAPI
+from tests.fake_firestore import FakeFirestore
+from routers.esp32_router import router
+from services import esp32_service
+from services.esp32_service import record_mismatch
+
+ROUND_TRIP_MS = 20
+IN_FLIGHT = (1, 8, 32)
+REQUESTS_PER_CLIENT = 10
+PAYLOAD = {"bookingId": "booking-1", "detectedSlot": "SLOT2", "status": "mismatch"}
+
+app = FastAPI()
+app.include_router(router, prefix="/api/iot")
+
+
+@app.post("/blocking/mismatch")
+async def blocking_mismatch(data: dict):
+    # The shape these routes had before: a sync client call inside async def
+    return record_mismatch(data["bookingId"], data["detectedSlot"], data["status"])
+
+
+async def throughput(client: httpx.AsyncClient, path: str, in_flight: int) -> float:
+    async def worker():
+        for _ in range(REQUESTS_PER_CLIENT):
+            response = await client.post(path, json=PAYLOAD)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(in_flight)))
+    return in_flight * REQUESTS_PER_CLIENT / (time.perf_counter() - start)
+
+
+async def main(round_trip_ms: float):
+    esp32_service._db = FakeFirestore(latency=round_trip_ms / 1000)
+    transport = httpx.ASGITransport(app=app)
+    print(f"{round_trip_ms:g} ms per round trip, {REQUESTS_PER_CLIENT} requests per client")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for in_flight in IN_FLIGHT:
+            # The services log every request; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                blocking = await throughput(client, "/blocking/mismatch", in_flight)
+                offloaded = await throughput(client, "/api/iot/mismatch", in_flight)
+            print(f"{in_flight:3} in flight: on the loop {blocking:6.0f} req/s, run_blocking {offloaded:6.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else ROUND_TRIP_MS))
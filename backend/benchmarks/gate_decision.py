@@ -0,0 +1,78 @@
+"""
+Gate decision latency: the Vehicle -> Booking -> Slot query chain that
+process_plate used to run, against the in-memory gate index. Both run over
+the fake store from tests/, which charges a simulated Firestore round trip
+per call.
+
+    cd backend && python -m benchmarks.gate_decision [round_trip_ms]
+"""
+import random
+import sys
+import time
+from tests.fake_firestore import FakeFirestore
+from common import gate_index, ref_cache
+
+VEHICLES = 5000
+SLOTS = 50
+DECISIONS = 200
+ROUND_TRIP_MS = 20
+
+
+def seed(store: FakeFirestore):
+    for index in range(VEHICLES):
+        store.collection("Vehicle").document(f"vehicle-{index}").set({"plate_number": f"CAB{index:04d}"})
+        # Every other vehicle holds an active booking
+        if index % 2 == 0:
+            store.collection("Booking").document(f"booking-{index}").set(
+                {"vehicle_id": f"vehicle-{index}", "slot_id": f"slot-{index % SLOTS}", "is_active": True})
+    for index in range(SLOTS):
+        store.collection("Slot").document(f"slot-{index}").set({"slotNo": f"SLOT{index}"})
+
+
+def query_chain(store: FakeFirestore, plate: str) -> str:
+    vehicle = next(store.collection("Vehicle").where("plate_number", "==", plate).limit(1).stream(), None)
+    if not vehicle:
+        return "notregistered"
+    booking = next(store.collection("Booking")
+                   .where("vehicle_id", "==", vehicle.id)
+                   .where("is_active", "==", True)
+                   .limit(1).stream(), None)
+    if not booking:
+        return "notactive"
+    store.collection("Slot").document(booking.to_dict()["slot_id"]).get()
+    return "active"
+
+
+def measure(decide, plates: list):
+    samples = []
+    for plate in plates:
+        start = time.perf_counter()
+        decide(plate)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def main(round_trip_ms: float):
+    store = FakeFirestore()
+    seed(store)
+    gate_index._db = ref_cache._db = store
+    gate_index.build()
+    ref_cache.get_docs("Slot")
+    store.latency = round_trip_ms / 1000
+
+    rng = random.Random(3)
+    # Active bookings only, so the index never has to confirm a miss
+    plates = [f"CAB{rng.randrange(0, VEHICLES, 2):04d}" for _ in range(DECISIONS)]
+    before = measure(lambda plate: query_chain(store, plate), plates)
+    round_trips = store.round_trips
+    after = measure(gate_index.decide, plates)
+
+    print(f"{VEHICLES} vehicles, {DECISIONS} decisions, {round_trip_ms:g} ms per round trip")
+    print(f"query chain: p50 {before[0]:.2f} ms  p99 {before[1]:.2f} ms")
+    print(f"gate index:  p50 {after[0] * 1000:.1f} us  p99 {after[1] * 1000:.1f} us"
+          f"  ({store.round_trips - round_trips} round trips)")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else ROUND_TRIP_MS)
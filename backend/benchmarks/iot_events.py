@@ -0,0 +1,73 @@
+"""
+IoT event ingestion throughput: one event per request on /api/iot/mismatch
+against batches on /api/iot/events, which dedupe by (device, seq) and
+persist each batch as one WriteBatch. Firestore is the fake store from
+tests/ with a simulated round trip per call; a replay of the last batch
+shows duplicates being dropped without a write.
+
+    cd backend && python -m benchmarks.iot_events [round_trip_ms]
+"""
+import asyncio
+import contextlib
+import io
+import sys
+import time
+import httpx
+from fastapi import FastAPI
+from tests.fake_firestore import FakeFirestore
+from routers.esp32_router import router
+from services import esp32_service
+from services.esp32_service import MAX_EVENTS_PER_BATCH
+from common import ref_cache
+
+ROUND_TRIP_MS = 20
+EVENTS = 600
+EVENT_TYPES = ("ir", "mismatch", "matched")
+
+app = FastAPI()
+app.include_router(router, prefix="/api/iot")
+
+
+async def main(round_trip_ms: float):
+    store = FakeFirestore()
+    store.collection("Slot").document("slot-2").set({"slotNo": "SLOT2", "status": "active"})
+    esp32_service._db = ref_cache._db = store
+    store.latency = round_trip_ms / 1000
+
+    events = [
+        {"device_id": "device-1", "seq": seq, "type": EVENT_TYPES[seq % 3], "slot": "SLOT2",
+         "state": seq % 2, "booking_id": "booking-1", "device_time_ms": seq * 50}
+        for seq in range(EVENTS)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # The services log every event; keep the output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            round_trips = store.round_trips
+            start = time.perf_counter()
+            for _ in range(EVENTS):
+                response = await client.post("/api/iot/mismatch", json={
+                    "bookingId": "booking-1", "detectedSlot": "SLOT2", "status": "mismatch"})
+                response.raise_for_status()
+            single = EVENTS / (time.perf_counter() - start), store.round_trips - round_trips
+
+            round_trips = store.round_trips
+            start = time.perf_counter()
+            for index in range(0, EVENTS, MAX_EVENTS_PER_BATCH):
+                response = await client.post("/api/iot/events", json=events[index:index + MAX_EVENTS_PER_BATCH])
+                response.raise_for_status()
+            batched = EVENTS / (time.perf_counter() - start), store.round_trips - round_trips
+
+            round_trips = store.round_trips
+            replay = (await client.post("/api/iot/events", json=events[-MAX_EVENTS_PER_BATCH:])).json()
+            replay_round_trips = store.round_trips - round_trips
+
+    print(f"{EVENTS} events, {round_trip_ms:g} ms per round trip")
+    print(f"one per request:      {single[0]:7.0f} events/s, {single[1]} round trips")
+    print(f"{MAX_EVENTS_PER_BATCH} per batch:        {batched[0]:7.0f} events/s, {batched[1]} round trips")
+    print(f"replayed batch: {replay['accepted']} accepted, {replay['duplicates']} duplicates,"
+          f" {replay_round_trips} round trips")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else ROUND_TRIP_MS))
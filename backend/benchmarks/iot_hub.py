@@ -0,0 +1,132 @@
+"""
+WebSocket hub load: hundreds of fake ESP32 controllers hold a socket on
+/api/iot/ws/{device_id}, ack every gate command pushed through the
+dispatcher and send events of their own. The controllers talk ASGI to the
+app directly, so the numbers are the hub's cost in one worker without the
+network in between.
+
+    cd backend && python -m benchmarks.iot_hub [devices]
+"""
+import asyncio
+import contextlib
+import io
+import json
+import resource
+import sys
+import time
+from fastapi import FastAPI
+from routers.esp32_router import router
+from common import gate_dispatcher, iot_hub
+
+DEVICES = 500
+COMMANDS_PER_DEVICE = 20
+EVENTS_PER_DEVICE = 20
+
+app = FastAPI()
+app.include_router(router, prefix="/api/iot")
+
+
+class FakeESP32:
+    """A controller as the firmware behaves: acks commands, sends events and waits for their acks."""
+
+    def __init__(self, device_id: str, gate_id: str):
+        self.device_id = device_id
+        self.gate_id = gate_id
+        self.to_app = asyncio.Queue()
+        self.from_app = asyncio.Queue()
+        self.event_acks = {}  # message id -> future
+        self.commands = 0
+
+    async def connect(self):
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "http_version": "1.1",
+            "path": f"/api/iot/ws/{self.device_id}", "raw_path": f"/api/iot/ws/{self.device_id}".encode(),
+            "query_string": f"gate_id={self.gate_id}".encode(), "root_path": "", "headers": [],
+            "server": ("bench", 80), "client": ("esp32", 0), "subprotocols": [],
+        }
+        self.app_task = asyncio.create_task(app(scope, self.to_app.get, self.from_app.put))
+        await self.to_app.put({"type": "websocket.connect"})
+        accepted = await self.from_app.get()
+        assert accepted["type"] == "websocket.accept", accepted
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        while True:
+            frame = await self.from_app.get()
+            if frame["type"] != "websocket.send":
+                return
+            message = json.loads(frame["text"])
+            if message["type"] == "command":
+                self.commands += 1
+                await self._send({"type": "ack", "id": message["id"], "result": {"code": 200, "message": "Gate opened"}})
+            elif message["type"] == "ack":
+                self.event_acks.pop(message["id"]).set_result(message["result"])
+
+    async def _send(self, message: dict):
+        await self.to_app.put({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def event(self, message_id: int) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self.event_acks[message_id] = future
+        await self._send({"type": "event", "id": message_id, "event": "matched",
+                          "bookingId": f"booking-{message_id}", "detectedSlot": "SLOT2"})
+        return await future
+
+    async def close(self):
+        await self.to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await self.app_task
+        self.reader.cancel()
+
+
+def percentiles(samples: list):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+async def timed(coroutine, samples: list):
+    start = time.perf_counter()
+    await coroutine
+    samples.append(time.perf_counter() - start)
+
+
+async def main(devices: int):
+    controllers = [FakeESP32(f"device-{index}", f"gate-{index}") for index in range(devices)]
+    start = time.perf_counter()
+    # The hub logs every connect, command and event
+    with contextlib.redirect_stdout(io.StringIO()):
+        for controller in controllers:
+            await controller.connect()
+    connect_seconds = time.perf_counter() - start
+    print(f"{iot_hub.hub_stats['connected']} controllers connected in {connect_seconds:.2f} s,"
+          f" max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    samples = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(COMMANDS_PER_DEVICE):
+            await asyncio.gather(*(
+                timed(gate_dispatcher.send_command({"id": controller.device_id, "url": None}, {"action": "open"}), samples)
+                for controller in controllers
+            ))
+    elapsed = time.perf_counter() - start
+    p50, p99 = percentiles(samples)
+    print(f"commands: {len(samples) / elapsed:,.0f}/s with {devices} in flight,"
+          f" ack p50 {p50:.2f} ms p99 {p99:.2f} ms, acked {sum(controller.commands for controller in controllers)}")
+
+    samples = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for message_id in range(EVENTS_PER_DEVICE):
+            await asyncio.gather(*(timed(controller.event(message_id), samples) for controller in controllers))
+    elapsed = time.perf_counter() - start
+    p50, p99 = percentiles(samples)
+    print(f"events: {len(samples) / elapsed:,.0f}/s with {devices} in flight, ack p50 {p50:.2f} ms p99 {p99:.2f} ms")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for controller in controllers:
+            await controller.close()
+    print(f"hub after disconnect: {iot_hub.hub_stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEVICES))
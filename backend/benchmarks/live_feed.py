@@ -0,0 +1,65 @@
+"""
+Live push fan-out: CPU used by thousands of idle /api/live/stream
+subscribers (each parked on its own SSE stream, heartbeats included),
+delivery rate when events are published, and eviction of subscribers that
+stop reading.
+
+    cd backend && python -m benchmarks.live_feed
+"""
+import asyncio
+import time
+from common import live_feed
+
+SUBSCRIBER_COUNTS = (1000, 5000)
+# Long enough for every stream to send one heartbeat
+IDLE_SECONDS = live_feed.HEARTBEAT_SECONDS + 5
+# One more than a subscriber buffers, so the slow consumers overflow
+EVENTS = live_feed.SUBSCRIBER_BUFFER + 1
+SLOW_CONSUMERS = 10
+
+
+async def consume(subscriber, received: list):
+    async for _ in live_feed.stream(subscriber, []):
+        received[0] += 1
+
+
+async def run(subscribers: int):
+    received = [0]
+    tasks = [asyncio.create_task(consume(live_feed.subscribe(), received)) for _ in range(subscribers)]
+    # Subscribed but never read, so their buffers fill up
+    slow = [live_feed.subscribe() for _ in range(SLOW_CONSUMERS)]
+    await asyncio.sleep(0.5)
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(IDLE_SECONDS)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    heartbeats = received[0]
+    print(f"{subscribers} idle subscribers: {cpu * 1000:.0f} ms CPU over {wall:.0f} s"
+          f" ({cpu / wall * 100:.2f}% of a core, {heartbeats} heartbeats)")
+
+    received[0] = 0
+    evicted = live_feed.live_stats["evicted"]
+    start = time.perf_counter()
+    for index in range(EVENTS):
+        live_feed.publish("slot", {"id": f"slot-{index % 4}", "occupancy": "occupied"})
+        await asyncio.sleep(0)
+    while received[0] < subscribers * EVENTS:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    print(f"  {EVENTS} events: {subscribers * EVENTS / elapsed:,.0f} deliveries/s,"
+          f" {live_feed.live_stats['evicted'] - evicted} of {len(slow)} slow consumers evicted")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def main():
+    # Set directly; start() would also open the Firestore alert listener
+    live_feed._loop = asyncio.get_running_loop()
+    for subscribers in SUBSCRIBER_COUNTS:
+        await run(subscribers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Slot availability over the interval index: build time from the Booking
+documents, the cost of answering "which slots are free for this window"
+across every slot, and of keeping the index current on create/expire.
+Runs against the fake store from tests/ at 1k slots and a growing number
+of bookings, so the per-slot cost can be seen to stay flat.
+
+    cd backend && python -m benchmarks.slot_availability
+"""
+import random
+import time
+from datetime import date, datetime, timedelta
+from tests.fake_firestore import FakeFirestore
+from common import ref_cache, slot_intervals
+from services.slot_service import get_available_slots
+
+SLOTS = 1000
+BOOKING_COUNTS = (10_000, 100_000)
+WINDOWS = 200
+UPDATES = 1000
+FIRST_DAY = date(2030, 1, 1)
+BOOKED_DAYS = 365
+
+
+def seed(store: FakeFirestore, bookings: int, rng: random.Random):
+    for index in range(SLOTS):
+        store.collection("Slot").document(f"slot-{index}").set(
+            {"slotNo": f"S{index}", "status": "active", "device_id": "device-1", "created_at": datetime(2030, 1, 1)})
+    for index in range(bookings):
+        start = FIRST_DAY + timedelta(days=rng.randrange(BOOKED_DAYS))
+        store.collection("Booking").document(f"booking-{index}").set({
+            "slot_id": f"slot-{rng.randrange(SLOTS)}",
+            "from_date": start.isoformat(),
+            "to_date": (start + timedelta(days=rng.randint(1, 14))).isoformat(),
+            "is_active": True,
+        })
+
+
+def window(rng: random.Random):
+    start = FIRST_DAY + timedelta(days=rng.randrange(BOOKED_DAYS))
+    return start.isoformat(), (start + timedelta(days=3)).isoformat()
+
+
+def percentiles(samples: list):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def run(bookings: int):
+    rng = random.Random(8)
+    store = FakeFirestore()
+    seed(store, bookings, rng)
+    slot_intervals._db = ref_cache._db = store
+    slot_intervals._slots.clear()
+    slot_intervals._booking_slot.clear()
+    ref_cache._docs.clear()
+
+    start = time.perf_counter()
+    slot_intervals.build()
+    build_seconds = time.perf_counter() - start
+    ref_cache.get_docs("Slot")
+    round_trips = store.round_trips
+
+    slot_ids = [f"slot-{index}" for index in range(SLOTS)]
+    index_samples, endpoint_samples = [], []
+    for _ in range(WINDOWS):
+        from_date, to_date = window(rng)
+        start = time.perf_counter()
+        for slot_id in slot_ids:
+            slot_intervals.is_free(slot_id, from_date, to_date)
+        index_samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        free = get_available_slots(from_date, to_date)
+        endpoint_samples.append(time.perf_counter() - start)
+    index_p50, index_p99 = percentiles(index_samples)
+    p50, p99 = percentiles(endpoint_samples)
+
+    start = time.perf_counter()
+    for index in range(UPDATES):
+        from_date, to_date = window(rng)
+        slot_intervals.add_booking(f"new-{index}", f"slot-{rng.randrange(SLOTS)}", from_date, to_date)
+    for index in range(UPDATES):
+        slot_intervals.remove_booking(f"new-{index}")
+    update_us = (time.perf_counter() - start) / (UPDATES * 2) * 1e6
+
+    print(f"{SLOTS} slots x {bookings} bookings: build {build_seconds:.2f} s")
+    print(f"  index over all slots: p50 {index_p50:.2f} ms  p99 {index_p99:.2f} ms"
+          f"  ({index_p50 / SLOTS * 1000:.2f} us per slot)")
+    print(f"  get_available_slots: p50 {p50:.2f} ms  p99 {p99:.2f} ms"
+          f"  ({len(free)} free in the last window, {store.round_trips - round_trips} round trips)")
+    print(f"  add/remove booking: {update_us:.1f} us each")
+
+
+if __name__ == "__main__":
+    for count in BOOKING_COUNTS:
+        run(count)
@@ -0,0 +1,23 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# The firebase_admin client is synchronous; async routes hand their calls to
+# this bounded pool instead of running them on the event loop
+DB_EXECUTOR_WORKERS = 32
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="firestore")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+async def stream(query) -> list:
+    # Materialize the whole query off the event loop
+    return await run_blocking(lambda: list(query.stream()))
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
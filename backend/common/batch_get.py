@@ -0,0 +1,45 @@
+from config.firebase_config import _db
+
+# Firestore multi-get and "in" query limits
+GET_ALL_CHUNK_SIZE = 100
+IN_QUERY_CHUNK_SIZE = 30
+
+# Number of Firestore round trips issued through this module
+join_stats = {"round_trips": 0}
+
+
+def _chunks(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _unique(values) -> list:
+    # Keep first-seen order, drop duplicates and empty ids
+    return list(dict.fromkeys(value for value in values if value))
+
+
+def fetch_docs(collection: str, ids) -> dict:
+    """
+    Resolve a set of document ids from one collection with chunked multi-gets.
+    Returns {doc_id: data} for the documents that exist.
+    """
+    docs = {}
+    for chunk in _chunks(_unique(ids), GET_ALL_CHUNK_SIZE):
+        refs = [_db.collection(collection).document(doc_id) for doc_id in chunk]
+        join_stats["round_trips"] += 1
+        for snapshot in _db.get_all(refs):
+            if snapshot.exists:
+                docs[snapshot.id] = snapshot.to_dict()
+    return docs
+
+
+def stream_where_in(collection: str, field: str, values) -> list:
+    """
+    Run `field in values` against a collection, split into as many queries
+    as the Firestore "in" operator limit requires.
+    """
+    docs = []
+    for chunk in _chunks(_unique(values), IN_QUERY_CHUNK_SIZE):
+        join_stats["round_trips"] += 1
+        docs.extend(_db.collection(collection).where(field, "in", chunk).stream())
+    return docs
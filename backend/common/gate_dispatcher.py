@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+from collections import deque
+import httpx
+from common import iot_hub, ref_cache
+
+# Used when no Device document carries an ip_address yet
+DEFAULT_ESP32_URL = os.getenv("ESP32_URL", "http://192.168.60.111")
+
+# Gate commands are worthless once the car has moved on
+COMMAND_TIMEOUT = httpx.Timeout(1.5, connect=1.0)
+RTT_WINDOW = 256
+
+_clients = {}       # base url -> keep-alive AsyncClient
+_stats = {}         # device id -> RTT statistics
+_tasks = set()      # in-flight sends, referenced so they are not garbage collected
+
+
+def resolve_device(gate_id: str = None) -> dict:
+    """
+    Pick the controller for a gate. Device documents are matched by gate_id,
+    preferring one that holds a hub socket, then one with an ip_address.
+    Controllers on the hub without a Device document are matched by the
+    gate_id they connected with. An unknown gate_id resolves to None so the
+    command never reaches another gate's controller; DEFAULT_ESP32_URL is
+    only used when no gate_id is given and nothing is registered.
+    """
+    devices = ref_cache.get_docs("Device")
+    candidates = [
+        (doc_id, data) for doc_id, data in devices.items()
+        if (not gate_id or data.get("gate_id") == gate_id)
+        and (iot_hub.is_connected(doc_id) or data.get("ip_address"))
+    ]
+    if candidates:
+        doc_id, data = min(candidates, key=lambda candidate: (not iot_hub.is_connected(candidate[0]), candidate[0]))
+        url = _base_url(data["ip_address"]) if data.get("ip_address") else None
+        return {"id": doc_id, "url": url, "gate_id": data.get("gate_id")}
+
+    connected = sorted(iot_hub.devices_for_gate(gate_id))
+    if connected:
+        return {"id": connected[0], "url": None, "gate_id": gate_id}
+    if gate_id:
+        print(f"No device registered for gate {gate_id}; command not dispatched")
+        return None
+    return {"id": "default", "url": DEFAULT_ESP32_URL, "gate_id": None}
+
+
+def _base_url(address: str) -> str:
+    return address if address.startswith("http") else f"http://{address}"
+
+
+def _client(base_url: str) -> httpx.AsyncClient:
+    client = _clients.get(base_url)
+    if client is None:
+        client = _clients[base_url] = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=COMMAND_TIMEOUT,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+        )
+    return client
+
+
+def _record(device_id: str, rtt_seconds: float = None, error: str = None):
+    stats = _stats.setdefault(device_id, {"sent": 0, "failed": 0, "last_error": None, "rtts": deque(maxlen=RTT_WINDOW)})
+    if error is None:
+        stats["sent"] += 1
+        stats["rtts"].append(rtt_seconds)
+    else:
+        stats["failed"] += 1
+        stats["last_error"] = error
+
+
+async def send_command(device: dict, command: dict) -> str:
+    start = time.perf_counter()
+    try:
+        if iot_hub.is_connected(device["id"]):
+            # Controllers holding a hub socket get the command pushed and acked on it
+            result = await iot_hub.send_command(device["id"], command)
+            _record(device["id"], rtt_seconds=time.perf_counter() - start)
+            return str(result)
+        if not device["url"]:
+            raise ConnectionError("not connected to the hub and has no ip_address")
+        response = await _client(device["url"]).post("/command", json=command)
+        if not response.is_success:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        _record(device["id"], rtt_seconds=time.perf_counter() - start)
+        return response.text
+    except Exception as e:
+        _record(device["id"], error=str(e))
+        print(f"Failed to send to ESP32 {device['id']}: {e}")
+        return f"Failed to send to ESP32: {e}"
+
+
+def dispatch(device: dict, command: dict):
+    """Send a gate command in the background; the caller does not wait for the ESP32."""
+    task = asyncio.create_task(send_command(device, command))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def device_stats() -> dict:
+    summary = {}
+    for device_id, stats in _stats.items():
+        rtts = sorted(stats["rtts"])
+        summary[device_id] = {
+            "sent": stats["sent"],
+            "failed": stats["failed"],
+            "last_error": stats["last_error"],
+            "rtt_p50_ms": rtts[len(rtts) // 2] * 1000 if rtts else None,
+            "rtt_p99_ms": rtts[int(len(rtts) * 0.99)] * 1000 if rtts else None,
+            "rtt_max_ms": rtts[-1] * 1000 if rtts else None,
+        }
+    return summary
+
+
+async def close():
+    if _tasks:
+        await asyncio.wait(list(_tasks), timeout=COMMAND_TIMEOUT.read)
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,194 @@
+import threading
+from config.firebase_config import _db
+from common import ref_cache, slot_intervals
+
+gate_stats = {"hits": 0, "misses": 0, "recovered": 0}
+
+_lock = threading.Lock()
+_plate_vehicle = {}      # normalized plate -> vehicle_id
+_vehicle_plate = {}      # vehicle_id -> normalized plate
+_vehicle_bookings = {}   # vehicle_id -> {booking_id: slot_id} (active only)
+_booking_vehicle = {}    # booking_id -> vehicle_id
+_listeners = []
+
+
+def normalize_plate(plate: str) -> str:
+    return (plate or "").upper().replace(" ", "")
+
+
+# ---------------------- INDEX UPDATES ----------------------
+def put_vehicle(vehicle_id: str, plate_number: str):
+    plate = normalize_plate(plate_number)
+    with _lock:
+        old_plate = _vehicle_plate.pop(vehicle_id, None)
+        if old_plate and _plate_vehicle.get(old_plate) == vehicle_id:
+            del _plate_vehicle[old_plate]
+        if plate:
+            _plate_vehicle[plate] = vehicle_id
+            _vehicle_plate[vehicle_id] = plate
+
+
+def remove_vehicle(vehicle_id: str):
+    with _lock:
+        plate = _vehicle_plate.pop(vehicle_id, None)
+        if plate and _plate_vehicle.get(plate) == vehicle_id:
+            del _plate_vehicle[plate]
+
+
+def put_booking(booking_id: str, booking_data: dict):
+    if not booking_data.get("is_active"):
+        remove_booking(booking_id)
+        return
+    vehicle_id = booking_data.get("vehicle_id")
+    with _lock:
+        _remove_booking_locked(booking_id)
+        if vehicle_id:
+            _vehicle_bookings.setdefault(vehicle_id, {})[booking_id] = booking_data.get("slot_id")
+            _booking_vehicle[booking_id] = vehicle_id
+
+
+def remove_booking(booking_id: str):
+    with _lock:
+        _remove_booking_locked(booking_id)
+
+
+def _remove_booking_locked(booking_id: str):
+    vehicle_id = _booking_vehicle.pop(booking_id, None)
+    bookings = _vehicle_bookings.get(vehicle_id)
+    if bookings is not None:
+        bookings.pop(booking_id, None)
+        if not bookings:
+            del _vehicle_bookings[vehicle_id]
+
+
+# ---------------------- STARTUP ----------------------
+def build():
+    vehicles = _db.collection("Vehicle").stream()
+    for vehicle_doc in vehicles:
+        put_vehicle(vehicle_doc.id, vehicle_doc.to_dict().get("plate_number"))
+
+    bookings = _db.collection("Booking").where("is_active", "==", True).stream()
+    for booking_doc in bookings:
+        put_booking(booking_doc.id, booking_doc.to_dict())
+
+    print(f"Gate index built: {len(_plate_vehicle)} plates, {len(_booking_vehicle)} active bookings")
+
+
+def _on_vehicle_snapshot(doc_snapshots, changes, read_time):
+    for change in changes:
+        if change.type.name == "REMOVED":
+            remove_vehicle(change.document.id)
+        else:
+            put_vehicle(change.document.id, change.document.to_dict().get("plate_number"))
+
+
+def _on_booking_snapshot(doc_snapshots, changes, read_time):
+    # The query only matches active bookings, so REMOVED means expired or deleted.
+    # The slot interval index follows the same feed, so bookings made or
+    # expired by other workers show up in availability too.
+    for change in changes:
+        booking_id = change.document.id
+        if change.type.name == "REMOVED":
+            remove_booking(booking_id)
+            slot_intervals.remove_booking(booking_id)
+            continue
+        data = change.document.to_dict()
+        put_booking(booking_id, data)
+        try:
+            slot_intervals.add_booking(booking_id, data.get("slot_id"), data.get("from_date"), data.get("to_date"))
+        except Exception as e:
+            print(f"Error indexing booking {booking_id}: {e}")
+
+
+def start_listeners():
+    if _listeners:
+        return
+    try:
+        _listeners.append(_db.collection("Vehicle").on_snapshot(_on_vehicle_snapshot))
+        _listeners.append(
+            _db.collection("Booking")
+            .where("is_active", "==", True)
+            .on_snapshot(_on_booking_snapshot)
+        )
+    except Exception as e:
+        # Write paths still keep the index current without listeners
+        print(f"Failed to start gate index listeners: {e}")
+
+
+def stop_listeners():
+    while _listeners:
+        try:
+            _listeners.pop().unsubscribe()
+        except Exception as e:
+            print(f"Failed to stop gate index listener: {e}")
+
+
+# ---------------------- GATE DECISION ----------------------
+def _lookup(plate: str):
+    with _lock:
+        vehicle_id = _plate_vehicle.get(plate)
+        bookings = _vehicle_bookings.get(vehicle_id) if vehicle_id else None
+        if bookings:
+            booking_id, slot_id = next(iter(bookings.items()))
+            return vehicle_id, booking_id, slot_id
+        return vehicle_id, None, None
+
+
+def _confirm_miss(plate: str, vehicle_id: str):
+    # Firestore is only consulted when the index has no active booking
+    if not vehicle_id:
+        vehicle_ref = _db.collection("Vehicle").where("plate_number", "==", plate).limit(1).stream()
+        vehicle = next(vehicle_ref, None)
+        if not vehicle:
+            return None, None, None
+        vehicle_id = vehicle.id
+        put_vehicle(vehicle_id, vehicle.to_dict().get("plate_number"))
+
+    booking_ref = _db.collection("Booking") \
+        .where("vehicle_id", "==", vehicle_id) \
+        .where("is_active", "==", True) \
+        .limit(1).stream()
+    booking = next(booking_ref, None)
+    if not booking:
+        return vehicle_id, None, None
+
+    booking_data = booking.to_dict()
+    put_booking(booking.id, booking_data)
+    return vehicle_id, booking.id, booking_data.get("slot_id")
+
+
+def decide(plate_number: str) -> dict:
+    """
+    Resolve a plate to its gate decision: notregistered, notactive or active
+    with the booked slot.
+    """
+    plate = normalize_plate(plate_number)
+    vehicle_id, booking_id, slot_id = _lookup(plate)
+
+    if booking_id:
+        gate_stats["hits"] += 1
+    else:
+        gate_stats["misses"] += 1
+        vehicle_id, booking_id, slot_id = _confirm_miss(plate, vehicle_id)
+        if booking_id:
+            gate_stats["recovered"] += 1
+
+    if not vehicle_id:
+        status = "notregistered"
+    elif not booking_id:
+        status = "notactive"
+    else:
+        status = "active"
+
+    slot_name = "Unknown"
+    slot_data = ref_cache.get_doc("Slot", slot_id)
+    if slot_data:
+        slot_name = slot_data.get("slotNo", "Unknown")
+
+    return {
+        "status": status,
+        "plate": plate,
+        "vehicle_id": vehicle_id or "",
+        "booking_id": booking_id or "",
+        "slot": slot_name,
+    }
@@ -0,0 +1,154 @@
+import asyncio
+import itertools
+import json
+from fastapi import WebSocket, WebSocketDisconnect
+from common import async_db, slot_occupancy
+from services.esp32_service import record_parked, record_mismatch, record_exit
+
+# Controllers ack once the servo cycle finishes, a few seconds after receipt
+ACK_TIMEOUT_SECONDS = 10.0
+
+hub_stats = {"connected": 0, "commands": 0, "acked": 0, "timeouts": 0, "events": 0}
+
+
+class DeviceConnection:
+    def __init__(self, device_id: str, websocket: WebSocket, gate_id: str = None):
+        self.device_id = device_id
+        self.gate_id = gate_id
+        self.websocket = websocket
+        self.message_ids = itertools.count(1)
+        self.pending = {}  # message id -> future resolved by the ack
+        self.send_lock = asyncio.Lock()
+
+    async def send(self, message: dict):
+        async with self.send_lock:
+            await self.websocket.send_json(message)
+
+
+_connections = {}  # device id -> DeviceConnection
+_tasks = set()     # in-flight message handlers, referenced so they are not garbage collected
+
+
+def is_connected(device_id: str) -> bool:
+    return device_id in _connections
+
+
+def connected_devices() -> list:
+    return list(_connections)
+
+
+def devices_for_gate(gate_id: str = None) -> list:
+    """Connected device ids that registered the gate (all of them without a gate_id)."""
+    return [device_id for device_id, connection in list(_connections.items())
+            if gate_id is None or connection.gate_id == gate_id]
+
+
+async def send_command(device_id: str, command: dict, timeout: float = ACK_TIMEOUT_SECONDS) -> dict:
+    """Push a command over the device's socket and wait for its ack."""
+    connection = _connections.get(device_id)
+    if connection is None:
+        raise ConnectionError(f"Device {device_id} is not connected")
+
+    message_id = next(connection.message_ids)
+    future = asyncio.get_running_loop().create_future()
+    connection.pending[message_id] = future
+    hub_stats["commands"] += 1
+    try:
+        await connection.send({"type": "command", "id": message_id, **command})
+        result = await asyncio.wait_for(future, timeout)
+        hub_stats["acked"] += 1
+        return result
+    except asyncio.TimeoutError:
+        hub_stats["timeouts"] += 1
+        raise
+    finally:
+        connection.pending.pop(message_id, None)
+
+
+async def _handle_event(device_id: str, message: dict) -> dict:
+    event = message.get("event")
+    booking_id = message.get("bookingId", "")
+    detected_slot = message.get("detectedSlot", "")
+    hub_stats["events"] += 1
+
+    if event == "ir":
+        state = message.get("state")
+        if not isinstance(state, int):
+            return {"status": "error", "message": "ir event needs an integer state"}
+        # Slot resolution can reload the Slot cache from Firestore
+        await async_db.run_blocking(slot_occupancy.feed, device_id, detected_slot, state)
+        return {"status": "ok"}
+    if event == "matched":
+        return record_parked(booking_id, detected_slot, "matched")
+    if event == "mismatch":
+        return await async_db.run_blocking(record_mismatch, booking_id, detected_slot, "mismatch")
+    if event == "exit":
+        return await async_db.run_blocking(record_exit, booking_id)
+    return {"status": "error", "message": f"Unknown event {event}"}
+
+
+async def _dispatch(connection: DeviceConnection, message: dict):
+    kind = message.get("type")
+
+    if kind == "ack":
+        future = connection.pending.get(message.get("id"))
+        if future is not None and not future.done():
+            future.set_result(message.get("result", {}))
+    elif kind == "event":
+        try:
+            result = await _handle_event(connection.device_id, message)
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        await connection.send({"type": "ack", "id": message.get("id"), "result": result})
+    elif kind == "ping":
+        await connection.send({"type": "pong", "id": message.get("id")})
+
+
+def _task_done(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[IOT] Message handler failed: {task.exception()}")
+
+
+async def serve(websocket: WebSocket, device_id: str, gate_id: str = None):
+    """Own one controller's socket until it disconnects."""
+    await websocket.accept()
+    connection = DeviceConnection(device_id, websocket, gate_id)
+
+    previous = _connections.get(device_id)
+    _connections[device_id] = connection
+    if previous is not None:
+        # A reconnecting controller replaces its stale socket
+        await previous.websocket.close()
+    else:
+        hub_stats["connected"] += 1
+    print(f"[IOT] Device {device_id} connected (gate {gate_id})")
+
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or "")
+                if not isinstance(message, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                # One bad frame from a controller must not cost it the socket
+                print(f"[IOT] Malformed message from {device_id}: {e}")
+                await connection.send({"type": "error", "message": "Malformed message"})
+                continue
+            # Events touch Firestore, so they must not hold up acks behind them
+            task = asyncio.create_task(_dispatch(connection, message))
+            _tasks.add(task)
+            task.add_done_callback(_task_done)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        if _connections.get(device_id) is connection:
+            del _connections[device_id]
+            hub_stats["connected"] -= 1
+        for future in connection.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Device {device_id} disconnected"))
+        print(f"[IOT] Device {device_id} disconnected")
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+import pytz
+from config.firebase_config import _db
+
+# Events buffered per subscriber before it is treated as a slow consumer
+SUBSCRIBER_BUFFER = 256
+HEARTBEAT_SECONDS = 15
+
+live_stats = {"subscribers": 0, "published": 0, "delivered": 0, "evicted": 0}
+
+_loop = None
+_subscribers = set()
+_alert_listener = None
+_listener_lock = threading.Lock()
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+
+
+def _fanout(event: dict):
+    live_stats["published"] += 1
+    # Encoded once and shared by every subscriber
+    message = format_sse(event)
+    for subscriber in list(_subscribers):
+        try:
+            subscriber.queue.put_nowait(message)
+            live_stats["delivered"] += 1
+        except asyncio.QueueFull:
+            # Drop the backlog and end the stream; the client reconnects
+            # and starts again from a fresh snapshot
+            _subscribers.discard(subscriber)
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+            live_stats["evicted"] += 1
+    live_stats["subscribers"] = len(_subscribers)
+
+
+def publish(kind: str, data: dict):
+    """Fan an event out to every subscriber; safe to call from any thread."""
+    if _loop is None or not _subscribers:
+        return
+    event = {"type": kind, "data": data, "time": datetime.now(pytz.UTC).isoformat()}
+    try:
+        _loop.call_soon_threadsafe(_fanout, event)
+    except RuntimeError:
+        pass  # loop already closed during shutdown
+
+
+def subscribe() -> Subscriber:
+    subscriber = Subscriber()
+    _subscribers.add(subscriber)
+    live_stats["subscribers"] = len(_subscribers)
+    return subscriber
+
+
+def unsubscribe(subscriber: Subscriber):
+    _subscribers.discard(subscriber)
+    live_stats["subscribers"] = len(_subscribers)
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def stream(subscriber: Subscriber, initial: list):
+    """Server-Sent Events body for one subscriber."""
+    try:
+        for event in initial:
+            yield format_sse(event)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                yield format_sse({"type": "evicted", "data": {}})
+                return
+            yield message
+    finally:
+        unsubscribe(subscriber)
+
+
+def _on_alert_snapshot(docs, changes, read_time):
+    for change in changes:
+        if change.type.name != "ADDED":
+            continue
+        data = change.document.to_dict()
+        booking = _db.collection("Booking").document(data.get("booking_id") or "-").get()
+        publish("alert", {
+            "id": change.document.id,
+            "booking_id": data.get("booking_id"),
+            "booking_code": booking.to_dict().get("booking_code", "N/A") if booking.exists else "N/A",
+            "detected_slot": data.get("detected_slot"),
+            "status": data.get("status"),
+            "time": data.get("time"),
+        })
+
+
+def start(loop: asyncio.AbstractEventLoop):
+    global _loop, _alert_listener
+    _loop = loop
+    # Alerts are written from several paths and workers; the listener sees
+    # all of them. Only alerts raised from now on are pushed.
+    try:
+        query = _db.collection("Alert").where("time", ">=", datetime.now(pytz.UTC))
+        with _listener_lock:
+            _alert_listener = query.on_snapshot(_on_alert_snapshot)
+    except Exception as e:
+        print(f"Failed to start alert listener: {e}")
+
+
+def stop():
+    global _loop, _alert_listener
+    with _listener_lock:
+        if _alert_listener is not None:
+            _alert_listener.unsubscribe()
+            _alert_listener = None
+    # Open streams end on the sentinel
+    for subscriber in list(_subscribers):
+        if not subscriber.queue.full():
+            subscriber.queue.put_nowait(None)
+    _subscribers.clear()
+    _loop = None
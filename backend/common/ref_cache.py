@@ -0,0 +1,95 @@
+import threading
+import time
+from config.firebase_config import _db
+
+# Reference data that changes rarely and is read on almost every request
+CACHED_COLLECTIONS = ("Package", "Slot", "DeviceType", "Device")
+
+# Used when a collection has no live snapshot listener
+CACHE_TTL_SECONDS = 300
+
+cache_stats = {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0, "snapshots": 0}
+
+_lock = threading.Lock()
+_docs = {}          # collection -> {doc_id: data}
+_loaded_at = {}     # collection -> monotonic time of the last full load
+_dirty = set()      # collections invalidated by a write path
+_listeners = {}     # collection -> Firestore watch handle
+
+
+def _load(collection: str) -> dict:
+    docs = {doc.id: doc.to_dict() for doc in _db.collection(collection).stream()}
+    with _lock:
+        _docs[collection] = docs
+        _loaded_at[collection] = time.monotonic()
+        _dirty.discard(collection)
+    return docs
+
+
+def _is_fresh(collection: str) -> bool:
+    if collection in _dirty:
+        return False
+    if collection in _listeners:
+        return True
+    return time.monotonic() - _loaded_at[collection] < CACHE_TTL_SECONDS
+
+
+def get_docs(collection: str) -> dict:
+    """
+    Return {doc_id: data} for a cached collection, reloading it from
+    Firestore when it was never loaded, was invalidated or its TTL expired.
+    """
+    with _lock:
+        if collection not in _docs:
+            cache_stats["misses"] += 1
+        elif not _is_fresh(collection):
+            cache_stats["stale"] += 1
+        else:
+            cache_stats["hits"] += 1
+            return dict(_docs[collection])
+
+    return dict(_load(collection))
+
+
+def get_doc(collection: str, doc_id: str):
+    if not doc_id:
+        return None
+    return get_docs(collection).get(doc_id)
+
+
+def invalidate(collection: str):
+    # Called by write paths so the next read does not serve the old snapshot
+    with _lock:
+        _dirty.add(collection)
+        cache_stats["invalidations"] += 1
+
+
+def _on_snapshot(collection: str):
+    def callback(doc_snapshots, changes, read_time):
+        docs = {doc.id: doc.to_dict() for doc in doc_snapshots}
+        with _lock:
+            _docs[collection] = docs
+            _loaded_at[collection] = time.monotonic()
+            _dirty.discard(collection)
+            cache_stats["snapshots"] += 1
+    return callback
+
+
+def start_listeners():
+    for collection in CACHED_COLLECTIONS:
+        if collection in _listeners:
+            continue
+        try:
+            _listeners[collection] = _db.collection(collection).on_snapshot(_on_snapshot(collection))
+        except Exception as e:
+            # Fall back to TTL based reloads for this collection
+            print(f"Failed to start {collection} listener: {e}")
+
+
+def stop_listeners():
+    for collection, watch in list(_listeners.items()):
+        try:
+            watch.unsubscribe()
+        except Exception as e:
+            print(f"Failed to stop {collection} listener: {e}")
+        _listeners.pop(collection, None)
@@ -0,0 +1,111 @@
+import bisect
+import threading
+from datetime import date, datetime
+from config.firebase_config import _db
+
+
+class SlotIntervals:
+    """
+    Booked day ranges of one slot, sorted by start day. max_end[i] is the
+    latest end among the first i+1 ranges, so an overlap test is one bisect.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.booking_ids = []
+        self.max_end = []
+
+    def _rebuild_max_end(self, from_index: int):
+        running = self.max_end[from_index - 1] if from_index else None
+        del self.max_end[from_index:]
+        for end in self.ends[from_index:]:
+            running = end if running is None else max(running, end)
+            self.max_end.append(running)
+
+    def add(self, booking_id: str, start: int, end: int):
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.booking_ids.insert(index, booking_id)
+        self._rebuild_max_end(index)
+
+    def remove(self, booking_id: str):
+        index = self.booking_ids.index(booking_id)
+        del self.starts[index], self.ends[index], self.booking_ids[index]
+        self._rebuild_max_end(index)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        # Ranges starting on or before `end` are candidates; one of them
+        # overlaps when the latest of their ends reaches `start`
+        count = bisect.bisect_right(self.starts, end)
+        return count > 0 and self.max_end[count - 1] >= start
+
+    def __len__(self):
+        return len(self.starts)
+
+
+_lock = threading.Lock()
+_slots = {}            # slot_id -> SlotIntervals
+_booking_slot = {}     # booking_id -> slot_id
+
+
+def day_number(value) -> int:
+    """Day ordinal of a YYYY-MM-DD string, date or datetime."""
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.strptime(value, "%Y-%m-%d").date().toordinal()
+
+
+def _day_range(from_date, to_date):
+    # Bookings expire at the start of to_date, so it is not a booked day;
+    # a same-day window still covers that one day
+    start = day_number(from_date)
+    return start, max(start, day_number(to_date) - 1)
+
+
+def add_booking(booking_id: str, slot_id: str, from_date, to_date):
+    if not slot_id or not from_date or not to_date:
+        return
+    start, end = _day_range(from_date, to_date)
+    with _lock:
+        _remove_locked(booking_id)
+        _slots.setdefault(slot_id, SlotIntervals()).add(booking_id, start, end)
+        _booking_slot[booking_id] = slot_id
+
+
+def remove_booking(booking_id: str):
+    with _lock:
+        _remove_locked(booking_id)
+
+
+def _remove_locked(booking_id: str):
+    slot_id = _booking_slot.pop(booking_id, None)
+    if slot_id is not None:
+        _slots[slot_id].remove(booking_id)
+
+
+def is_free(slot_id: str, from_date, to_date) -> bool:
+    start, end = _day_range(from_date, to_date)
+    with _lock:
+        intervals = _slots.get(slot_id)
+        return intervals is None or not intervals.overlaps(start, end)
+
+
+def has_bookings(slot_id: str) -> bool:
+    with _lock:
+        return bool(_slots.get(slot_id))
+
+
+def build():
+    bookings = _db.collection("Booking").where("is_active", "==", True).stream()
+    for booking in bookings:
+        data = booking.to_dict()
+        try:
+            add_booking(booking.id, data.get("slot_id"), data.get("from_date"), data.get("to_date"))
+        except Exception as e:
+            print(f"Error indexing booking {booking.id}: {e}")
+
+    print(f"Slot interval index built: {len(_booking_slot)} bookings across {len(_slots)} slots")
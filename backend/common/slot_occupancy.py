@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytz
+from config.firebase_config import _db
+from common import live_feed, ref_cache
+
+# A reading must hold this long before the slot changes state; leaving is
+# slower so a car shuffling in the bay does not free the slot
+OCCUPY_HOLD_SECONDS = 2.0
+RELEASE_HOLD_SECONDS = 5.0
+# Confirmed transitions are written at most this often, latest state per slot
+FLUSH_INTERVAL_SECONDS = 1.0
+# The IR modules pull the line LOW while something is in front of them
+OCCUPIED_LEVEL = 0
+
+EMPTY = "empty"
+OCCUPIED = "occupied"
+
+occupancy_stats = {"samples": 0, "transitions": 0, "suppressed": 0, "writes": 0, "unknown_slots": 0}
+
+
+class SlotState:
+    def __init__(self, state: str = None, changed_at=None):
+        self.state = state              # None until the first confirmed reading
+        self.changed_at = changed_at
+        self.candidate = None           # state waiting out its hold-off
+        self.candidate_since = None     # monotonic time the candidate was first read
+
+    def deadline(self):
+        if self.candidate is None:
+            return None
+        hold = RELEASE_HOLD_SECONDS if self.candidate == EMPTY else OCCUPY_HOLD_SECONDS
+        return self.candidate_since + hold
+
+
+_condition = threading.Condition()
+_slots = {}        # slot_id -> SlotState
+_dirty = {}        # slot_id -> (state, changed_at) confirmed but not yet written
+_persisted = {}    # slot_id -> state last written to Firestore
+_worker = None
+_stopping = False
+
+
+def resolve_slot(slot_no: str, device_id: str = None):
+    """Slot document id for an IR slot name such as SLOT2."""
+    slots = ref_cache.get_docs("Slot")
+    matches = [doc_id for doc_id, data in slots.items() if data.get("slotNo") == slot_no]
+    if device_id and len(matches) > 1:
+        matches = [doc_id for doc_id in matches if slots[doc_id].get("device_id") == device_id] or matches
+    return sorted(matches)[0] if matches else None
+
+
+def feed(device_id: str, slot_no: str, level: int, at: float = None):
+    """
+    Feed one raw IR reading. `at` is the monotonic time it was taken,
+    for readings that arrive late in a batch.
+    """
+    slot_id = resolve_slot(slot_no, device_id)
+    if slot_id is None:
+        occupancy_stats["unknown_slots"] += 1
+        return
+
+    reading = OCCUPIED if level == OCCUPIED_LEVEL else EMPTY
+    at = time.monotonic() if at is None else at
+    with _condition:
+        occupancy_stats["samples"] += 1
+        slot = _slots.setdefault(slot_id, SlotState())
+        if reading == slot.state:
+            # Flapped back before the hold-off ran out
+            if slot.candidate is not None:
+                occupancy_stats["suppressed"] += 1
+            slot.candidate = slot.candidate_since = None
+        elif reading != slot.candidate:
+            slot.candidate = reading
+            slot.candidate_since = at
+        _confirm_due(time.monotonic())
+        _condition.notify()
+
+
+def _confirm_due(now: float):
+    # Caller holds _condition
+    for slot_id, slot in _slots.items():
+        deadline = slot.deadline()
+        if deadline is None or deadline > now:
+            continue
+        slot.state = slot.candidate
+        slot.changed_at = datetime.now(pytz.UTC) - timedelta(seconds=now - slot.candidate_since)
+        slot.candidate = slot.candidate_since = None
+        occupancy_stats["transitions"] += 1
+        _dirty[slot_id] = (slot.state, slot.changed_at)
+        live_feed.publish("slot", {"id": slot_id, "occupancy": slot.state, "changed_at": slot.changed_at})
+
+
+def _next_deadline():
+    deadlines = [deadline for deadline in (slot.deadline() for slot in _slots.values()) if deadline is not None]
+    return min(deadlines) if deadlines else None
+
+
+def _flush():
+    with _condition:
+        # Slots that flapped back to their written state need no write
+        pending = {slot_id: value for slot_id, value in _dirty.items() if _persisted.get(slot_id) != value[0]}
+        _dirty.clear()
+    if not pending:
+        return
+
+    batch = _db.batch()
+    for slot_id, (state, changed_at) in pending.items():
+        batch.update(_db.collection("Slot").document(slot_id), {
+            "occupancy": state,
+            "occupancy_changed_at": changed_at
+        })
+    try:
+        batch.commit()
+    except Exception as e:
+        print(f"Error writing slot occupancy: {e}")
+        with _condition:
+            for slot_id, value in pending.items():
+                _dirty.setdefault(slot_id, value)
+        return
+
+    with _condition:
+        for slot_id, (state, _) in pending.items():
+            _persisted[slot_id] = state
+    occupancy_stats["writes"] += len(pending)
+
+
+def _run():
+    next_flush = time.monotonic() + FLUSH_INTERVAL_SECONDS
+    while True:
+        with _condition:
+            if _stopping:
+                break
+            now = time.monotonic()
+            _confirm_due(now)
+            deadline = _next_deadline()
+            wake = next_flush if deadline is None else min(deadline, next_flush)
+            if wake > now:
+                _condition.wait(wake - now)
+                continue
+
+        _flush()
+        next_flush = time.monotonic() + FLUSH_INTERVAL_SECONDS
+
+    _flush()
+
+
+def get(slot_id: str) -> dict:
+    with _condition:
+        slot = _slots.get(slot_id)
+        if slot is None or slot.state is None:
+            return {}
+        return {"occupancy": slot.state, "changed_at": slot.changed_at}
+
+
+def snapshot() -> dict:
+    with _condition:
+        return {
+            slot_id: {"occupancy": slot.state, "changed_at": slot.changed_at}
+            for slot_id, slot in _slots.items() if slot.state is not None
+        }
+
+
+def load():
+    """Seed in-memory state from the occupancy last written to each Slot."""
+    with _condition:
+        for slot_id, data in ref_cache.get_docs("Slot").items():
+            state = data.get("occupancy")
+            if state in (EMPTY, OCCUPIED) and slot_id not in _slots:
+                _slots[slot_id] = SlotState(state, data.get("occupancy_changed_at"))
+                _persisted[slot_id] = state
+
+
+def start():
+    global _worker, _stopping
+    load()
+    _stopping = False
+    _worker = threading.Thread(target=_run, name="slot-occupancy", daemon=True)
+    _worker.start()
+
+
+def stop(timeout: float = 5.0):
+    global _stopping
+    with _condition:
+        _stopping = True
+        _condition.notify_all()
+    if _worker is not None:
+        _worker.join(timeout)
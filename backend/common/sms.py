@@ -1,16 +1,30 @@
-import requests
+import os
+import httpx
 from config.config import settings
 
-def send_sms(recipient, message):
+# Overridable so a local stub gateway can stand in for text.lk
+SMS_API_URL = os.getenv("SMS_API_URL", "https://app.text.lk/api/http/sms/send")
+
+# Per-attempt deadline; retries are handled by the outbox
+SMS_TIMEOUT = httpx.Timeout(5.0, connect=3.0)
 
-    url = "https://app.text.lk/api/http/sms/send"
-    
-    # Define the headers
-    headers = {
+# One keep-alive client shared by every sender thread
+_client = httpx.Client(
+    timeout=SMS_TIMEOUT,
+    limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+    headers={
         "Content-Type": "application/json",
         "Accept": "application/json"
-    }
-    
+    },
+)
+
+
+def send_sms(recipient, message):
+    """
+    Send one SMS synchronously. Request paths should use
+    common.sms_outbox.enqueue_sms instead of calling this directly.
+    """
+
     # Retrieve API credentials from settings
     # api_token = settings.api_token
     # sender_id = settings.sender_id
@@ -26,24 +40,33 @@ def send_sms(recipient, message):
         "type": "plain",
         "message": message
     }
-    
+
     try:
         # Make the POST request to the API
-        response = requests.post(url, json=payload, headers=headers)
-        
+        response = _client.post(SMS_API_URL, json=payload)
+
         # Log the response for debugging
         print(f"API Response: {response.status_code}, {response.text}")
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            return response.json()  # Return the JSON response
+
+        # Any 2xx means the gateway accepted the message; a body that is not
+        # JSON must not make the outbox send it a second time
+        if response.is_success:
+            try:
+                return response.json()
+            except ValueError:
+                return {"status_code": response.status_code, "details": response.text}
         else:
             return {
                 "error": f"Failed to send SMS. Status code: {response.status_code}",
+                "status_code": response.status_code,
                 "details": response.text
             }
     except Exception as e:
         return {
             "error": "An exception occurred while sending the SMS.",
             "details": str(e)
-        }
\ No newline at end of file
+        }
+
+
+def close():
+    _client.close()
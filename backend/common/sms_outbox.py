@@ -0,0 +1,144 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from common import sms
+
+# Durable local queue, so accepted messages survive a restart
+SMS_OUTBOX_PATH = os.getenv("SMS_OUTBOX_PATH", "sms_outbox.db")
+SMS_WORKERS = 2
+SMS_MAX_ATTEMPTS = 6
+SMS_BACKOFF_BASE_SECONDS = 2
+SMS_BACKOFF_MAX_SECONDS = 300
+
+outbox_stats = {"enqueued": 0, "sent": 0, "retried": 0, "dead": 0}
+
+_lock = threading.Lock()
+_wakeup = threading.Condition(_lock)
+_conn = None
+_workers = []
+_stopping = False
+
+
+def _connect():
+    global _conn
+    _conn = sqlite3.connect(SMS_OUTBOX_PATH, check_same_thread=False, isolation_level=None)
+    _conn.execute("PRAGMA journal_mode=WAL")
+    _conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            message TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL
+        )
+    """)
+    _conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+    # Messages that were in flight when the process died are sent again
+    _conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+
+
+def enqueue_sms(recipient: str, message: str):
+    """Persist an SMS for background delivery and return immediately."""
+    now = time.time()
+    with _wakeup:
+        if _conn is None:
+            _connect()
+        _conn.execute(
+            "INSERT INTO outbox (recipient, message, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+            (recipient, message, now, now),
+        )
+        outbox_stats["enqueued"] += 1
+        _wakeup.notify()
+
+
+def _claim():
+    # Caller holds _lock; returns (row, seconds until the next due message)
+    now = time.time()
+    row = _conn.execute(
+        "SELECT id, recipient, message, attempts FROM outbox "
+        "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1",
+        (now,),
+    ).fetchone()
+    if row:
+        _conn.execute("UPDATE outbox SET status = 'sending' WHERE id = ?", (row[0],))
+        return row, None
+
+    next_due = _conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+    return None, (next_due - now if next_due else None)
+
+
+def _is_retryable(result: dict) -> bool:
+    # Timeouts, connection errors, throttling and gateway errors are retried
+    status_code = result.get("status_code")
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def _finish(message_id: int, attempts: int, result: dict):
+    with _lock:
+        if "error" not in result:
+            _conn.execute("UPDATE outbox SET status = 'sent', attempts = ? WHERE id = ?", (attempts, message_id))
+            outbox_stats["sent"] += 1
+            return
+
+        error = f"{result['error']} {result.get('details', '')}".strip()
+        if attempts >= SMS_MAX_ATTEMPTS or not _is_retryable(result):
+            _conn.execute(
+                "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                (attempts, error, message_id),
+            )
+            outbox_stats["dead"] += 1
+            print(f"SMS {message_id} dead-lettered after {attempts} attempts: {error}")
+            return
+
+        # Exponential backoff with jitter
+        delay = min(SMS_BACKOFF_MAX_SECONDS, SMS_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        _conn.execute(
+            "UPDATE outbox SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+            (attempts, error, time.time() + delay, message_id),
+        )
+        outbox_stats["retried"] += 1
+
+
+def _run():
+    while True:
+        with _wakeup:
+            if _stopping:
+                return
+            row, wait_seconds = _claim()
+            if row is None:
+                _wakeup.wait(wait_seconds)
+                continue
+
+        message_id, recipient, message, attempts = row
+        result = sms.send_sms(recipient=recipient, message=message)
+        _finish(message_id, attempts + 1, result)
+
+
+def start_workers():
+    global _stopping
+    with _wakeup:
+        if _conn is None:
+            _connect()
+        _stopping = False
+
+    for index in range(SMS_WORKERS):
+        worker = threading.Thread(target=_run, name=f"sms-outbox-{index}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def stop_workers(timeout: float = 5.0):
+    global _stopping
+    with _wakeup:
+        _stopping = True
+        _wakeup.notify_all()
+    for worker in _workers:
+        worker.join(timeout)
+    _workers.clear()
+    sms.close()
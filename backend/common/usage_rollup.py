@@ -0,0 +1,187 @@
+import hashlib
+from datetime import datetime, timedelta
+from firebase_admin import firestore
+from config.firebase_config import _db
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# granularity -> (collection, bucket key format)
+ROLLUP_COLLECTIONS = {
+    "minute": ("ApiUsageRollupMinute", "%Y-%m-%dT%H:%M"),
+    "hour": ("ApiUsageRollupHour", "%Y-%m-%dT%H"),
+    "day": ("ApiUsageRollupDay", "%Y-%m-%d"),
+}
+
+# Ranges longer than this are answered from the hourly rollups
+MINUTE_QUERY_LIMIT = timedelta(hours=6)
+# Ranges longer than this read whole days from the daily rollups and hours
+# only for the partial first and last days
+HOUR_QUERY_LIMIT = timedelta(days=3)
+
+# Requests that matched no route (404 scans and the like) share one series
+UNMATCHED_ROUTE = "<unmatched>"
+
+_rollups = {}  # (granularity, bucket, endpoint, method, status_class) -> aggregate
+
+
+def status_class(status_code: int) -> str:
+    return f"{int(status_code) // 100}xx"
+
+
+def _bucket_name(duration_seconds: float) -> str:
+    duration_ms = duration_seconds * 1000
+    for bound in LATENCY_BUCKETS_MS:
+        if duration_ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+
+def add(entry: dict, at: datetime):
+    """Fold one request into the in-memory minute, hour and day aggregates."""
+    duration = entry["duration_seconds"]
+    route = entry.get("route") or UNMATCHED_ROUTE
+    single = {"count": 1, "sum": duration, "min": duration, "max": duration, "buckets": {_bucket_name(duration): 1}}
+
+    for granularity, (_, key_format) in ROLLUP_COLLECTIONS.items():
+        key = (granularity, at.strftime(key_format), route, entry["method"], status_class(entry["status_code"]))
+        _merge(key, single)
+
+
+def _merge(key: tuple, other: dict):
+    aggregate = _rollups.get(key)
+    if aggregate is None:
+        aggregate = _rollups[key] = {"count": 0, "sum": 0.0, "min": other["min"], "max": other["max"], "buckets": {}}
+    aggregate["count"] += other["count"]
+    aggregate["sum"] += other["sum"]
+    aggregate["min"] = min(aggregate["min"], other["min"])
+    aggregate["max"] = max(aggregate["max"], other["max"])
+    for name, n in other["buckets"].items():
+        aggregate["buckets"][name] = aggregate["buckets"].get(name, 0) + n
+
+
+def drain() -> dict:
+    global _rollups
+    rollups, _rollups = _rollups, {}
+    return rollups
+
+
+def restore(rollups: dict):
+    """Fold drained aggregates that could not be written back in for the next flush."""
+    for key, aggregate in rollups.items():
+        _merge(key, aggregate)
+
+
+def _doc_id(bucket: str, method: str, status: str, endpoint: str) -> str:
+    # Hashed so any route stays far below Firestore's 1500-byte id limit
+    digest = hashlib.sha1(endpoint.encode()).hexdigest()[:16]
+    return f"{bucket}_{method}_{status}_{digest}"
+
+
+def write_ops(rollups: dict) -> list:
+    """
+    Turn drained aggregates into (key, document ref, merge data) triples.
+    Counters are merged with server-side transforms so concurrent workers
+    add up correctly.
+    """
+    ops = []
+    for key, aggregate in rollups.items():
+        granularity, bucket, endpoint, method, status = key
+        collection, _ = ROLLUP_COLLECTIONS[granularity]
+        doc_id = _doc_id(bucket, method, status, endpoint)
+        ops.append((key, _db.collection(collection).document(doc_id), {
+            "bucket": bucket,
+            "endpoint": endpoint,
+            "method": method,
+            "status_class": status,
+            "count": firestore.Increment(aggregate["count"]),
+            "sum_seconds": firestore.Increment(aggregate["sum"]),
+            "min_seconds": firestore.Minimum(aggregate["min"]),
+            "max_seconds": firestore.Maximum(aggregate["max"]),
+            "buckets": {name: firestore.Increment(n) for name, n in aggregate["buckets"].items()},
+        }))
+    return ops
+
+
+def _percentile(buckets: dict, count: int, quantile: float, max_seconds: float) -> float:
+    # Upper bound of the bucket that holds the requested rank
+    rank = quantile * count
+    seen = 0
+    for bound in LATENCY_BUCKETS_MS:
+        seen += buckets.get(f"le_{bound}", 0)
+        if seen >= rank:
+            return min(bound / 1000, max_seconds)
+    return max_seconds
+
+
+def _plan(start: datetime, end: datetime) -> list:
+    """(granularity, first, last) bucket ranges, inclusive, that cover start..end."""
+    if end - start <= MINUTE_QUERY_LIMIT:
+        return [("minute", start, end)]
+    if end - start <= HOUR_QUERY_LIMIT:
+        return [("hour", start, end)]
+
+    first_hour = start.replace(minute=0, second=0, microsecond=0)
+    last_hour = end.replace(minute=0, second=0, microsecond=0)
+    first_day = first_hour if first_hour.hour == 0 else first_hour.replace(hour=0) + timedelta(days=1)
+    last_day = last_hour.replace(hour=0) if last_hour.hour == 23 else last_hour.replace(hour=0) - timedelta(days=1)
+
+    plan = []
+    if first_hour < first_day:
+        plan.append(("hour", first_hour, first_day - timedelta(hours=1)))
+    plan.append(("day", first_day, last_day))
+    if last_day + timedelta(days=1) <= last_hour:
+        plan.append(("hour", last_day + timedelta(days=1), last_hour))
+    return plan
+
+
+def query(start: datetime, end: datetime) -> list:
+    """
+    Summarize API usage between two instants per (endpoint, method, status
+    class) from the rollup documents, reading the coarsest rollups that
+    cover the range.
+    """
+    merged = {}
+    for granularity, first, last in _plan(start, end):
+        collection, key_format = ROLLUP_COLLECTIONS[granularity]
+        docs = _db.collection(collection) \
+            .where("bucket", ">=", first.strftime(key_format)) \
+            .where("bucket", "<=", last.strftime(key_format)) \
+            .stream()
+
+        for doc in docs:
+            data = doc.to_dict()
+            key = (data.get("endpoint"), data.get("method"), data.get("status_class"))
+            row = merged.get(key)
+            if row is None:
+                row = merged[key] = {"count": 0, "sum": 0.0, "min": None, "max": None, "buckets": {}, "last": None}
+            row["count"] += data.get("count", 0)
+            row["sum"] += data.get("sum_seconds", 0.0)
+            row["min"] = data.get("min_seconds") if row["min"] is None else min(row["min"], data.get("min_seconds", row["min"]))
+            row["max"] = data.get("max_seconds") if row["max"] is None else max(row["max"], data.get("max_seconds", row["max"]))
+            for name, n in data.get("buckets", {}).items():
+                row["buckets"][name] = row["buckets"].get(name, 0) + n
+            bucket = datetime.strptime(data["bucket"], key_format)
+            row["last"] = bucket if row["last"] is None else max(row["last"], bucket)
+
+    summary = []
+    for (endpoint, method, status), row in merged.items():
+        count = row["count"]
+        if not count:
+            continue
+        max_seconds = row["max"] or 0
+        summary.append({
+            "endpoint": endpoint,
+            "method": method,
+            "status_code": status,
+            "count": count,
+            "duration_seconds": row["sum"] / count,
+            "min_seconds": row["min"] or 0,
+            "max_seconds": max_seconds,
+            "p50_seconds": _percentile(row["buckets"], count, 0.50, max_seconds),
+            "p95_seconds": _percentile(row["buckets"], count, 0.95, max_seconds),
+            "p99_seconds": _percentile(row["buckets"], count, 0.99, max_seconds),
+            "timestamp": row["last"].isoformat(),
+        })
+
+    return summary
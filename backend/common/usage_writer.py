@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime
+from config.firebase_config import _db
+from common import async_db, usage_rollup
+
+# Records waiting to be written; when full, new records are dropped so the
+# request path never waits on Firestore
+USAGE_QUEUE_SIZE = 10000
+# Firestore WriteBatch limit
+USAGE_BATCH_SIZE = 500
+USAGE_FLUSH_INTERVAL_MS = 1000
+
+usage_stats = {"queued": 0, "flushed": 0, "dropped": 0, "failed": 0}
+
+_queue = None
+_task = None
+_pending = []
+
+
+def record(entry: dict):
+    """Queue one ApiUsage record without blocking the caller."""
+    # Rollups are tiny, so they keep counting even when raw records are dropped
+    usage_rollup.add(entry, datetime.fromisoformat(entry["timestamp"]))
+
+    if _queue is None:
+        usage_stats["dropped"] += 1
+        return
+    try:
+        _queue.put_nowait(entry)
+        usage_stats["queued"] += 1
+    except asyncio.QueueFull:
+        usage_stats["dropped"] += 1
+
+
+def _commit(records: list, rollup_ops: list, committed: dict):
+    """
+    Write raw records, then rollups, in WriteBatch-sized chunks. `committed`
+    tracks what landed so a failure part way through can be retried without
+    counting anything twice.
+    """
+    ops = [(None, _db.collection("ApiUsage").document(), entry, False) for entry in records]
+    ops.extend((key, ref, data, True) for key, ref, data in rollup_ops)
+
+    for start_index in range(0, len(ops), USAGE_BATCH_SIZE):
+        chunk = ops[start_index:start_index + USAGE_BATCH_SIZE]
+        batch = _db.batch()
+        for _, ref, data, merge in chunk:
+            batch.set(ref, data, merge=merge)
+        batch.commit()
+        for key, _, _, _ in chunk:
+            if key is None:
+                committed["records"] += 1
+            else:
+                committed["rollups"].add(key)
+
+
+async def _flush(records: list):
+    rollups = usage_rollup.drain()
+    rollup_ops = usage_rollup.write_ops(rollups)
+    if not records and not rollup_ops:
+        return
+    committed = {"records": 0, "rollups": set()}
+    try:
+        await async_db.run_blocking(_commit, records, rollup_ops, committed)
+        usage_stats["flushed"] += len(records)
+    except Exception as e:
+        usage_stats["flushed"] += committed["records"]
+        print(f"Failed to flush API usage: {e}")
+        # Unwritten rollups go back in memory; they are merged into the next flush
+        usage_rollup.restore({key: aggregate for key, aggregate in rollups.items() if key not in committed["rollups"]})
+        _requeue(records[committed["records"]:])
+
+
+def _requeue(records: list):
+    # Raw records get another try while there is room; the rest are lost
+    for entry in records:
+        try:
+            _queue.put_nowait(entry)
+        except (asyncio.QueueFull, AttributeError):
+            usage_stats["failed"] += 1
+
+
+async def _run():
+    global _pending
+    loop = asyncio.get_running_loop()
+    interval = USAGE_FLUSH_INTERVAL_MS / 1000
+
+    while True:
+        _pending.append(await _queue.get())
+        deadline = loop.time() + interval
+
+        # Fill the batch until it is full or the flush interval elapses
+        while len(_pending) < USAGE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                _pending.append(await asyncio.wait_for(_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        records, _pending = _pending, []
+        await _flush(records)
+
+
+async def start():
+    global _queue, _task
+    _queue = asyncio.Queue(maxsize=USAGE_QUEUE_SIZE)
+    _task = asyncio.create_task(_run())
+
+
+async def stop():
+    # Flush whatever is still buffered before the worker goes away
+    global _queue, _task, _pending
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+
+    records, _pending = _pending, []
+    while not _queue.empty():
+        records.append(_queue.get_nowait())
+    _queue, _task = None, None
+
+    await _flush(records)
@@ -1,9 +1,11 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from scheduler.booking_scheduler import start_scheduler
+from scheduler.booking_scheduler import start_scheduler, stop_scheduler
+from services.booking_service import backfill_occupancy
 from contextlib import asynccontextmanager
+import asyncio
 from datetime import datetime
-from config.firebase_config import _db
+from common import ref_cache, gate_index, slot_intervals, slot_occupancy, live_feed, async_db, usage_writer, sms_outbox, gate_dispatcher
 
 from routers.user_router import router as user_router
 from routers.auth_router import router as auth_router
@@ -18,6 +20,7 @@ from routers.activity_router import router as activity_router
 from routers.alert_router import router as alert_router
 from routers.booking_router import router as booking_router
 from routers.report_router import router as report_router
+from routers.live_router import router as live_router
 
 
 from dotenv import load_dotenv
@@ -35,8 +38,30 @@ settings = Settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Code to run at startup
+    live_feed.start(asyncio.get_running_loop())
+    ref_cache.start_listeners()
+    gate_index.build()
+    slot_intervals.build()
+    # Feeds both indexes; started after they are built so no change is lost to the initial load
+    gate_index.start_listeners()
+    # Bookings from before per-day claims must hold theirs before new ones arrive
+    backfill_occupancy()
+    slot_occupancy.start()
+    # Indexes are loaded before the expiry engine starts removing from them
     start_scheduler()
+    await usage_writer.start()
+    sms_outbox.start_workers()
     yield
+    # Code to run at shutdown
+    live_feed.stop()
+    sms_outbox.stop_workers()
+    await gate_dispatcher.close()
+    await usage_writer.stop()
+    stop_scheduler()
+    slot_occupancy.stop()
+    gate_index.stop_listeners()
+    ref_cache.stop_listeners()
+    async_db.shutdown()
 
 
 
@@ -63,6 +88,7 @@ app.include_router(activity_router, prefix="/api/activity", tags=["Activity"])
 app.include_router(alert_router, prefix="/api/alert", tags=["Alert"])
 app.include_router(booking_router, prefix="/api/booking", tags=["Booking"])
 app.include_router(report_router, prefix="/api/report", tags=["Report"])
+app.include_router(live_router, prefix="/api/live", tags=["Live"])
 
 
 
@@ -81,20 +107,20 @@ async def log_api_usage(request: Request, call_next):
     end_time = datetime.utcnow()
 
     api_endpoint = request.url.path
+    # Rollups group by the route template so /api/slot/{slot_id} is one series
+    route = request.scope.get("route")
     method = request.method
     status_code = response.status_code
     duration = (end_time - start_time).total_seconds()
 
-    try:
-        api_log_ref = _db.collection("ApiUsage").document()
-        api_log_ref.set({
-            "endpoint": api_endpoint,
-            "method": method,
-            "status_code": status_code,
-            "duration_seconds": duration,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
-    except Exception as e:
-        print(f"Failed to log API usage: {e}")
+    # Written in batches by a background task, off the request path
+    usage_writer.record({
+        "endpoint": api_endpoint,
+        "route": getattr(route, "path", None),
+        "method": method,
+        "status_code": status_code,
+        "duration_seconds": duration,
+        "timestamp": end_time.isoformat(),
+    })
 
     return response
\ No newline at end of file
@@ -15,4 +15,12 @@ class BookingResponse(BaseModel):
     created_at: Optional[datetime]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BookingCreate(BaseModel):
+    vehicle_id: str
+    package_id: str
+    slot_id: str
+    from_date: str
+    to_date: str
+    contact: Optional[str] = None
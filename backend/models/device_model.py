@@ -16,6 +16,8 @@ class deviceTypeResponse(deviceTypeModal):
 class deviceModal(BaseModel):
     name: str
     type_id: str
+    ip_address: Optional[str] = None  # ESP32 address, e.g. http://192.168.60.111
+    gate_id: Optional[str] = None
 
 class deviceResponse(deviceModal):
     id: str
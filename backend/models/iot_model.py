@@ -0,0 +1,11 @@
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+class IoTEvent(BaseModel):
+    device_id: str
+    seq: int
+    type: Literal["ir", "matched", "mismatch", "exit"]
+    slot: Optional[str] = None       # IR slot name, e.g. SLOT2
+    state: Optional[int] = None      # raw IR level for "ir" events
+    booking_id: Optional[str] = None
+    device_time_ms: Optional[int] = None
@@ -11,6 +11,8 @@ class sloteModal(BaseModel):
 class slotResponse(sloteModal):
     id: str
     created_at: Optional[datetime] = None  # Add created_at if you're returning it
+    occupancy: Optional[str] = None  # empty / occupied, from the IR state machine
+    occupancy_changed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
-from services.booking_service import get_all_bookings, get_bookings_by_user, booking_user
-from models.booking_model import BookingResponse
+from fastapi import APIRouter, HTTPException, Depends, Header
+from services.booking_service import get_all_bookings, get_bookings_by_user, booking_user, SlotUnavailableError
+from models.booking_model import BookingResponse, BookingCreate
 from services.auth_service import get_current_user
 
 router = APIRouter()
@@ -26,9 +26,11 @@ def get_user_bookings(current_user: dict = Depends(get_current_user)):
     
 
 @router.post("/create")
-def user_creation(user_data: BookingResponse):
+def user_creation(user_data: BookingCreate, idempotency_key: str = Header(None, alias="Idempotency-Key")):
     try:
-        return booking_user(user_data)
+        return booking_user(user_data, idempotency_key)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error during user creation: {str(e)}")
     
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import HTTPException, APIRouter
 from services.device_service import get_device_type, add_device, get_all_devices, delete_device_by_id, update_device_by_id
 from models.device_model import deviceTypeResponse, deviceModal, deviceResponse
+from common import async_db
 
 router = APIRouter()
 
@@ -15,7 +16,7 @@ def get_device_types():
 @router.post("/create")
 async def create_device(device_data: deviceModal):
     try:
-        return add_device(device_data)
+        return await async_db.run_blocking(add_device, device_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create device: {str(e)}")
 
@@ -32,7 +33,7 @@ def get_all_device():
 async def delete_device(
     device_id: str):
     try:
-        delete_device_by_id(device_id)
+        await async_db.run_blocking(delete_device_by_id, device_id)
         return {"message": "Device deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete device: {str(e)}")
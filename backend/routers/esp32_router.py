@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Request
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, WebSocket
 from pydantic import BaseModel
-from config.firebase_config import _db
-from firebase_admin import firestore
+from common import async_db, gate_dispatcher, iot_hub
+from models.iot_model import IoTEvent
+from services.esp32_service import record_parked, record_mismatch, record_exit, ingest_events, ingest_stats
 
 router = APIRouter()
 
@@ -12,45 +14,39 @@ class ParkingData(BaseModel):
 
 @router.post("/status")
 async def parked(data: ParkingData):
-    print(f"[PARKED] Booking ID: {data.bookingId}, Slot: {data.detectedSlot}, Status: {data.status}")
-    return {"message": "Parked status received"}
+    return record_parked(data.bookingId, data.detectedSlot, data.status)
 
 
 @router.post("/mismatch")
 async def mismatch_status(data: ParkingData):
+    return await async_db.run_blocking(record_mismatch, data.bookingId, data.detectedSlot, data.status)
 
 
-    _db.collection("Alert").add({
-        "booking_id": data.bookingId,
-        "detected_slot": data.detectedSlot,
-        "status": data.status,
-        "time": firestore.SERVER_TIMESTAMP
-    })
+@router.post("/exit")
+async def mark_exit(data: dict):
+    return await async_db.run_blocking(record_exit, data.get("bookingId"))
 
-    print(f"[MISMATCH] Booking ID: {data.bookingId}, Sent Slot: {data.detectedSlot}, Status: {data.status}")
-    return {"message": "Mismatch status received"}
 
+@router.websocket("/ws/{device_id}")
+async def device_socket(websocket: WebSocket, device_id: str, gate_id: Optional[str] = None):
+    # device_id is the controller's Device document id; gate_id lets the
+    # dispatcher find controllers that have no Device document yet
+    await iot_hub.serve(websocket, device_id, gate_id)
 
-@router.post("/exit")
-async def mark_exit(data: dict):
-    booking_id = data.get("bookingId")
-    if not booking_id:
-        return {"status": "error", "message": "Missing bookingId"}
-    
-    try:
-        # Get the first matching document
-        bookings = _db.collection("UserActivities").where("booking_id", "==", booking_id).limit(1).stream()
-        record = next(bookings, None)
-        print("Updating booking ID:", record.id)
-
-
-        if record and record.exists:
-            record.reference.update({
-                "exit_time": firestore.SERVER_TIMESTAMP
-            })
-            return {"status": "exit_recorded"}
-        else:
-            return {"status": "not_found", "message": "Booking not found"}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
 
+@router.get("/gates/stats")
+def gate_stats():
+    stats = gate_dispatcher.device_stats()
+    return {
+        "devices": stats,
+        "hub": {**iot_hub.hub_stats, "connected_devices": iot_hub.connected_devices()},
+        "ingest": ingest_stats
+    }
+
+
+@router.post("/events")
+async def batch_events(events: List[IoTEvent]):
+    try:
+        return await async_db.run_blocking(ingest_events, events)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from common import async_db, live_feed
+from services.slot_service import get_all_slots
+
+router = APIRouter()
+
+@router.get("/stream")
+async def live_stream():
+    # Subscribe before the snapshot so no change falls between the two
+    subscriber = live_feed.subscribe()
+    try:
+        slots = await async_db.run_blocking(get_all_slots)
+    except Exception:
+        live_feed.unsubscribe(subscriber)
+        raise
+    snapshot = {"type": "snapshot", "data": {"slots": [slot.model_dump() for slot in slots]}}
+
+    return StreamingResponse(
+        live_feed.stream(subscriber, [snapshot]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats")
+def live_stats():
+    return live_feed.live_stats
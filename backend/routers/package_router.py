@@ -1,6 +1,7 @@
 from fastapi import HTTPException, APIRouter
 from services.package_service import get_all_packages, add_package, delete_package
 from models.package_model import packageResponse, packageModal
+from common import async_db
 
 router = APIRouter()
 
@@ -18,7 +19,7 @@ def get_admin_packages():
 async def create_admin_package(
     package_data: packageModal):
     try:
-        return add_package(package_data)
+        return await async_db.run_blocking(add_package, package_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create package: {str(e)}")
 
@@ -27,7 +28,7 @@ async def create_admin_package(
 async def delete_admin_package(
     package_id: str):
     try:
-        delete_package(package_id)
+        await async_db.run_blocking(delete_package, package_id)
         return {"message": "Package deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete package: {str(e)}")
\ No newline at end of file
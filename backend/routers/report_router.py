@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from firebase_admin import auth
 from config.firebase_config import _db  # Ensure this imports your Firebase app instance
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import defaultdict
+from common import async_db, usage_rollup
 
 router = APIRouter()
 
@@ -228,22 +229,11 @@ def get_bookings():
 def get_api_usage(start_date: str = None, end_date: str = None):
 
     try:
-        # Reference to the ApiUsage collection in Firestore
-        api_usage_ref = _db.collection("ApiUsage")
-
-        # Apply filters if start_date and end_date are provided
-        query = api_usage_ref
-        if start_date and end_date:
-            start_datetime = datetime.fromisoformat(start_date)
-            end_datetime = datetime.fromisoformat(end_date)
-            query = query.where("timestamp", ">=", start_datetime.isoformat()).where(
-                "timestamp", "<=", end_datetime.isoformat()
-            )
-
-        # Fetch data
-        api_usage_data = [doc.to_dict() for doc in query.stream()]
+        # Summaries come from the per-minute / per-hour / per-day rollups, defaulting to the last 30 days
+        end_datetime = datetime.fromisoformat(end_date) if end_date else datetime.utcnow()
+        start_datetime = datetime.fromisoformat(start_date) if start_date else end_datetime - timedelta(days=30)
 
-        return api_usage_data
+        return usage_rollup.query(start_datetime, end_datetime)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -259,7 +249,7 @@ async def get_users():
     """
     try:
         users_ref = _db.collection("User")
-        users_snapshot = users_ref.stream()
+        users_snapshot = await async_db.stream(users_ref)
 
         users_data = []
         for doc in users_snapshot:
@@ -285,7 +275,7 @@ async def get_vehicles():
     """
     try:
         vehicles_ref = _db.collection("Vehicle")
-        vehicles_snapshot = vehicles_ref.stream()
+        vehicles_snapshot = await async_db.stream(vehicles_ref)
 
         vehicles_data = []
         for doc in vehicles_snapshot:
@@ -310,7 +300,7 @@ async def get_bookings():
     """
     try:
         bookings_ref = _db.collection("Booking")
-        bookings_snapshot = bookings_ref.stream()
+        bookings_snapshot = await async_db.stream(bookings_ref)
 
         bookings_data = []
         for doc in bookings_snapshot:
@@ -336,7 +326,7 @@ async def get_alerts():
         alerts_ref = _db.collection("Alert")
 
         alerts_data = []
-        for doc in alerts_ref.stream():
+        for doc in await async_db.stream(alerts_ref):
             alert = doc.to_dict()
             alerts_data.append({
                 "id": doc.id,
@@ -357,21 +347,9 @@ async def get_alerts():
 async def get_api_usage():
 
     try:
-        api_usage_ref = _db.collection("ApiUsage")
-        api_usage_snapshot = api_usage_ref.order_by("timestamp", direction="DESCENDING").limit(100).stream()
-
-        api_usage_data = []
-        for doc in api_usage_snapshot:
-            usage = doc.to_dict()
-            api_usage_data.append({
-                "endpoint": usage.get("endpoint", "unknown"),
-                "method": usage.get("method", "unknown"),
-                "status_code": usage.get("status_code", 0),
-                "duration_seconds": usage.get("duration_seconds", 0),
-                "timestamp": usage.get("timestamp", None),
-            })
-
-        return api_usage_data
+        # Last 24 hours, one row per (endpoint, method, status class)
+        end_datetime = datetime.utcnow()
+        return await async_db.run_blocking(usage_rollup.query, end_datetime - timedelta(days=1), end_datetime)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while fetching API usage data: {str(e)}")
@@ -385,7 +363,7 @@ async def get_devices():
     """
     try:
         devices_ref = _db.collection("Device")
-        devices_snapshot = devices_ref.stream()
+        devices_snapshot = await async_db.stream(devices_ref)
 
         devices_data = []
         for doc in devices_snapshot:
@@ -406,7 +384,7 @@ async def get_devices():
 
     try:
         devices_ref = _db.collection("UserActivities")
-        devices_snapshot = devices_ref.stream()
+        devices_snapshot = await async_db.stream(devices_ref)
 
         devices_data = []
         for doc in devices_snapshot:
@@ -1,6 +1,7 @@
-from services.slot_service import get_all_slots, add_slot, delete_slot_by_id, get_active_slots
+from services.slot_service import get_all_slots, add_slot, delete_slot_by_id, get_active_slots, get_available_slots
 from models.slot_model import sloteModal, slotResponse
-from fastapi import HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Query
+from common import async_db
 
 router = APIRouter()
 
@@ -20,10 +21,18 @@ def get_active_slot():
         raise HTTPException(status_code=500, detail=f"Failed to fetch slots: {str(e)}")
 
 
+@router.get("/availability", response_model=list[slotResponse])
+def get_slot_availability(from_date: str = Query(..., alias="from"), to_date: str = Query(..., alias="to")):
+    try:
+        return get_available_slots(from_date, to_date)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to fetch slot availability: {str(e)}")
+
+
 @router.post("/create")
 async def create_slot(slos_data: sloteModal):
     try:
-        return add_slot(slos_data)
+        return await async_db.run_blocking(add_slot, slos_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create slots: {str(e)}")
 
@@ -32,7 +41,7 @@ async def create_slot(slos_data: sloteModal):
 async def delete_slot(
     slot_id: str):
     try:
-        delete_slot_by_id(slot_id)
+        await async_db.run_blocking(delete_slot_by_id, slot_id)
         return {"message": "Slot deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete Slot: {str(e)}")
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
 from models.user_model  import userModel, user_Model, userUpdate, user_Update
 from services.user_service import register_user, create_user, get_all_users, get_user_by_id, update_user, delete_user
+from services.booking_service import SlotUnavailableError
 
 router = APIRouter()
 
 # User registration Form
 @router.post("/register/")
-def user_registration(user_data: userModel):
+def user_registration(user_data: userModel, idempotency_key: str = Header(None, alias="Idempotency-Key")):
     try:
-        return register_user(user_data)
+        return register_user(user_data, idempotency_key)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error during registration router: {str(e)}")
     
@@ -1,77 +1,51 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from typing import Optional
 from config.firebase_config import _db
 from firebase_admin import firestore
-import requests
+from common import gate_index, gate_dispatcher, async_db, live_feed
 
 router = APIRouter()
 
 class PlateData(BaseModel):
     plate: str
-
-ESP32_IP = "http://192.168.60.111"  # Nrework IP Address to communicate
+    gate_id: Optional[str] = None  # Which gate's ESP32 should act on the plate
 
 @router.post("/")
 async def process_plate(data: PlateData):
-    plate = data.plate.upper().replace(" ", "")  # Normalize input
-    status = ""
-    slot_name = "Unknown"
-    esp_data = ""
-    vehicle_id = ""
-    booking_id = ""
-
-    # Check if vehicle exists
-    vehicle_ref = _db.collection("Vehicle").where("plate_number", "==", plate).limit(1).stream()
-    vehicle = next(vehicle_ref, None)
-
-    if not vehicle:
-        status = "notregistered"
+    # Plate -> vehicle -> active booking -> slot, resolved from the in-memory index
+    decision = await async_db.run_blocking(gate_index.decide, data.plate)
+    plate = decision["plate"]
+    status = decision["status"]
+    slot_name = decision["slot"]
+    vehicle_id = decision["vehicle_id"]
+    booking_id = decision["booking_id"]
+
+    # 🔁 Send command to the gate's ESP32 without waiting for it
+    device = await async_db.run_blocking(gate_dispatcher.resolve_device, data.gate_id)
+    if device is None:
+        esp_data = f"No device registered for gate {data.gate_id}"
     else:
-        vehicle_id = vehicle.id
-
-        # Check active booking
-        booking_ref = _db.collection("Booking") \
-            .where("vehicle_id", "==", vehicle_id) \
-            .where("is_active", "==", True) \
-            .limit(1).stream()
-        
-        booking = next(booking_ref, None)
-
-        if not booking:
-            status = "notactive"
-        else:
-            status = "active"
-            booking_data = booking.to_dict()
-            booking_id = booking.id
-            slot_id = booking_data.get("slot_id")
-
-            # Get slot name
-            if slot_id:
-                slot_doc = _db.collection("Slot").document(slot_id).get()
-                if slot_doc.exists:
-                    slot_name = slot_doc.to_dict().get("slotNo", "Unknown")
-
-    # 🔁 Send command to ESP32
-    try:
-        esp_response = requests.post(
-            f"{ESP32_IP}/command",
-            json={
-                "action": "open",
-                "slot": slot_name,
-                "plate": plate,
-                "booking_id": booking_id,
-                "status": status
-            },
-            timeout=3
-        )
-        esp_data = esp_response.text
-    except Exception as e:
-        esp_data = f"Failed to send to ESP32: {e}"
+        gate_dispatcher.dispatch(device, {
+            "action": "open",
+            "slot": slot_name,
+            "plate": plate,
+            "booking_id": booking_id,
+            "status": status
+        })
+        esp_data = f"Command queued for device {device['id']}"
+    live_feed.publish("gate", {
+        "plate": plate,
+        "status": status,
+        "slot": slot_name,
+        "booking_id": booking_id,
+        "device_id": device["id"] if device else None
+    })
 
     # Log entry time if active
     if status == "active":
         try:
-            _db.collection("UserActivities").add({
+            await async_db.run_blocking(_db.collection("UserActivities").add, {
                 "booking_id": booking_id,
                 "entry_time": firestore.SERVER_TIMESTAMP
             })
@@ -1,30 +1,176 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
+import heapq
+import threading
 import pytz
 from config.firebase_config import _db
+from common import gate_index, slot_intervals
 
-def deactivate_expired_bookings():
-    now = datetime.now(pytz.UTC)
+# Firestore WriteBatch limit
+EXPIRY_BATCH_SIZE = 500
+# Safety net for expiries missed while the process was down or by other workers
+RECONCILE_INTERVAL_MINUTES = 15
+# Longest single wait; far-future expiries overflow Condition.wait
+MAX_WAIT_SECONDS = 3600
+ERROR_BACKOFF_SECONDS = 5
+WORKER_JOIN_SECONDS = 5
+
+_heap = []          # (expires_at, booking_id)
+_scheduled = {}     # booking_id -> expires_at, the heap entry that is still valid
+_condition = threading.Condition()
+_worker = None
+_stopping = False
+_scheduler = None
+
+
+def expiry_instant(to_date):
+    """Instant a booking stops being active; to_date strings mean midnight UTC."""
+    if isinstance(to_date, datetime):
+        return to_date if to_date.tzinfo else to_date.replace(tzinfo=pytz.UTC)
+    return datetime.strptime(to_date, "%Y-%m-%d").replace(tzinfo=pytz.UTC)
+
+
+def schedule_booking(booking_id: str, to_date):
+    """Register an active booking so it is deactivated exactly at expiry."""
+    try:
+        expires_at = expiry_instant(to_date)
+    except Exception as e:
+        print(f"Error parsing date for booking {booking_id}: {e}")
+        return
+
+    with _condition:
+        _scheduled[booking_id] = expires_at
+        heapq.heappush(_heap, (expires_at, booking_id))
+        # Wake the worker in case this is now the earliest expiry
+        _condition.notify()
+
+
+def unschedule_booking(booking_id: str):
+    # The heap entry is skipped lazily once it surfaces
+    with _condition:
+        _scheduled.pop(booking_id, None)
+
+
+def deactivate_bookings(booking_ids: list):
+    for start_index in range(0, len(booking_ids), EXPIRY_BATCH_SIZE):
+        chunk = booking_ids[start_index:start_index + EXPIRY_BATCH_SIZE]
+        batch = _db.batch()
+        for booking_id in chunk:
+            batch.update(_db.collection("Booking").document(booking_id), {"is_active": False})
+        try:
+            batch.commit()
+        except Exception as e:
+            # One deleted booking fails the whole batch; retry the chunk one by one
+            print(f"Batch deactivation failed, retrying individually: {e}")
+            for booking_id in chunk:
+                try:
+                    _db.collection("Booking").document(booking_id).update({"is_active": False})
+                except Exception as e:
+                    print(f"Error deactivating booking {booking_id}: {e}")
+
+        for booking_id in chunk:
+            gate_index.remove_booking(booking_id)
+            slot_intervals.remove_booking(booking_id)
+            print(f"Booking {booking_id} expired and deactivated.")
+
+
+def _pop_due(now) -> list:
+    due = []
+    while _heap and _heap[0][0] <= now:
+        expires_at, booking_id = heapq.heappop(_heap)
+        if _scheduled.get(booking_id) == expires_at:
+            del _scheduled[booking_id]
+            due.append(booking_id)
+    return due
+
+
+def _run():
+    while True:
+        try:
+            with _condition:
+                if _stopping:
+                    return
+                now = datetime.now(pytz.UTC)
+                due = _pop_due(now)
+                if not due:
+                    timeout = (_heap[0][0] - now).total_seconds() if _heap else None
+                    _condition.wait(None if timeout is None else min(timeout, MAX_WAIT_SECONDS))
+                    continue
+
+            deactivate_bookings(due)
+        except Exception as e:
+            # Anything left active is picked up by reconcile_expired_bookings
+            print(f"Error in booking expiry worker: {e}")
+            with _condition:
+                _condition.wait_for(lambda: _stopping, ERROR_BACKOFF_SECONDS)
+
+
+def load_active_bookings():
+    """
+    Seed the expiry heap from the active bookings once at startup and backfill
+    the indexed expires_at field on bookings created before it existed.
+    """
     bookings = _db.collection("Booking").where("is_active", "==", True).stream()
+    backfill = []
 
     for booking in bookings:
         data = booking.to_dict()
-        to_date_str = data.get("to_date")
+        to_date = data.get("to_date")
+        if not to_date:
+            continue
+        schedule_booking(booking.id, to_date)
+        if "expires_at" not in data and booking.id in _scheduled:
+            backfill.append((booking.reference, _scheduled[booking.id]))
+
+    for start_index in range(0, len(backfill), EXPIRY_BATCH_SIZE):
+        batch = _db.batch()
+        for ref, expires_at in backfill[start_index:start_index + EXPIRY_BATCH_SIZE]:
+            batch.update(ref, {"expires_at": expires_at})
+        batch.commit()
+
+    print(f"Expiry engine loaded {len(_scheduled)} active bookings")
 
-        if to_date_str:
-            try:
-                # Parse the string into a datetime object (midnight time assumed)
-                to_date = datetime.strptime(to_date_str, "%Y-%m-%d").replace(tzinfo=pytz.UTC)
 
-                # Compare with current time
-                if to_date < now:
-                    booking.reference.update({"is_active": False})
-                    print(f"Booking {booking.id} expired and deactivated.")
+def reconcile_expired_bookings():
+    # Indexed query on (is_active, expires_at) instead of streaming every active
+    # booking; needs the composite index in firestore.indexes.json
+    now = datetime.now(pytz.UTC)
+    try:
+        expired = _db.collection("Booking") \
+            .where("is_active", "==", True) \
+            .where("expires_at", "<=", now) \
+            .stream()
+        booking_ids = [booking.id for booking in expired]
+    except Exception as e:
+        print(f"Error reconciling expired bookings: {e}")
+        return
+
+    for booking_id in booking_ids:
+        unschedule_booking(booking_id)
+    if booking_ids:
+        deactivate_bookings(booking_ids)
 
-            except Exception as e:
-                print(f"Error parsing date for booking {booking.id}: {e}")
 
 def start_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(deactivate_expired_bookings, "interval", minutes=1)
-    scheduler.start()
+    global _worker, _scheduler, _stopping
+    load_active_bookings()
+
+    _stopping = False
+    _worker = threading.Thread(target=_run, name="booking-expiry", daemon=True)
+    _worker.start()
+
+    _scheduler = BackgroundScheduler()
+    _scheduler.add_job(reconcile_expired_bookings, "interval", minutes=RECONCILE_INTERVAL_MINUTES)
+    _scheduler.start()
+
+
+def stop_scheduler():
+    global _stopping
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+
+    with _condition:
+        _stopping = True
+        _condition.notify()
+    if _worker is not None:
+        _worker.join(WORKER_JOIN_SECONDS)
@@ -1,61 +1,71 @@
 from config.firebase_config import _db
 from firebase_admin import firestore
 from models.user_model import userModel
-from models.booking_model import BookingResponse
-import random
-from datetime import datetime
-from common.sms import send_sms
-import string
+from models.booking_model import BookingResponse, BookingCreate
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import hashlib
+import secrets
+import threading
+from common.sms_outbox import enqueue_sms
+from common.batch_get import fetch_docs, stream_where_in
+from common import ref_cache, gate_index, slot_intervals
+from scheduler.booking_scheduler import expiry_instant, schedule_booking
+
+# Unambiguous characters for booking codes (no 0/O, 1/I)
+BOOKING_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+BOOKING_CODE_ATTEMPTS = 5
+# One occupancy document is claimed per booked day
+MAX_BOOKING_DAYS = 366
+IDEMPOTENCY_CACHE_SIZE = 10000
+
+_idempotency_lock = threading.Lock()
+_idempotent_responses = OrderedDict()
+
+
+class SlotUnavailableError(ValueError):
+    pass
+
+
+class _BookingCodeTaken(Exception):
+    pass
+
+def _build_booking_rows(booking_docs, vehicles=None):
+    # Resolve referenced Vehicles with one multi-get and Packages/Slots from the
+    # reference cache instead of three document reads per booking
+    booking_rows = [(doc.id, doc.to_dict()) for doc in booking_docs]
+
+    if vehicles is None:
+        vehicles = fetch_docs("Vehicle", (data.get("vehicle_id") for _, data in booking_rows))
+    packages = ref_cache.get_docs("Package")
+    slots = ref_cache.get_docs("Slot")
+
+    bookings = []
+    for booking_id, booking_data in booking_rows:
+        vehicle_data = vehicles.get(booking_data.get("vehicle_id"), {})
+        package_data = packages.get(booking_data.get("package_id"), {})
+        slot_data = slots.get(booking_data.get("slot_id"), {})
+
+        bookings.append({
+            "id": booking_id,
+            "booking_code": booking_data.get("booking_code"),
+            "is_active": str(booking_data.get("is_active", "")),
+            "payment_status": booking_data.get("payment_status"),
+            "vehicle": vehicle_data.get("plate_number"),
+            "package": package_data.get("name"),
+            "slot": slot_data.get("slotNo"),
+            "from_date": booking_data.get("from_date"),
+            "to_date": booking_data.get("to_date"),
+            "created_at": booking_data.get("created_at"),
+        })
+
+    return bookings
+
 
 def get_all_bookings():
     try:
         bookings_ref = _db.collection("Booking").stream()
-        bookings = []
-
-        for booking_doc in bookings_ref:
-            booking_data = booking_doc.to_dict()
-
-            # Extract IDs
-            vehicle_id = booking_data.get("vehicle_id")
-            package_id = booking_data.get("package_id")
-            slot_id = booking_data.get("slot_id")
-
-            # Fetch vehicle plate number
-            vehicle_plate = None
-            vehicle_doc = _db.collection("Vehicle").document(vehicle_id).get()
-            if vehicle_doc.exists:
-                vehicle_data = vehicle_doc.to_dict()
-                vehicle_plate = vehicle_data.get("plate_number")
-
-            # Fetch package name
-            package_name = None
-            package_doc = _db.collection("Package").document(package_id).get()
-            if package_doc.exists:
-                package_data = package_doc.to_dict()
-                package_name = package_data.get("name")
-
-            # Fetch slot name
-            slot_name = None
-            slot_doc = _db.collection("Slot").document(slot_id).get()
-            if slot_doc.exists:
-                slot_data = slot_doc.to_dict()
-                slot_name = slot_data.get("slotNo")
-
-            # Append processed booking data
-            bookings.append({
-                "id": booking_doc.id,
-                "booking_code": booking_data.get("booking_code"),
-                "is_active": str(booking_data.get("is_active", "")),
-                "payment_status": booking_data.get("payment_status"),
-                "vehicle": vehicle_plate,
-                "package": package_name,
-                "slot": slot_name, 
-                "from_date": booking_data.get("from_date"),
-                "to_date": booking_data.get("to_date"),
-                "created_at": booking_data.get("created_at"),
-            })
-
-        return bookings
+        return _build_booking_rows(bookings_ref)
 
     except Exception as e:
         raise ValueError(f"Error fetching Booking details: {str(e)}")
@@ -64,64 +74,17 @@ def get_all_bookings():
 
 def get_bookings_by_user(user_id: str):
     try:
-        # Step 1: Fetch all vehicle IDs associated with the user
+        # Step 1: Fetch all vehicles associated with the user
         vehicles_ref = _db.collection("Vehicle").where("user_id", "==", user_id).stream()
-        vehicle_ids = [vehicle_doc.id for vehicle_doc in vehicles_ref]
+        vehicles = {vehicle_doc.id: vehicle_doc.to_dict() for vehicle_doc in vehicles_ref}
 
-        if not vehicle_ids:
+        if not vehicles:
             # If no vehicles are found for the user, return an empty list
             return []
 
-        # Step 2: Fetch bookings for each vehicle ID
-        bookings = []
-        for vehicle_id in vehicle_ids:
-            bookings_ref = _db.collection("Booking").where("vehicle_id", "==", vehicle_id).stream()
-
-            for booking_doc in bookings_ref:
-                booking_data = booking_doc.to_dict()
-
-                # Extract IDs
-                package_id = booking_data.get("package_id")
-                slot_id = booking_data.get("slot_id")
-
-                # Fetch vehicle plate number (already fetched via vehicle_id)
-                vehicle_plate = None
-                vehicle_doc = _db.collection("Vehicle").document(vehicle_id).get()
-                if vehicle_doc.exists:
-                    vehicle_data = vehicle_doc.to_dict()
-                    vehicle_plate = vehicle_data.get("plate_number")
-
-                # Fetch package name
-                package_name = None
-                if package_id:  # Ensure package_id is not None
-                    package_doc = _db.collection("Package").document(package_id).get()
-                    if package_doc.exists:
-                        package_data = package_doc.to_dict()
-                        package_name = package_data.get("name")
-
-                # Fetch slot name
-                slot_name = None
-                if slot_id:  # Ensure slot_id is not None
-                    slot_doc = _db.collection("Slot").document(slot_id).get()
-                    if slot_doc.exists:
-                        slot_data = slot_doc.to_dict()
-                        slot_name = slot_data.get("slotNo")
-
-                # Append processed booking data
-                bookings.append({
-                    "id": booking_doc.id,
-                    "booking_code": booking_data.get("booking_code"),
-                    "is_active": str(booking_data.get("is_active", "")),
-                    "payment_status": booking_data.get("payment_status"),
-                    "vehicle": vehicle_plate,
-                    "package": package_name,
-                    "slot": slot_name,
-                    "from_date": booking_data.get("from_date"),
-                    "to_date": booking_data.get("to_date"),
-                    "created_at": booking_data.get("created_at"),
-                })
-
-        return bookings
+        # Step 2: Fetch bookings for all vehicle IDs, then join the references
+        bookings_ref = stream_where_in("Booking", "vehicle_id", vehicles.keys())
+        return _build_booking_rows(bookings_ref, vehicles=vehicles)
 
     except Exception as e:
         raise ValueError(f"Error fetching Booking details: {str(e)}")
@@ -130,55 +93,258 @@ def get_bookings_by_user(user_id: str):
 
 
 
-def booking_user(user_data: BookingResponse):
-    try:
-        # Generate a unique booking code
-        date_str = datetime.now().strftime("%Y%m%d")
-        random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-        booking_code = f"BK{date_str}-{random_str}"
-
-        # Extract vehicle ID from user_data (assuming it's provided)
-        vehicle_ref_id = user_data.vehicle_id  # Ensure this field exists in user_data
-
-        # Store booking details in Firestore
-        booking_ref = _db.collection("Booking")
-        booking_doc = booking_ref.add({
-            "booking_code": booking_code,
-            "vehicle_id": vehicle_ref_id,
-            "package_id": user_data.package_id,
-            "from_date": user_data.from_date,
-            "to_date": user_data.to_date,
-            "slot_id": user_data.slot_id,
-            "payment_status": "pending",
-            "is_active": True,
-            "created_at": firestore.SERVER_TIMESTAMP,
+def _booking_code() -> str:
+    date_str = datetime.now().strftime("%Y%m%d")
+    random_str = "".join(secrets.choice(BOOKING_CODE_ALPHABET) for _ in range(6))
+    return f"BK{date_str}-{random_str}"
+
+
+def _booked_days(from_date: str, to_date: str) -> list:
+    # The booking expires at the start of to_date, so that day is not claimed
+    start = datetime.strptime(from_date, "%Y-%m-%d").date()
+    end = datetime.strptime(to_date, "%Y-%m-%d").date()
+    if end <= start:
+        raise ValueError("to_date must be after from_date")
+    days = (end - start).days
+    if days > MAX_BOOKING_DAYS:
+        raise ValueError(f"Bookings are limited to {MAX_BOOKING_DAYS} days")
+    return [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+
+def _idempotency_ref(idempotency_key: str):
+    # Keys are client supplied, so hash them into a safe document id
+    doc_id = hashlib.sha256(idempotency_key.encode()).hexdigest()
+    return _db.collection("IdempotencyKey").document(doc_id)
+
+
+def _occupancy_ref(slot_id: str, day: str):
+    return _db.collection("SlotOccupancy").document(f"{slot_id}_{day}")
+
+
+def _booking_code_ref(booking_code: str):
+    # Reserving the code document makes generated codes collision-free
+    return _db.collection("BookingCode").document(booking_code)
+
+
+def _cached_response(idempotency_key: str):
+    with _idempotency_lock:
+        return _idempotent_responses.get(idempotency_key)
+
+
+def _cache_response(idempotency_key: str, response: dict):
+    with _idempotency_lock:
+        _idempotent_responses[idempotency_key] = response
+        _idempotent_responses.move_to_end(idempotency_key)
+        while len(_idempotent_responses) > IDEMPOTENCY_CACHE_SIZE:
+            _idempotent_responses.popitem(last=False)
+
+
+@firestore.transactional
+def _claim_booking(transaction, booking_ref, booking_data, occupancy_refs, code_ref, idempotency_ref):
+    # All reads happen before any write, as Firestore transactions require
+    if idempotency_ref is not None:
+        previous = idempotency_ref.get(transaction=transaction)
+        if previous.exists:
+            return previous.to_dict()
+
+    now = datetime.now(booking_data["expires_at"].tzinfo)
+    for occupancy_ref in occupancy_refs:
+        occupancy = occupancy_ref.get(transaction=transaction)
+        claimed_until = occupancy.to_dict().get("expires_at") if occupancy.exists else None
+        if claimed_until and claimed_until > now:
+            raise SlotUnavailableError("Slot is already booked for the selected dates")
+
+    if code_ref.get(transaction=transaction).exists:
+        raise _BookingCodeTaken()
+
+    transaction.set(booking_ref, booking_data)
+    for occupancy_ref in occupancy_refs:
+        transaction.set(occupancy_ref, {
+            "slot_id": booking_data["slot_id"],
+            "booking_id": booking_ref.id,
+            "expires_at": booking_data["expires_at"],
         })
+    transaction.set(code_ref, {"booking_id": booking_ref.id})
+
+    response = {"booking_id": booking_ref.id, "booking_code": booking_data["booking_code"]}
+    if idempotency_ref is not None:
+        transaction.set(idempotency_ref, {**response, "created_at": firestore.SERVER_TIMESTAMP})
+    return response
+
 
-        print(f"Booking Created with ID: {booking_doc[1].id}")
+@firestore.transactional
+def _claim_existing_booking(transaction, booking_ref, slot_id, occupancy_refs, expires_at) -> int:
+    # Days already held by another live booking were double-booked before
+    # claims existed; they stay with their holder. Returns how many there were.
+    now = datetime.now(expires_at.tzinfo)
+    free_refs = []
+    for occupancy_ref in occupancy_refs:
+        occupancy = occupancy_ref.get(transaction=transaction)
+        data = occupancy.to_dict() if occupancy.exists else {}
+        claimed_until = data.get("expires_at")
+        if claimed_until and claimed_until > now and data.get("booking_id") != booking_ref.id:
+            continue
+        free_refs.append(occupancy_ref)
 
-        # Send SMS notification
+    for occupancy_ref in free_refs:
+        transaction.set(occupancy_ref, {"slot_id": slot_id, "booking_id": booking_ref.id, "expires_at": expires_at})
+    transaction.update(booking_ref, {"occupancy_claimed": True})
+    return len(occupancy_refs) - len(free_refs)
+
+
+def backfill_occupancy():
+    """
+    Claim SlotOccupancy days for active bookings created before claims
+    existed, so the booking transaction sees them. Each booking is claimed
+    once and then carries occupancy_claimed.
+    """
+    bookings = _db.collection("Booking").where("is_active", "==", True).stream()
+    claimed = 0
+    for booking in bookings:
+        data = booking.to_dict()
+        if data.get("occupancy_claimed"):
+            continue
         try:
-            sms_message = (
-                f"Welcome to Shared Parking.\n"
-                f"Your Booking No: {booking_code}.\n"
-                f"Slot booked from {user_data.from_date} to {user_data.to_date}.\n"
-                f"Thank You."
+            days = _booked_days(data["from_date"], data["to_date"])
+            expires_at = data.get("expires_at") or expiry_instant(data["to_date"])
+            slot_id = data["slot_id"]
+            conflicts = _claim_existing_booking(
+                _db.transaction(), booking.reference, slot_id,
+                [_occupancy_ref(slot_id, day) for day in days], expires_at
             )
-            send_sms(
-                recipient=user_data.contact,
-                message=sms_message
-            )
-            print("SMS sent successfully.")
         except Exception as e:
-            print(f"Error sending SMS: {str(e)}")
-            # Log the error but do not raise an exception here, as SMS failure should not block the booking process
+            print(f"Error claiming occupancy for booking {booking.id}: {e}")
+            continue
+        if conflicts:
+            print(f"Booking {booking.id} overlaps another booking on {conflicts} day(s) of slot {slot_id}")
+        claimed += 1
+
+    print(f"Occupancy claimed for {claimed} existing bookings")
+
+
+def stored_booking(idempotency_key: str):
+    """
+    The booking created by an earlier request with this idempotency key, as
+    create_booking returns it with "replayed" set, or None for a new key.
+    """
+    cached = _cached_response(idempotency_key)
+    if cached:
+        return {**cached, "replayed": True}
+    previous = _idempotency_ref(idempotency_key).get()
+    if not previous.exists:
+        return None
+    data = previous.to_dict()
+    response = {"booking_id": data["booking_id"], "booking_code": data["booking_code"]}
+    _cache_response(idempotency_key, response)
+    return {**response, "replayed": True}
+
+
+def create_booking(vehicle_id: str, package_id: str, slot_id: str, from_date: str, to_date: str, idempotency_key: str = None) -> dict:
+    """
+    Create an active booking inside a transaction that claims one
+    SlotOccupancy document per booked day, so two bookings can never hold the
+    same slot on the same day. Claims on different slots touch different
+    documents and never contend. A repeated idempotency key returns the
+    booking created by the first request.
+    Returns {"booking_id", "booking_code", "replayed"}.
+    """
+    idempotency_ref = None
+    if idempotency_key:
+        # A retry on another worker or after a restart misses the local cache;
+        # its own booking would fail the pre-check below, so replay it first
+        previous = stored_booking(idempotency_key)
+        if previous:
+            return previous
+        idempotency_ref = _idempotency_ref(idempotency_key)
+
+    days = _booked_days(from_date, to_date)
+
+    # Cheap local pre-check; the transaction below is authoritative
+    if not slot_intervals.is_free(slot_id, from_date, to_date):
+        raise SlotUnavailableError("Slot is already booked for the selected dates")
+
+    occupancy_refs = [_occupancy_ref(slot_id, day) for day in days]
+
+    for _ in range(BOOKING_CODE_ATTEMPTS):
+        booking_ref = _db.collection("Booking").document()
+        booking_data = {
+            "booking_code": _booking_code(),
+            "vehicle_id": vehicle_id,
+            "package_id": package_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "expires_at": expiry_instant(to_date),
+            "slot_id": slot_id,
+            "payment_status": "pending",
+            "is_active": True,
+            "occupancy_claimed": True,
+            "created_at": firestore.SERVER_TIMESTAMP,
+        }
+        try:
+            response = _claim_booking(
+                _db.transaction(), booking_ref, booking_data, occupancy_refs,
+                _booking_code_ref(booking_data["booking_code"]), idempotency_ref
+            )
+            break
+        except _BookingCodeTaken:
+            continue
+    else:
+        raise ValueError("Could not allocate a unique booking code")
+
+    response = {"booking_id": response["booking_id"], "booking_code": response["booking_code"]}
+    replayed = response["booking_id"] != booking_ref.id
+
+    if not replayed:
+        gate_index.put_booking(booking_ref.id, booking_data)
+        schedule_booking(booking_ref.id, to_date)
+        slot_intervals.add_booking(booking_ref.id, slot_id, from_date, to_date)
+
+    if idempotency_key:
+        _cache_response(idempotency_key, response)
+
+    return {**response, "replayed": replayed}
+
+
+def booking_user(user_data: BookingCreate, idempotency_key: str = None):
+    try:
+        booking = create_booking(
+            vehicle_id=user_data.vehicle_id,
+            package_id=user_data.package_id,
+            slot_id=user_data.slot_id,
+            from_date=user_data.from_date,
+            to_date=user_data.to_date,
+            idempotency_key=idempotency_key,
+        )
+        booking_code = booking["booking_code"]
+
+        print(f"Booking Created with ID: {booking['booking_id']}")
+
+        # Send SMS notification, only once per booking
+        if user_data.contact and not booking["replayed"]:
+            try:
+                sms_message = (
+                    f"Welcome to Shared Parking.\n"
+                    f"Your Booking No: {booking_code}.\n"
+                    f"Slot booked from {user_data.from_date} to {user_data.to_date}.\n"
+                    f"Thank You."
+                )
+                enqueue_sms(
+                    recipient=user_data.contact,
+                    message=sms_message
+                )
+                print("SMS queued.")
+            except Exception as e:
+                print(f"Error queueing SMS: {str(e)}")
+                # Log the error but do not raise an exception here, as SMS failure should not block the booking process
 
         # Return success response
         return {
             "message": "Booking created successfully",
-            "booking_id": booking_doc[1].id,  # Include the Firestore document ID for reference
+            "booking_id": booking["booking_id"],  # Include the Firestore document ID for reference
             "booking_code": booking_code
         }
 
+    except SlotUnavailableError:
+        raise
     except Exception as e:
-        raise ValueError(f"Error during booking creation: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error during booking creation: {str(e)}")
@@ -1,13 +1,12 @@
 from models.device_model import deviceTypeModal, deviceTypeResponse, deviceModal, deviceResponse
 from config.firebase_config import _db
 from firebase_admin import firestore
+from common import ref_cache
 
 # Admin Service
 def get_device_type():
     try:
-        package_ref = _db.collection("DeviceType").stream()
-        firestore_package = {doc.id: doc.to_dict()
-                             for doc in package_ref}
+        firestore_package = ref_cache.get_docs("DeviceType")
         
         deviceTypes = []
 
@@ -29,8 +28,11 @@ def add_device(device: deviceModal):
         doc_ref = device_ref.add({
             "name": device.name,
             "type_id": device.type_id,
+            "ip_address": device.ip_address,
+            "gate_id": device.gate_id,
             "created_at": firestore.SERVER_TIMESTAMP,
         })
+        ref_cache.invalidate("Device")
 
         return {
             "message": "Device created successfully",
@@ -42,9 +44,7 @@ def add_device(device: deviceModal):
 
 def get_all_devices():
     try:
-        device_ref = _db.collection("Device").stream()
-        firestore_device = {doc.id: doc.to_dict()
-                             for doc in device_ref}
+        firestore_device = ref_cache.get_docs("Device")
         
         devices = []
 
@@ -52,6 +52,8 @@ def get_all_devices():
             device_data = {
                 "name": data.get("name", "Unknown"),
                 "type_id": data.get("type_id", "Unknown"),
+                "ip_address": data.get("ip_address"),
+                "gate_id": data.get("gate_id"),
                 "created_at": data.get("created_at", "Unknown"),
                 "id": doc_id
             }
@@ -66,6 +68,7 @@ def delete_device_by_id(device_id: str):
     if not device_ref.get().exists:
         raise ValueError("Device not found")
     device_ref.delete()
+    ref_cache.invalidate("Device")
 
 
 def update_device_by_id(device_id: str, updated_data: dict):
@@ -82,6 +85,7 @@ def update_device_by_id(device_id: str, updated_data: dict):
 
         # Update the document
         device_ref.set(merged_data)
+        ref_cache.invalidate("Device")
 
         return {"message": "Device updated successfully"}
 
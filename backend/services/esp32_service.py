@@ -1,7 +1,9 @@
-from fastapi import FastAPI, Request
+import threading
+import time
 from pydantic import BaseModel
-
-app = FastAPI()
+from config.firebase_config import _db
+from firebase_admin import firestore
+from common import slot_occupancy
 
 class IRData(BaseModel):
     ir0: int
@@ -9,8 +11,167 @@ class IRData(BaseModel):
     ir2: int
     ir3: int
 
-@app.post("/api/update")
-async def receive_data(data: IRData):
-    print(f"Received data: {data}")
-    # Decide servo angle based on data here if needed
-    return {"servo_angle": 90}  # example response
+
+# Shared by the HTTP endpoints and the WebSocket hub
+def record_parked(booking_id: str, detected_slot: str, status: str):
+    print(f"[PARKED] Booking ID: {booking_id}, Slot: {detected_slot}, Status: {status}")
+    return {"message": "Parked status received"}
+
+
+def record_mismatch(booking_id: str, detected_slot: str, status: str):
+    _db.collection("Alert").add({
+        "booking_id": booking_id,
+        "detected_slot": detected_slot,
+        "status": status,
+        "time": firestore.SERVER_TIMESTAMP
+    })
+
+    print(f"[MISMATCH] Booking ID: {booking_id}, Sent Slot: {detected_slot}, Status: {status}")
+    return {"message": "Mismatch status received"}
+
+
+def record_exit(booking_id: str):
+    if not booking_id:
+        return {"status": "error", "message": "Missing bookingId"}
+
+    try:
+        # Get the first matching document
+        bookings = _db.collection("UserActivities").where("booking_id", "==", booking_id).limit(1).stream()
+        record = next(bookings, None)
+
+        if record and record.exists:
+            print("Updating booking ID:", record.id)
+            record.reference.update({
+                "exit_time": firestore.SERVER_TIMESTAMP
+            })
+            return {"status": "exit_recorded"}
+        else:
+            return {"status": "not_found", "message": "Booking not found"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+# Writes per request stay under the 500-operation WriteBatch limit:
+# two per event plus one high-water mark per device
+MAX_EVENTS_PER_BATCH = 150
+# Sequence numbers this far below a device's newest are treated as replays
+SEQ_WINDOW = 1024
+
+_seq_lock = threading.Lock()
+_seen = {}   # device_id -> set of recently accepted seqs, None until loaded
+_high = {}   # device_id -> highest accepted seq
+_floor = {}  # device_id -> mark persisted before this process started
+
+ingest_stats = {"batches": 0, "accepted": 0, "duplicates": 0}
+
+
+def _load_high_water(device_id: str):
+    doc = _db.collection("IoTDevice").document(device_id).get()
+    return doc.to_dict().get("last_seq", -1) if doc.exists else -1
+
+
+def _claim_seqs(events: list) -> list:
+    # Devices seen for the first time since startup resume from the stored mark
+    for device_id in {event.device_id for event in events} - set(_seen):
+        high = _load_high_water(device_id)
+        with _seq_lock:
+            if device_id not in _seen:
+                _seen[device_id] = set()
+                _high[device_id] = _floor[device_id] = high
+
+    fresh = []
+    with _seq_lock:
+        for event in events:
+            seen = _seen[event.device_id]
+            high = _high[event.device_id]
+            if event.seq in seen or event.seq <= _floor[event.device_id] or event.seq <= high - SEQ_WINDOW:
+                continue
+            seen.add(event.seq)
+            fresh.append(event)
+            if event.seq > high:
+                _high[event.device_id] = event.seq
+                # Trim what fell out of the window
+                if len(seen) > SEQ_WINDOW:
+                    floor = event.seq - SEQ_WINDOW
+                    _seen[event.device_id] = {seq for seq in seen if seq > floor}
+    return fresh
+
+
+def _release_seqs(events: list):
+    # A failed commit must not turn the device's retry into a "duplicate"
+    with _seq_lock:
+        for event in events:
+            _seen[event.device_id].discard(event.seq)
+
+
+def _feed_ir(events: list):
+    # Readings are back-dated against the newest device clock in the batch
+    # so hold-off timers see when they were taken, not when they arrived
+    now = time.monotonic()
+    newest = {}
+    for event in events:
+        if event.device_time_ms is not None:
+            newest[event.device_id] = max(newest.get(event.device_id, 0), event.device_time_ms)
+
+    for event in events:
+        if event.type != "ir" or event.state is None:
+            continue
+        at = now
+        if event.device_time_ms is not None:
+            at -= (newest[event.device_id] - event.device_time_ms) / 1000
+        slot_occupancy.feed(event.device_id, event.slot, event.state, at)
+
+
+def ingest_events(events: list):
+    if len(events) > MAX_EVENTS_PER_BATCH:
+        raise ValueError(f"At most {MAX_EVENTS_PER_BATCH} events per batch")
+
+    events = sorted(events, key=lambda event: (event.device_id, event.seq))
+    fresh = _claim_seqs(events)
+
+    # Exit events need the open activity looked up before the batch is built
+    exits = {}
+    for event in fresh:
+        if event.type == "exit" and event.booking_id and event.booking_id not in exits:
+            activities = _db.collection("UserActivities").where("booking_id", "==", event.booking_id).limit(1).stream()
+            exits[event.booking_id] = next(activities, None)
+
+    batch = _db.batch()
+    for event in fresh:
+        data = event.model_dump()
+        data["received_at"] = firestore.SERVER_TIMESTAMP
+        batch.set(_db.collection("IoTEvent").document(f"{event.device_id}_{event.seq}"), data)
+
+        if event.type == "mismatch":
+            batch.set(_db.collection("Alert").document(), {
+                "booking_id": event.booking_id,
+                "detected_slot": event.slot,
+                "status": "mismatch",
+                "time": firestore.SERVER_TIMESTAMP
+            })
+        elif event.type == "exit" and exits.get(event.booking_id) is not None:
+            batch.update(exits.pop(event.booking_id).reference, {"exit_time": firestore.SERVER_TIMESTAMP})
+
+    last_seq = {}
+    for event in fresh:
+        last_seq[event.device_id] = max(last_seq.get(event.device_id, -1), event.seq)
+    for device_id, seq in last_seq.items():
+        batch.set(_db.collection("IoTDevice").document(device_id), {"last_seq": firestore.Maximum(seq)}, merge=True)
+
+    if fresh:
+        try:
+            batch.commit()
+        except Exception:
+            _release_seqs(fresh)
+            raise
+
+    _feed_ir(fresh)
+
+    ingest_stats["batches"] += 1
+    ingest_stats["accepted"] += len(fresh)
+    ingest_stats["duplicates"] += len(events) - len(fresh)
+    return {
+        "accepted": len(fresh),
+        "duplicates": len(events) - len(fresh),
+        "last_seq": {device_id: _high[device_id] for device_id in {event.device_id for event in events}}
+    }
@@ -1,14 +1,13 @@
 from models.package_model import packageModal, packageResponse
 from config.firebase_config import _db
 from firebase_admin import firestore
+from common import ref_cache
 
 
 # Admin Service
 def get_all_packages():
     try:
-        package_ref = _db.collection("Package").stream()
-        firestore_package = {doc.id: doc.to_dict()
-                             for doc in package_ref}
+        firestore_package = ref_cache.get_docs("Package")
         
         packages = []
 
@@ -36,6 +35,7 @@ def add_package(package: packageModal):
             "amount": package.amount,
             "created_at": firestore.SERVER_TIMESTAMP,
         })
+        ref_cache.invalidate("Package")
         return {
             "message": "Package created successfully",
             "id": doc_ref[1].id  # Returns the new document ID
@@ -48,4 +48,5 @@ def delete_package(package_id: str):
     package_ref = _db.collection("Package").document(package_id)
     if not package_ref.get().exists:
         raise ValueError("Package not found")
-    package_ref.delete()
\ No newline at end of file
+    package_ref.delete()
+    ref_cache.invalidate("Package")
\ No newline at end of file
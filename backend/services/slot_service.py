@@ -1,24 +1,12 @@
 from config.firebase_config import _db
 from models.slot_model import slotResponse, sloteModal
 from firebase_admin import firestore
+from common import live_feed, ref_cache, slot_intervals, slot_occupancy
 
 def get_all_slots():
     try:
-        slot_ref = _db.collection("Slot").stream()
-        firestore_slot = {doc.id: doc.to_dict()
-                             for doc in slot_ref}
-        slots = []
-
-        for doc_id, data in firestore_slot.items():
-            slor_data = {
-                "device_id": data.get("device_id", "Unknown"),
-                "slotNo": data.get("slotNo", "Unknown"),
-                "status": data.get("status", "Unknown"),
-                "created_at": data.get("created_at", "Unknown"),
-                "id": doc_id
-            }
-            slots.append(slotResponse(**slor_data))
-        return slots
+        firestore_slot = ref_cache.get_docs("Slot")
+        return [_slot_response(doc_id, data) for doc_id, data in firestore_slot.items()]
     except Exception as e:
         raise ValueError(f"Error fetching devices: {str(e)}")
 
@@ -32,6 +20,8 @@ def add_slot(slot: sloteModal):
             "status": slot.status,
             "created_at": firestore.SERVER_TIMESTAMP,
         })
+        ref_cache.invalidate("Slot")
+        live_feed.publish("slot", {"id": doc_ref[1].id, "created": True})
 
         return {
             "message": "Device created successfully",
@@ -46,37 +36,59 @@ def delete_slot_by_id(slot_id: str):
     if not slot_ref.get().exists:
         raise ValueError("Slot not found")
     slot_ref.delete()
+    ref_cache.invalidate("Slot")
+    live_feed.publish("slot", {"id": slot_id, "deleted": True})
+
+
+def _slot_response(doc_id: str, data: dict):
+    # Live occupancy comes from memory; the stored fields lag by a flush
+    live = slot_occupancy.get(doc_id)
+    return slotResponse(**{
+        "device_id": data.get("device_id", "Unknown"),
+        "slotNo": data.get("slotNo", "Unknown"),
+        "status": data.get("status", "Unknown"),
+        "created_at": data.get("created_at", "Unknown"),
+        "occupancy": live.get("occupancy", data.get("occupancy")),
+        "occupancy_changed_at": live.get("changed_at", data.get("occupancy_changed_at")),
+        "id": doc_id
+    })
 
 
 def get_active_slots():
     try:
-        slot_ref = _db.collection("Slot").stream()
-        firestore_slot = {doc.id: doc.to_dict() for doc in slot_ref}
+        firestore_slot = ref_cache.get_docs("Slot")
         slots = []
 
         for doc_id, data in firestore_slot.items():
             if data.get("status") != "active":
                 continue  # Skip inactive slots
 
-            # Check if the slot is currently booked (active booking)
-            bookings = _db.collection("Booking")\
-                          .where("slot_id", "==", doc_id)\
-                          .where("is_active", "==", True)\
-                          .stream()
+            # Skip slots that hold any active booking
+            if not slot_intervals.has_bookings(doc_id):
+                slots.append(_slot_response(doc_id, data))
+
+        return slots
+
+    except Exception as e:
+        raise ValueError(f"Error fetching active slots: {str(e)}")
+
+
+def get_available_slots(from_date: str, to_date: str):
+    try:
+        if slot_intervals.day_number(from_date) > slot_intervals.day_number(to_date):
+            raise ValueError("from date must not be after to date")
+
+        firestore_slot = ref_cache.get_docs("Slot")
+        slots = []
 
-            is_booked = any(True for _ in bookings)  # True if any active booking exists
+        for doc_id, data in firestore_slot.items():
+            if data.get("status") != "active":
+                continue  # Skip inactive slots
 
-            if not is_booked:
-                slot_data = {
-                    "device_id": data.get("device_id", "Unknown"),
-                    "slotNo": data.get("slotNo", "Unknown"),
-                    "status": data.get("status", "Unknown"),
-                    "created_at": data.get("created_at", "Unknown"),
-                    "id": doc_id
-                }
-                slots.append(slotResponse(**slot_data))
+            if slot_intervals.is_free(doc_id, from_date, to_date):
+                slots.append(_slot_response(doc_id, data))
 
         return slots
 
     except Exception as e:
-        raise ValueError(f"Error fetching active slots: {str(e)}")
+        raise ValueError(f"Error fetching available slots: {str(e)}")
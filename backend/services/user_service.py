@@ -1,20 +1,48 @@
 from firebase_admin import firestore, auth
 from config.firebase_config import _db
 from models.user_model import userModel, userResponse
-import random
-from datetime import datetime
-from common.sms import send_sms
+from common.sms_outbox import enqueue_sms
+from common import gate_index, slot_intervals
+from services.booking_service import create_booking, stored_booking, SlotUnavailableError
 
 
 
+def _registered_user(booking: dict) -> dict:
+    # The account a replayed registration created, found through its booking's vehicle
+    booking_doc = _db.collection("Booking").document(booking["booking_id"]).get()
+    vehicle_id = booking_doc.to_dict().get("vehicle_id") if booking_doc.exists else None
+    vehicle_doc = _db.collection("Vehicle").document(vehicle_id).get() if vehicle_id else None
+    if vehicle_doc is None or not vehicle_doc.exists:
+        raise ValueError("Registration for this Idempotency-Key no longer exists")
+    return {"message": "User created successfully", "user_id": vehicle_doc.to_dict().get("user_id")}
+
+
+def _discard_registration(uid: str, vehicle_id: str = None):
+    # A registration is not kept without its booking, so the email can register again
+    try:
+        if vehicle_id:
+            _db.collection("Vehicle").document(vehicle_id).delete()
+            gate_index.remove_vehicle(vehicle_id)
+        _db.collection("User").document(uid).delete()
+        auth.delete_user(uid)
+        print(f"Registration discarded: {uid}")
+    except Exception as e:
+        print(f"Error discarding registration {uid}: {str(e)}")
+
+
 # Registration form
-def register_user(user_data: userModel):
+def register_user(user_data: userModel, idempotency_key: str = None):
 
-    # Generating random Number for booking code
-    date_str = datetime.now().strftime("%Y%m%d")
-    random_str = ''.join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=5))
-    booking_code = f"BK{date_str}-{random_str}"
+    # A retried registration returns the first one; its account already
+    # exists and its slot is taken by its own booking
+    if idempotency_key:
+        booking = stored_booking(idempotency_key)
+        if booking:
+            return _registered_user(booking)
 
+    # Fail before creating any account when the slot is visibly taken
+    if not slot_intervals.is_free(user_data.slot_id, user_data.from_date, user_data.to_date):
+        raise SlotUnavailableError("Slot is already booked for the selected dates")
 
     try:
         # Create a new user in Firebase Authentication
@@ -22,7 +50,11 @@ def register_user(user_data: userModel):
             email=user_data.email,
             password=user_data.password
         )
+    except Exception as e:
+        raise ValueError(f"Error during registration service: {str(e)}")
 
+    vehicle_ref_id = None
+    try:
         #custome claims
         auth.set_custom_user_claims(user.uid, {
             "role": "user"
@@ -56,40 +88,47 @@ def register_user(user_data: userModel):
 
         #grt vehicle ids
         vehicle_ref_id = vehicle_doc[1].id
+        gate_index.put_vehicle(vehicle_ref_id, user_data.plate_number)
 
         # store booking with vehicle slor
-        booking_ref = _db.collection("Booking")
-        booking_ref.add({
-            "booking_code":booking_code,
-            "vehicle_id": vehicle_ref_id,
-            "package_id": user_data.package_id,
-            "from_date": user_data.from_date,
-            "to_date": user_data.to_date,
-            "slot_id": user_data.slot_id,
-            "payment_status": "pending",
-            "is_active": True,
-            "created_at": firestore.SERVER_TIMESTAMP,
-        })
+        booking = create_booking(
+            vehicle_id=vehicle_ref_id,
+            package_id=user_data.package_id,
+            slot_id=user_data.slot_id,
+            from_date=user_data.from_date,
+            to_date=user_data.to_date,
+            idempotency_key=idempotency_key,
+        )
+    except Exception as e:
+        # The slot claim can still lose a race the local pre-check missed
+        _discard_registration(user.uid, vehicle_ref_id)
+        if isinstance(e, SlotUnavailableError):
+            raise
+        raise ValueError(f"Error during registration service: {str(e)}")
 
-        print("Booking Created")
+    if booking["replayed"]:
+        # A concurrent retry with the same key registered first; keep its account
+        _discard_registration(user.uid, vehicle_ref_id)
+        return _registered_user(booking)
 
-        try:
-            sms_message=(
-                f"Welcome to Shared Parking. "
-                f"Your Booking No {booking_code}. Slot booked from {user_data.from_date} to {user_data.to_date}. Thank You."
-            )
+    booking_code = booking["booking_code"]
 
-            send_sms(
-                recipient=user_data.contact,
-                message=sms_message
-            )
-        except Exception as e:
-            ValueError(f"Error SMS Function: {str(e)}")
+    print("Booking Created")
 
-        return {"message": "User created successfully", "user_id": user.uid}  # Return user.uid
+    try:
+        sms_message=(
+            f"Welcome to Shared Parking. "
+            f"Your Booking No {booking_code}. Slot booked from {user_data.from_date} to {user_data.to_date}. Thank You."
+        )
 
+        enqueue_sms(
+            recipient=user_data.contact,
+            message=sms_message
+        )
     except Exception as e:
-        raise ValueError(f"Error during registration service: {str(e)}")
+        print(f"Error queueing SMS: {str(e)}")
+
+    return {"message": "User created successfully", "user_id": user.uid}  # Return user.uid
 
 # Admin Dashboard User Page
 def create_user(user_data: userModel):
@@ -256,6 +295,7 @@ def delete_user(user_id: str) -> dict:
 
         for vehicle_doc in vehicle_query:
             vehicle_doc.reference.delete()  # Delete each vehicle document
+            gate_index.remove_vehicle(vehicle_doc.id)
             vehicles_deleted += 1
             print(f"Deleted Vehicle Document: {vehicle_doc.id}")
 
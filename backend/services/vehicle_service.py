@@ -1,6 +1,7 @@
 from firebase_admin import firestore
 from models.vehicle_model import vehicleModal, vehicleResponse, vehicle_Response
 from config.firebase_config import _db
+from common import gate_index
 
 
 # Admin Service
@@ -77,6 +78,7 @@ def delete_vehicle(vehicle_id: str):
     if not vehicle_ref.get().exists:
         raise ValueError("Vehicle not found")
     vehicle_ref.delete()
+    gate_index.remove_vehicle(vehicle_id)
 
 
 def add_vehicle(user_data: vehicleModal, user_id: str):
@@ -90,7 +92,8 @@ def add_vehicle(user_data: vehicleModal, user_id: str):
             "plate_number": user_data.plate_number,
             "created_at": firestore.SERVER_TIMESTAMP
         }
-        vehicle_ref.add(new_vehicle)
+        vehicle_doc = vehicle_ref.add(new_vehicle)
+        gate_index.put_vehicle(vehicle_doc[1].id, user_data.plate_number)
 
         return {"message": "Vehicle added successfully", "user_id": user_id}
 
@@ -0,0 +1,42 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Services import the app's own packages and the credentials file by
+# relative path, as when the server is started from backend/
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+import pytest
+from fake_firestore import FakeFirestore, fake_transactional
+from services import booking_service
+from scheduler import booking_scheduler
+from common import gate_index, slot_intervals
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeFirestore()
+    monkeypatch.setattr(booking_service, "_db", store)
+    monkeypatch.setattr(booking_service, "_claim_booking", fake_transactional(booking_service._claim_booking))
+    monkeypatch.setattr(booking_service, "_claim_existing_booking",
+                        fake_transactional(booking_service._claim_existing_booking))
+    # Process-wide indexes start empty for every test
+    monkeypatch.setattr(slot_intervals, "_slots", {})
+    monkeypatch.setattr(slot_intervals, "_booking_slot", {})
+    monkeypatch.setattr(gate_index, "_plate_vehicle", {})
+    monkeypatch.setattr(gate_index, "_vehicle_plate", {})
+    monkeypatch.setattr(gate_index, "_vehicle_bookings", {})
+    monkeypatch.setattr(gate_index, "_booking_vehicle", {})
+    monkeypatch.setattr(booking_scheduler, "_heap", [])
+    monkeypatch.setattr(booking_scheduler, "_scheduled", {})
+    booking_service._idempotent_responses.clear()
+    return store
+
+
+@pytest.fixture
+def other_workers(monkeypatch):
+    # Each request behaves as if served by a worker whose local index has not
+    # seen the other bookings, so only the transaction can stop a double booking
+    monkeypatch.setattr(slot_intervals, "is_free", lambda *args: True)
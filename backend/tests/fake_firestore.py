@@ -0,0 +1,231 @@
+"""
+In-memory stand-in for the parts of the Firestore client the services use.
+Documents carry a version; transactions record the versions they read and
+their commit fails if any of them changed, so concurrent transactions
+behave as on the real service. Every call that would be a network round
+trip is counted in `round_trips`, and every document a query returns in
+`documents_read`; for benchmarks, round trips can be made to take
+`latency` seconds.
+"""
+import itertools
+import threading
+import time
+import uuid
+
+# Attempts before a contended transaction gives up, as in the client
+MAX_TRANSACTION_ATTEMPTS = 5
+
+
+class TransactionConflict(Exception):
+    pass
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field) if self._data is not None else None
+
+
+class FakeDocumentRef:
+    def __init__(self, store, collection: str, doc_id: str):
+        self._store = store
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def get(self, transaction=None):
+        if transaction is not None:
+            return transaction._read(self)
+        self._store._round_trip()
+        return FakeSnapshot(self, self._store._read(self.path)[1])
+
+    def set(self, data: dict, merge: bool = False):
+        self._store._round_trip()
+        self._store._write([("merge" if merge else "set", self, data)])
+
+    def update(self, data: dict):
+        self._store._round_trip()
+        self._store._write([("update", self, data)])
+
+    def delete(self):
+        self._store._round_trip()
+        self._store._write([("delete", self, None)])
+
+
+_OPERATORS = {
+    "==": lambda value, target: value == target,
+    "!=": lambda value, target: value != target,
+    "<": lambda value, target: value is not None and value < target,
+    "<=": lambda value, target: value is not None and value <= target,
+    ">": lambda value, target: value is not None and value > target,
+    ">=": lambda value, target: value is not None and value >= target,
+    "in": lambda value, target: value in target,
+}
+
+
+class FakeQuery:
+    def __init__(self, store, collection: str, filters=(), limit: int = None):
+        self._store = store
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._limit = limit
+
+    def where(self, field: str, op: str, value):
+        filters = self._filters + ((field, _OPERATORS[op], value),)
+        return FakeQuery(self._store, self._collection, filters, self._limit)
+
+    def limit(self, count: int):
+        return FakeQuery(self._store, self._collection, self._filters, count)
+
+    def stream(self):
+        self._store._round_trip()
+        prefix = self._collection + "/"
+        with self._store.lock:
+            rows = [(path, data) for path, (_, data) in self._store.docs.items() if path.startswith(prefix)]
+        matched = 0
+        for path, data in rows:
+            if self._limit is not None and matched >= self._limit:
+                return
+            if all(match(data.get(field), value) for field, match, value in self._filters):
+                matched += 1
+                self._store.documents_read += 1
+                yield FakeSnapshot(FakeDocumentRef(self._store, self._collection, path[len(prefix):]), dict(data))
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id: str = None):
+        return FakeDocumentRef(self._store, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: dict):
+        reference = self.document()
+        reference.set(data)
+        return None, reference
+
+
+class FakeTransaction:
+    def __init__(self, store):
+        self._store = store
+        self._reads = {}
+        self._writes = []
+
+    def _begin(self):
+        self._reads = {}
+        self._writes = []
+
+    def _read(self, reference):
+        if self._writes:
+            raise ValueError("Firestore transactions require all reads before writes")
+        self._store._round_trip()
+        version, data = self._store._read(reference.path, self._reads)
+        self._reads.setdefault(reference.path, version)
+        # Let other threads in between the read and the commit
+        time.sleep(0)
+        return FakeSnapshot(reference, data)
+
+    def set(self, reference, data: dict, merge: bool = False):
+        self._writes.append(("merge" if merge else "set", reference, data))
+
+    def update(self, reference, data: dict):
+        self._writes.append(("update", reference, data))
+
+    def _commit(self):
+        self._store._round_trip()
+        self._store._write(self._writes, self._reads)
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._writes = []
+
+    def set(self, reference, data: dict, merge: bool = False):
+        self._writes.append(("merge" if merge else "set", reference, data))
+
+    def update(self, reference, data: dict):
+        self._writes.append(("update", reference, data))
+
+    def commit(self):
+        self._store._round_trip()
+        self._store._write(self._writes)
+
+
+class FakeFirestore:
+    def __init__(self, latency: float = 0):
+        self.lock = threading.Lock()
+        self.docs = {}      # path -> (version, data)
+        self.latency = latency
+        self.round_trips = 0
+        self.documents_read = 0
+        self.conflicts = 0
+        self._versions = itertools.count(1)
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def collection(self, name: str):
+        return FakeCollection(self, name)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, references):
+        self._round_trip()
+        return [FakeSnapshot(reference, self._read(reference.path)[1]) for reference in references]
+
+    def _read(self, path: str, reads=None):
+        # A transaction's reads must all come from one snapshot
+        with self.lock:
+            self._check(reads)
+            version, data = self.docs.get(path, (0, None))
+        return version, dict(data) if data is not None else None
+
+    def _check(self, reads):
+        for path, version in (reads or {}).items():
+            if self.docs.get(path, (0, None))[0] != version:
+                self.conflicts += 1
+                raise TransactionConflict(path)
+
+    def _write(self, writes, reads=None):
+        with self.lock:
+            self._check(reads)
+            for kind, reference, data in writes:
+                if kind == "delete":
+                    self.docs.pop(reference.path, None)
+                    continue
+                if kind == "update":
+                    if reference.path not in self.docs:
+                        raise KeyError(f"No document to update: {reference.path}")
+                    data = {**self.docs[reference.path][1], **data}
+                elif kind == "merge":
+                    data = {**self.docs.get(reference.path, (0, {}))[1], **data}
+                self.docs[reference.path] = (next(self._versions), dict(data))
+
+
+def fake_transactional(transactional):
+    """
+    Run a function wrapped in firestore.transactional against the fake
+    store, retrying it from scratch when its commit conflicts.
+    """
+    def run(transaction, *args, **kwargs):
+        for _ in range(MAX_TRANSACTION_ATTEMPTS):
+            transaction._begin()
+            try:
+                result = transactional.to_wrap(transaction, *args, **kwargs)
+                transaction._commit()
+            except TransactionConflict:
+                continue
+            return result
+        raise TransactionConflict("Transaction contended too many times")
+    return run
@@ -0,0 +1,107 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import pytest
+from fake_firestore import TransactionConflict
+from services import booking_service
+from services.booking_service import SlotUnavailableError, create_booking, backfill_occupancy
+
+LOAD_BOOKINGS = 4000
+LOAD_THREADS = 32
+LOAD_SLOTS = 20
+FIRST_DAY = date(2030, 1, 1)
+
+
+def _days(from_date: str, to_date: str) -> list:
+    start, end = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    return [start + timedelta(days=offset) for offset in range((end - start).days)]
+
+
+def _active_bookings(store) -> list:
+    return [snapshot.to_dict() for snapshot in store.collection("Booking").where("is_active", "==", True).stream()]
+
+
+def _assert_no_double_bookings(store):
+    held = {}
+    for booking in _active_bookings(store):
+        for day in _days(booking["from_date"], booking["to_date"]):
+            key = (booking["slot_id"], day)
+            assert key not in held, f"{key} booked by {held[key]} and {booking['booking_code']}"
+            held[key] = booking["booking_code"]
+    return held
+
+
+def _random_request(rng: random.Random) -> dict:
+    start = FIRST_DAY + timedelta(days=rng.randrange(60))
+    return {
+        "vehicle_id": f"vehicle-{rng.randrange(500)}",
+        "package_id": "daily",
+        "slot_id": f"slot-{rng.randrange(LOAD_SLOTS)}",
+        "from_date": start.isoformat(),
+        "to_date": (start + timedelta(days=rng.randint(1, 5))).isoformat(),
+    }
+
+
+def _try_booking(request: dict):
+    try:
+        return create_booking(**request)
+    except (SlotUnavailableError, TransactionConflict):
+        return None
+
+
+def test_concurrent_bookings_never_double_book(store, other_workers):
+    rng = random.Random(9)
+    requests = [_random_request(rng) for _ in range(LOAD_BOOKINGS)]
+
+    with ThreadPoolExecutor(LOAD_THREADS) as pool:
+        results = list(pool.map(_try_booking, requests))
+
+    created = [result for result in results if result is not None]
+    _assert_no_double_bookings(store)
+    assert len(created) == len(_active_bookings(store))
+    # The load is dense enough that most requests must have been turned away
+    assert 0 < len(created) < LOAD_BOOKINGS
+
+
+def test_concurrent_retries_of_one_key_create_one_booking(store, other_workers):
+    request = {**_random_request(random.Random(1)), "idempotency_key": "retry-me"}
+
+    with ThreadPoolExecutor(LOAD_THREADS) as pool:
+        results = list(pool.map(lambda _: create_booking(**request), range(200)))
+
+    assert len({result["booking_id"] for result in results}) == 1
+    assert sum(not result["replayed"] for result in results) == 1
+    assert len(_active_bookings(store)) == 1
+
+
+def test_retry_after_restart_replays_instead_of_conflicting(store):
+    request = {**_random_request(random.Random(2)), "idempotency_key": "after-restart"}
+    first = create_booking(**request)
+
+    # The in-process response cache is gone; the slot index still holds the booking
+    booking_service._idempotent_responses.clear()
+    retried = create_booking(**request)
+
+    assert retried == {**first, "replayed": True}
+    assert len(_active_bookings(store)) == 1
+
+
+def test_backfill_claims_days_of_existing_bookings(store, other_workers):
+    existing = store.collection("Booking").document("before-claims")
+    existing.set({
+        "booking_code": "BK-OLD", "vehicle_id": "vehicle-1", "package_id": "daily", "slot_id": "slot-1",
+        "from_date": "2030-01-10", "to_date": "2030-01-13", "is_active": True,
+    })
+
+    backfill_occupancy()
+
+    with pytest.raises(SlotUnavailableError):
+        create_booking("vehicle-2", "daily", "slot-1", "2030-01-12", "2030-01-14")
+    create_booking("vehicle-2", "daily", "slot-1", "2030-01-13", "2030-01-14")
+    assert existing.get().to_dict()["occupancy_claimed"] is True
+    _assert_no_double_bookings(store)
+
+    # Claimed bookings are skipped on the next start
+    round_trips = store.round_trips
+    backfill_occupancy()
+    assert store.round_trips == round_trips + 1
@@ -0,0 +1,84 @@
+import pytest
+from fake_firestore import FakeFirestore
+from services import booking_service
+from services.booking_service import get_all_bookings, get_bookings_by_user
+from common import batch_get, ref_cache
+
+VEHICLES = 40
+PACKAGES = 3
+SLOTS = 20
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeFirestore()
+    for module in (booking_service, batch_get, ref_cache):
+        monkeypatch.setattr(module, "_db", store)
+    monkeypatch.setattr(ref_cache, "_docs", {})
+    monkeypatch.setattr(ref_cache, "_loaded_at", {})
+    monkeypatch.setattr(ref_cache, "_dirty", set())
+    monkeypatch.setitem(batch_get.join_stats, "round_trips", 0)
+
+    for index in range(VEHICLES):
+        store.collection("Vehicle").document(f"vehicle-{index}").set(
+            {"user_id": f"user-{index % 2}", "plate_number": f"CAB-{index:04d}"})
+    for index in range(PACKAGES):
+        store.collection("Package").document(f"package-{index}").set({"name": f"Package {index}"})
+    for index in range(SLOTS):
+        store.collection("Slot").document(f"slot-{index}").set({"slotNo": f"S{index}"})
+    return store
+
+
+def _add_bookings(store, count: int):
+    for index in range(count):
+        store.collection("Booking").document(f"booking-{index}").set({
+            "booking_code": f"BK-{index}",
+            "vehicle_id": f"vehicle-{index % VEHICLES}",
+            "package_id": f"package-{index % PACKAGES}",
+            "slot_id": f"slot-{index % SLOTS}",
+            "from_date": "2030-01-01",
+            "to_date": "2030-01-02",
+            "is_active": True,
+        })
+
+
+@pytest.mark.parametrize("bookings", [10, 100, 2000])
+def test_listing_round_trips_do_not_grow_with_bookings(store, bookings):
+    _add_bookings(store, bookings)
+    round_trips = store.round_trips
+
+    rows = get_all_bookings()
+
+    assert len(rows) == bookings
+    # One multi-get resolves every distinct vehicle, however many bookings share them
+    assert batch_get.join_stats["round_trips"] == 1
+    # Booking stream, the vehicle multi-get and one load each of Package and Slot
+    assert store.round_trips - round_trips == 4
+
+    row = next(row for row in rows if row["id"] == "booking-1")
+    assert (row["vehicle"], row["package"], row["slot"]) == ("CAB-0001", "Package 1", "S1")
+
+
+def test_listing_chunks_multi_gets(store):
+    _add_bookings(store, 250)
+    for index in range(VEHICLES, 250):
+        store.collection("Vehicle").document(f"vehicle-{index}").set({"user_id": "user-0", "plate_number": f"X{index}"})
+    for index in range(250):
+        store.collection("Booking").document(f"booking-{index}").update({"vehicle_id": f"vehicle-{index}"})
+
+    get_all_bookings()
+
+    assert batch_get.join_stats["round_trips"] == 3  # 250 vehicles, 100 per multi-get
+
+
+def test_user_listing_queries_bookings_in_chunks(store):
+    _add_bookings(store, 2000)
+    round_trips = store.round_trips
+
+    rows = get_bookings_by_user("user-0")
+
+    assert len(rows) == 1000
+    assert all(int(row["vehicle"][4:]) % 2 == 0 for row in rows)
+    # 20 vehicles fit one "in" query and are already known, so no multi-get
+    assert batch_get.join_stats["round_trips"] == 1
+    assert store.round_trips - round_trips == 4
@@ -0,0 +1,22 @@
+import threading
+import time
+from scheduler import booking_scheduler
+from scheduler.booking_scheduler import schedule_booking, stop_scheduler
+
+RUN_SECONDS = 0.3
+
+
+def test_far_future_expiry_waits_and_stops_cleanly(store, monkeypatch, capsys):
+    monkeypatch.setattr(booking_scheduler, "_stopping", False)
+    worker = threading.Thread(target=booking_scheduler._run, daemon=True)
+    monkeypatch.setattr(booking_scheduler, "_worker", worker)
+    # Further away than threading.TIMEOUT_MAX allows in one wait
+    schedule_booking("far-future", "9999-12-31")
+    worker.start()
+    time.sleep(RUN_SECONDS)
+
+    stop_scheduler()
+
+    assert not worker.is_alive()
+    assert "Error in booking expiry worker" not in capsys.readouterr().out
+    assert "far-future" in booking_scheduler._scheduled
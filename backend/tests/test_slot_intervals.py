@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+from common import gate_index, slot_intervals
+
+
+def _change(kind: str, booking_id: str, data: dict = None):
+    document = SimpleNamespace(id=booking_id, to_dict=lambda: dict(data or {}))
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=document)
+
+
+def test_bookings_from_other_workers_reach_the_slot_index(store):
+    booking = {"vehicle_id": "vehicle-1", "slot_id": "slot-1", "from_date": "2030-01-10",
+               "to_date": "2030-01-13", "is_active": True}
+
+    gate_index._on_booking_snapshot([], [_change("ADDED", "elsewhere", booking)], None)
+    assert not slot_intervals.is_free("slot-1", "2030-01-12", "2030-01-14")
+    assert slot_intervals.is_free("slot-2", "2030-01-12", "2030-01-14")
+
+    # Moved to another slot, then expired
+    gate_index._on_booking_snapshot([], [_change("MODIFIED", "elsewhere", {**booking, "slot_id": "slot-2"})], None)
+    assert slot_intervals.is_free("slot-1", "2030-01-12", "2030-01-14")
+    assert not slot_intervals.is_free("slot-2", "2030-01-12", "2030-01-14")
+    gate_index._on_booking_snapshot([], [_change("REMOVED", "elsewhere")], None)
+    assert slot_intervals.is_free("slot-2", "2030-01-12", "2030-01-14")
+    assert not slot_intervals.has_bookings("slot-2")
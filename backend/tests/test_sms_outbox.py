@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from common import sms, sms_outbox
+from common.sms_outbox import enqueue_sms
+
+BACKOFF_BASE_SECONDS = 0.2
+DELIVERY_TIMEOUT_SECONDS = 5
+
+
+class StubGateway(ThreadingHTTPServer):
+    """A local SMS gateway that answers with scripted (status, body) responses."""
+
+    def __init__(self, responses: list):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.responses = responses
+        self.requests = []  # (arrived_at, payload)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/http/sms/send"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.requests.append((time.monotonic(), payload))
+        status, body = server.responses[min(len(server.requests), len(server.responses)) - 1]
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gateway(monkeypatch, tmp_path):
+    servers = []
+
+    def start(responses: list) -> StubGateway:
+        server = StubGateway(responses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setattr(sms, "SMS_API_URL", server.url)
+        return server
+
+    monkeypatch.setattr(sms, "_client", httpx.Client(timeout=sms.SMS_TIMEOUT))
+    monkeypatch.setattr(sms_outbox, "SMS_OUTBOX_PATH", str(tmp_path / "sms_outbox.db"))
+    monkeypatch.setattr(sms_outbox, "SMS_BACKOFF_BASE_SECONDS", BACKOFF_BASE_SECONDS)
+    monkeypatch.setattr(sms_outbox, "_conn", None)
+    monkeypatch.setattr(sms_outbox, "outbox_stats", {"enqueued": 0, "sent": 0, "retried": 0, "dead": 0})
+    yield start
+    sms_outbox.stop_workers()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _rows(path: str) -> list:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT status, attempts FROM outbox ORDER BY id").fetchall()
+
+
+def _wait_for(status: str):
+    deadline = time.monotonic() + DELIVERY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        rows = _rows(sms_outbox.SMS_OUTBOX_PATH)
+        if rows and all(row_status == status for row_status, _ in rows):
+            return rows
+        time.sleep(0.02)
+    raise AssertionError(f"outbox never reached {status}: {_rows(sms_outbox.SMS_OUTBOX_PATH)}")
+
+
+def test_gateway_error_is_retried_with_backoff(gateway):
+    # The accepted response is not JSON; it must still count as delivered
+    server = gateway([(503, "Service Unavailable"), (200, "OK")])
+    sms_outbox.start_workers()
+
+    enqueue_sms("0771234567", "Your Booking No BK1")
+
+    assert _wait_for("sent") == [("sent", 2)]
+    (first, _), (second, payload) = server.requests
+    assert second - first >= BACKOFF_BASE_SECONDS * 0.5
+    assert payload["recipient"] == "0771234567"
+    time.sleep(BACKOFF_BASE_SECONDS * 2)
+    assert len(server.requests) == 2
+    assert sms_outbox.outbox_stats["retried"] == 1
+
+
+def test_rejected_message_is_dead_lettered_after_one_attempt(gateway):
+    server = gateway([(400, '{"status": "error", "message": "Invalid recipient"}')])
+    sms_outbox.start_workers()
+
+    enqueue_sms("not-a-number", "Your Booking No BK2")
+
+    assert _wait_for("dead") == [("dead", 1)]
+    time.sleep(BACKOFF_BASE_SECONDS * 2)
+    assert len(server.requests) == 1
+
+
+def test_message_in_flight_at_a_crash_is_sent_after_restart(gateway):
+    server = gateway([(200, '{"status": "success"}')])
+    enqueue_sms("0771234567", "Your Booking No BK3")
+    # The process died after claiming the row, before the gateway answered
+    sms_outbox._conn.execute("UPDATE outbox SET status = 'sending'")
+    sms_outbox._conn.close()
+    sms_outbox._conn = None
+
+    sms_outbox.start_workers()
+
+    assert _wait_for("sent") == [("sent", 1)]
+    assert len(server.requests) == 1
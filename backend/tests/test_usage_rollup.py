@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+import pytest
+from fake_firestore import FakeFirestore
+from common import usage_rollup
+
+ROUTES = ("/api/booking/", "/api/slot/availability", "/api/iot/event")
+REPORT_DAYS = 30
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeFirestore()
+    monkeypatch.setattr(usage_rollup, "_db", store)
+    monkeypatch.setattr(usage_rollup, "_rollups", {})
+    return store
+
+
+def _flush(store):
+    # The aggregates as write_ops would merge them into fresh documents
+    for (granularity, bucket, endpoint, method, status), aggregate in usage_rollup.drain().items():
+        collection, _ = usage_rollup.ROLLUP_COLLECTIONS[granularity]
+        store.collection(collection).document(usage_rollup._doc_id(bucket, method, status, endpoint)).set({
+            "bucket": bucket, "endpoint": endpoint, "method": method, "status_class": status,
+            "count": aggregate["count"], "sum_seconds": aggregate["sum"],
+            "min_seconds": aggregate["min"], "max_seconds": aggregate["max"], "buckets": aggregate["buckets"],
+        })
+
+
+def _seed_hourly_traffic(store, first: datetime, hours: int):
+    for hour in range(hours):
+        for index, route in enumerate(ROUTES):
+            at = first + timedelta(hours=hour, minutes=index * 7)
+            usage_rollup.add({"route": route, "method": "GET", "status_code": 200,
+                              "duration_seconds": 0.01 * (index + 1)}, at)
+    _flush(store)
+
+
+def test_month_report_reads_daily_rollups_for_whole_days(store, monkeypatch):
+    first = datetime(2030, 1, 1)
+    _seed_hourly_traffic(store, first, (REPORT_DAYS + 2) * 24)
+    start, end = datetime(2030, 1, 2, 10, 30), datetime(2030, 1, 31, 14, 15)
+
+    report = usage_rollup.query(start, end)
+    reads = store.documents_read
+
+    # Hourly rollups alone must give the same answer, at many more reads
+    monkeypatch.setattr(usage_rollup, "HOUR_QUERY_LIMIT", timedelta(days=365))
+    store.documents_read = 0
+    hourly = usage_rollup.query(start, end)
+
+    key = lambda row: row["endpoint"]
+    for row, expected in zip(sorted(report, key=key), sorted(hourly, key=key)):
+        assert row == {**expected, "duration_seconds": pytest.approx(expected["duration_seconds"])}
+    # The hours from 10:00 on the first day to 14:00 on the last, per route
+    assert [row["count"] for row in report] == [(14 + 28 * 24 + 15)] * len(ROUTES)
+    # 28 whole days plus 14 leading and 15 trailing hours per series
+    assert reads == (28 + 14 + 15) * len(ROUTES)
+    assert store.documents_read == (14 + 28 * 24 + 15) * len(ROUTES)
+
+
+def test_range_on_day_boundaries_reads_no_hourly_rollups(store):
+    _seed_hourly_traffic(store, datetime(2030, 1, 1), 10 * 24)
+
+    report = usage_rollup.query(datetime(2030, 1, 2), datetime(2030, 1, 8, 23, 59))
+
+    assert [row["count"] for row in report] == [7 * 24] * len(ROUTES)
+    assert store.documents_read == 7 * len(ROUTES)
@@ -0,0 +1,102 @@
+import itertools
+import pytest
+from models.user_model import userModel
+from services import booking_service, user_service
+from services.booking_service import SlotUnavailableError
+from services.user_service import register_user
+from common import gate_index
+
+
+class FakeAuth:
+    """The firebase_admin.auth calls registration makes, with unique emails."""
+
+    def __init__(self):
+        self.users = {}     # uid -> email
+        self._uids = itertools.count(1)
+
+    def create_user(self, email: str, password: str):
+        if email in self.users.values():
+            raise ValueError(f"The user with the provided email already exists: {email}")
+        uid = f"uid-{next(self._uids)}"
+        self.users[uid] = email
+        return type("UserRecord", (), {"uid": uid})()
+
+    def set_custom_user_claims(self, uid: str, claims: dict):
+        pass
+
+    def delete_user(self, uid: str):
+        del self.users[uid]
+
+
+@pytest.fixture
+def registration(store, monkeypatch):
+    fake_auth = FakeAuth()
+    sent = []
+    monkeypatch.setattr(user_service, "_db", store)
+    monkeypatch.setattr(user_service, "auth", fake_auth)
+    monkeypatch.setattr(user_service, "enqueue_sms", lambda recipient, message: sent.append(recipient))
+    return fake_auth, sent
+
+
+def _form(**overrides) -> userModel:
+    return userModel(**{
+        "name": "Nimal", "nic": "901234567V", "address": "Colombo", "contact": "0771234567",
+        "email": "nimal@example.com", "password": "secret123", "vehicle_brand": "Toyota",
+        "vehicle_model": "Aqua", "car_color": "White", "plate_number": "CAB-1234",
+        "package_id": "daily", "from_date": "2030-01-10", "to_date": "2030-01-12", "slot_id": "slot-1",
+        **overrides,
+    })
+
+
+def _documents(store, collection: str) -> list:
+    return [snapshot.to_dict() for snapshot in store.collection(collection).stream()]
+
+
+def test_retry_after_restart_returns_the_first_registration(store, registration):
+    fake_auth, sent = registration
+    first = register_user(_form(), idempotency_key="register-once")
+
+    # The in-process response cache is gone and the slot index holds the booking
+    booking_service._idempotent_responses.clear()
+    retried = register_user(_form(), idempotency_key="register-once")
+
+    assert retried == first
+    assert list(fake_auth.users) == [first["user_id"]]
+    assert len(_documents(store, "Booking")) == 1
+    assert len(sent) == 1
+
+
+def test_lost_slot_race_leaves_no_account(store, registration, monkeypatch):
+    fake_auth, sent = registration
+    register_user(_form(email="first@example.com", plate_number="CAB-0001"))
+
+    # Another worker's index has not seen the booking, so only the claim stops it
+    monkeypatch.setattr(user_service.slot_intervals, "is_free", lambda *args: True)
+    with pytest.raises(SlotUnavailableError):
+        register_user(_form(plate_number="CAB-0002"))
+
+    assert list(fake_auth.users.values()) == ["first@example.com"]
+    assert len(_documents(store, "User")) == 1
+    assert [vehicle["plate_number"] for vehicle in _documents(store, "Vehicle")] == ["CAB-0001"]
+    assert gate_index.normalize_plate("CAB-0002") not in gate_index._plate_vehicle
+    assert len(sent) == 1
+
+    # The email is free to register for another slot
+    registered = register_user(_form(plate_number="CAB-0002", slot_id="slot-2"))
+    assert fake_auth.users[registered["user_id"]] == "nimal@example.com"
+
+
+def test_concurrent_retry_keeps_one_account_and_one_sms(store, registration, monkeypatch):
+    fake_auth, sent = registration
+    first = register_user(_form(), idempotency_key="raced")
+
+    # A retry that passed the up-front lookup before the first one committed,
+    # with an email the fake has not seen so it gets as far as the booking
+    monkeypatch.setattr(user_service, "stored_booking", lambda key: None)
+    monkeypatch.setattr(user_service.slot_intervals, "is_free", lambda *args: True)
+    retried = register_user(_form(email="retry@example.com"), idempotency_key="raced")
+
+    assert retried == first
+    assert list(fake_auth.users) == [first["user_id"]]
+    assert len(_documents(store, "Vehicle")) == 1
+    assert len(sent) == 1
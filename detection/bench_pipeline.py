@@ -0,0 +1,126 @@
+"""
+Capture/OCR pipeline benchmark for sizing OCR_WORKERS. A synthetic camera
+delivers a plate frame at 30 fps; every frame is offered to OCR (no motion
+gate), first inline as detect_plate used to do, then through the shared
+frame ring and a pool of worker processes. Reports display fps, OCR
+throughput, frames dropped for a busy pool and capture-to-result latency.
+
+    python bench_pipeline.py [--seconds 10] [--workers 1 2 4] [--backend auto]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+from frame_ring import FrameRing
+from ocr_backend import create_backend, resolve
+from pipeline import (
+    LatestFrame, CaptureThread, StageMeter, put_drop_oldest, read_plates, ring_slots,
+    start_ocr_workers, stop_ocr_workers, OCR_QUEUE_SIZE, RESULT_QUEUE_SIZE
+)
+from synthetic_scenes import FPS, FRAME_SHAPE, plate_frame
+
+# Longest wait for a worker to load its backend
+WORKER_LOAD_TIMEOUT_SECONDS = 120
+
+
+class SyntheticCamera:
+    """cv2.VideoCapture stand-in that delivers the same frame at a camera's pace."""
+
+    def __init__(self, frame, seconds: float, fps: float = FPS):
+        self.frame = frame
+        self.interval = 1 / fps
+        self.remaining = int(seconds * fps)
+        self.next_frame = time.monotonic()
+
+    def read(self):
+        if self.remaining <= 0:
+            return False, None
+        self.remaining -= 1
+        self.next_frame += self.interval
+        time.sleep(max(0.0, self.next_frame - time.monotonic()))
+        return True, self.frame
+
+    def release(self):
+        pass
+
+
+def inline(frame, args) -> str:
+    reader = create_backend(args.backend, args.threads)
+    camera = SyntheticCamera(frame, args.seconds)
+    shown = 0
+    started = time.monotonic()
+    while True:
+        ok, image = camera.read()
+        if not ok:
+            break
+        read_plates(reader, image)
+        shown += 1
+    elapsed = time.monotonic() - started
+    return f"inline:     display {shown / elapsed:5.1f} fps, OCR {shown / elapsed:5.1f}/s"
+
+
+def pooled(frame, workers: int, args) -> str:
+    context = mp.get_context("spawn")
+    ring = FrameRing.create(context, ring_slots(workers), FRAME_SHAPE)
+    jobs = context.Queue(OCR_QUEUE_SIZE)
+    results = context.Queue(RESULT_QUEUE_SIZE)
+    processes = start_ocr_workers(context, jobs, results, ring, workers, backend=args.backend)
+
+    # One job per worker so backend loading is not counted
+    for seq in range(1, workers + 1):
+        jobs.put((seq, time.monotonic(), ring.write(frame, seq, time.monotonic(), hold=True)))
+        results.get(timeout=WORKER_LOAD_TIMEOUT_SECONDS)
+
+    frames = LatestFrame()
+    capture = CaptureThread(SyntheticCamera(frame, args.seconds), frames)
+    display, ocr, end_to_end = StageMeter("display"), StageMeter("ocr"), StageMeter("end-to-end")
+    seq = 0
+    started = time.monotonic()
+    capture.start()
+    while True:
+        latest = frames.get(seq, timeout=0.005)
+        if latest is None and frames.closed:
+            break
+        if latest is not None:
+            seq, captured_at, image = latest
+            display.record(time.monotonic() - captured_at)
+            # Offset past the warm-up jobs' sequence numbers
+            slot = ring.write(image, workers + seq, captured_at)
+            if slot is None or put_drop_oldest(jobs, (workers + seq, captured_at, slot)):
+                ocr.drop()
+        while True:
+            try:
+                _, job_captured_at, job_started, finished, _ = results.get_nowait()
+            except queue.Empty:
+                break
+            ocr.record(finished - job_started)
+            end_to_end.record(time.monotonic() - job_captured_at)
+    elapsed = time.monotonic() - started
+
+    stop_ocr_workers(jobs, processes)
+    ring.close()
+    latency = end_to_end.summary()
+    return (f"{workers} worker{'s' if workers > 1 else ' '}:  display {display.count / elapsed:5.1f} fps,"
+            f" OCR {ocr.count / elapsed:5.1f}/s, dropped {ocr.dropped},"
+            f" capture->result p50 {latency.get('p50_ms')} ms p95 {latency.get('p95_ms')} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inline OCR with the worker pool.")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", default="auto", help="OCR backend for every stage")
+    parser.add_argument("--threads", type=int, help="inference threads for the inline reader")
+    args = parser.parse_args()
+
+    frame, _, _ = plate_frame(random.Random(1))
+    print(f"{os.cpu_count()} cores, backend {resolve(args.backend)}, {args.seconds:g} s at {FPS} fps")
+    print(inline(frame, args))
+    for workers in args.workers:
+        print(pooled(frame, workers, args))
+
+
+if __name__ == "__main__":
+    main()
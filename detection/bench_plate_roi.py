@@ -0,0 +1,141 @@
+"""
+Plate localization benchmark on frames with a known plate box: how often a
+proposed ROI covers the plate, how much of the frame is left for OCR and
+what localization costs. With --backend, OCR is also timed on the ROIs
+against whole frames, with the share of frames whose plate was read and
+the non-plate reads.
+
+    python bench_plate_roi.py [--frames 200] [--backend easyocr-cpu]
+    python bench_plate_roi.py --frames-dir clips/plates --labels clips/plates/labels.json --backend auto
+
+Without --frames-dir the frames are synthetic, each with a sign of
+distracting text. A stored frame set needs a labels file mapping each
+image name to its plate and, for the coverage figures, the plate's text
+box in pixels, e.g. {"0001.jpg": {"plate": "CAB-1234", "box": [612, 540, 180, 48]}}.
+Images without a label are skipped.
+"""
+import argparse
+import json
+import os
+import random
+import time
+import cv2
+from benchmark import IMAGE_EXTENSIONS
+from ocr_backend import create_backend, resolve
+from pipeline import read_plates
+from plate_roi import propose_rois
+from plate_tracker import normalize
+from synthetic_scenes import FRAME_SHAPE, plate_frame
+
+# Share of the plate's text box a ROI must contain to count as covering it
+MIN_COVERAGE = 0.9
+
+
+def covers(roi, box) -> bool:
+    x, y, w, h = roi
+    bx, by, bw, bh = box
+    overlap_x = max(0, min(x + w, bx + bw) - max(x, bx))
+    overlap_y = max(0, min(y + h, by + bh) - max(y, by))
+    return overlap_x * overlap_y / (bw * bh) >= MIN_COVERAGE
+
+
+def load_frames(frames_dir: str, labels_path: str) -> list:
+    """(frame, plate_text, plate_box or None) for every labeled image in frames_dir, in name order."""
+    with open(labels_path) as labels_file:
+        labels = json.load(labels_file)
+    frames = []
+    for name in sorted(os.listdir(frames_dir)):
+        label = labels.get(name)
+        if not name.lower().endswith(IMAGE_EXTENSIONS) or not label:
+            continue
+        frame = cv2.imread(os.path.join(frames_dir, name))
+        if frame is None:
+            print(f"[WARN] Cannot read {name}, skipped")
+            continue
+        box = tuple(label["box"]) if label.get("box") else None
+        frames.append((frame, label["plate"], box))
+    if not frames:
+        raise ValueError(f"No labeled images in {frames_dir}")
+    return frames
+
+
+def localization(frames: list) -> dict:
+    # Coverage is measured on the frames whose plate box is known
+    covered = top_covered = boxed = rois_total = 0
+    pixels = seconds = 0.0
+    for frame, _, box in frames:
+        started = time.perf_counter()
+        rois = propose_rois(frame)
+        seconds += time.perf_counter() - started
+        rois_total += len(rois)
+        if box is not None:
+            boxed += 1
+            covered += any(covers(roi, box) for roi in rois)
+            top_covered += bool(rois) and covers(rois[0], box)
+        pixels += sum(w * h for _, _, w, h in rois) / (frame.shape[0] * frame.shape[1])
+    count = len(frames)
+    return {
+        "boxed": boxed,
+        "covered": covered / boxed if boxed else None,
+        "top_covered": top_covered / boxed if boxed else None,
+        "rois_per_frame": rois_total / count,
+        "ocr_pixels": pixels / count,
+        "ms_per_frame": seconds / count * 1000,
+    }
+
+
+def ocr(reader, frames: list, use_roi: bool) -> dict:
+    read = stray = 0
+    seconds = 0.0
+    for frame, text, _ in frames:
+        started = time.perf_counter()
+        detections = read_plates(reader, frame, use_roi=use_roi)
+        seconds += time.perf_counter() - started
+        texts = [normalize(detected) for _, detected, _ in detections]
+        read += normalize(text) in texts
+        stray += sum(1 for detected in texts if detected != normalize(text))
+    return {"read": read / len(frames), "stray_reads": stray, "ms_per_frame": seconds / len(frames) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure plate localization and its effect on OCR.")
+    parser.add_argument("--frames", type=int, default=200, help="synthetic frames to generate")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--frames-dir", help="folder of stored frames to use instead of synthetic ones")
+    parser.add_argument("--labels", help="JSON labels for --frames-dir (default: labels.json in it)")
+    parser.add_argument("--backend", help="also time OCR with this backend (or auto)")
+    parser.add_argument("--threads", type=int, help="inference threads for the backend")
+    args = parser.parse_args()
+
+    if args.frames_dir:
+        frames = load_frames(args.frames_dir, args.labels or os.path.join(args.frames_dir, "labels.json"))
+        source = f"frames from {args.frames_dir}"
+    else:
+        rng = random.Random(args.seed)
+        frames = [plate_frame(rng) for _ in range(args.frames)]
+        source = f"synthetic {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]} frames"
+    result = localization(frames)
+    coverage = (f"plate covered by a ROI {result['covered']:.1%}, by the top ROI {result['top_covered']:.1%}"
+                f" ({result['boxed']} with a box)" if result["boxed"] else "no plate boxes labeled")
+    print(f"{len(frames)} {source}: {coverage},"
+          f" {result['rois_per_frame']:.2f} ROIs/frame, OCR pixels {result['ocr_pixels']:.2%} of the frame,"
+          f" localization {result['ms_per_frame']:.1f} ms/frame")
+
+    if not args.backend:
+        return
+    reader = create_backend(args.backend, args.threads)
+    reader.readtext(frames[0][0])  # warm-up: first call allocates and autotunes
+    print(f"OCR with {resolve(args.backend)}:")
+    runs = [("whole frame", False), ("ROIs", True)] if reader.detects_text else [("ROIs", True)]
+    timings = {}
+    for name, use_roi in runs:
+        result = ocr(reader, frames, use_roi)
+        timings[name] = result["ms_per_frame"]
+        print(f"  {name:>11}: {result['ms_per_frame']:8.1f} ms/frame, plate read {result['read']:.1%},"
+              f" {result['stray_reads']} non-plate reads")
+    if len(timings) == 2:
+        print(f"  speedup {timings['whole frame'] / timings['ROIs']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Offline benchmark for the plate detector.
+
+Replays recorded videos or folders of frames through the same stages as
+detect_plate (motion gate, plate localization, OCR, tracker) without a
+camera or a display, and prints a JSON report.
+
+    python benchmark.py clips/entry1.mp4 clips/frames_run2 --labels labels.json --output report.json
+    python benchmark.py clips/entry1.mp4 --labels labels.json --backend easyocr-cpu --backend onnx
+
+labels.json maps each source's file or folder name to the plates that
+should be sent for it, e.g. {"entry1.mp4": ["CAB-1234"]}.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+import cv2
+import motion_gate
+import plate_roi
+import plate_tracker
+from motion_gate import MotionGate
+from ocr_backend import create_backend, resolve
+from pipeline import read_plates
+from plate_tracker import PlateTracker, normalize
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+# Frame rate assumed for image folders and videos that do not report one
+DEFAULT_FPS = 30.0
+
+
+def iter_frames(source: str, fps: float):
+    """(video_seconds, frame) for a video file or a folder of images in name order."""
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(names):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield index / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open {source}")
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index / video_fps, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def run_source(source: str, expected: list, reader, args) -> dict:
+    gate = MotionGate(ocr_frames_per_settle=args.ocr_frames_per_settle)
+    tracker = PlateTracker()
+    expected = [normalize(plate) for plate in expected]
+
+    frames = 0
+    ocr_frames = 0
+    ocr_seconds = 0.0
+    sends = []
+    started = time.perf_counter()
+
+    for video_time, frame in iter_frames(source, args.fps):
+        frames += 1
+        if not args.no_gate and not gate.update(frame):
+            continue
+
+        ocr_frames += 1
+        ocr_started = time.perf_counter()
+        detections = read_plates(reader, frame, use_roi=not args.no_roi)
+        ocr_seconds += time.perf_counter() - ocr_started
+
+        for plate, confidence, first_seen in tracker.update(detections, video_time):
+            sends.append({
+                "plate": plate,
+                "confidence": round(confidence, 3),
+                "video_s": round(video_time, 3),
+                "wall_s": round(time.perf_counter() - started, 3),
+                "correct": plate in expected
+            })
+
+    wall = time.perf_counter() - started
+    correct = {send["plate"] for send in sends if send["correct"]}
+    false_sends = [send for send in sends if not send["correct"]]
+    first = sends[0] if sends else None
+    return {
+        "source": source,
+        "frames": frames,
+        "wall_s": round(wall, 3),
+        "fps": round(frames / wall, 2) if wall else None,
+        "ocr_frames": ocr_frames,
+        "ocr_ms_per_frame": round(ocr_seconds / ocr_frames * 1000, 1) if ocr_frames else None,
+        "gate_skipped_ratio": round(1 - ocr_frames / frames, 4) if frames else None,
+        "first_confirmed_video_s": first["video_s"] if first else None,
+        "first_confirmed_wall_s": first["wall_s"] if first else None,
+        "expected": expected,
+        "sent": sends,
+        "plate_accuracy": round(len(correct) / len(expected), 4) if expected else None,
+        "false_sends": len(false_sends),
+        "false_send_rate": round(len(false_sends) / len(sends), 4) if sends else 0.0,
+    }
+
+
+def summarize(results: list) -> dict:
+    frames = sum(result["frames"] for result in results)
+    wall = sum(result["wall_s"] for result in results)
+    expected = sum(len(result["expected"]) for result in results)
+    correct = sum(len({send["plate"] for send in result["sent"] if send["correct"]}) for result in results)
+    sends = sum(len(result["sent"]) for result in results)
+    false_sends = sum(result["false_sends"] for result in results)
+    firsts = sorted(result["first_confirmed_video_s"] for result in results if result["first_confirmed_video_s"] is not None)
+    return {
+        "sources": len(results),
+        "frames": frames,
+        "fps": round(frames / wall, 2) if wall else None,
+        "ocr_frames": sum(result["ocr_frames"] for result in results),
+        "plate_accuracy": round(correct / expected, 4) if expected else None,
+        "false_send_rate": round(false_sends / sends, 4) if sends else 0.0,
+        "median_first_confirmed_video_s": firsts[len(firsts) // 2] if firsts else None,
+    }
+
+
+def config_snapshot(args) -> dict:
+    return {
+        "gate": not args.no_gate,
+        "roi": not args.no_roi,
+        "ocr_frames_per_settle": args.ocr_frames_per_settle,
+        "gate_width": motion_gate.GATE_WIDTH,
+        "min_vehicle_ratio": motion_gate.MIN_VEHICLE_RATIO,
+        "roi_max": plate_roi.MAX_ROIS,
+        "tracker_min_reads": plate_tracker.MIN_READS,
+        "tracker_confirm_score": plate_tracker.CONFIRM_SCORE,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded footage through the plate detector.")
+    parser.add_argument("sources", nargs="+", help="video files or folders of frames")
+    parser.add_argument("--labels", help="JSON file mapping source names to expected plates")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="frame rate for image folders")
+    parser.add_argument("--backend", action="append",
+                        help="OCR backend to run (repeat to compare); default auto")
+    parser.add_argument("--threads", type=int, help="inference threads per backend")
+    parser.add_argument("--no-gate", action="store_true", help="OCR every frame")
+    parser.add_argument("--no-roi", action="store_true", help="OCR whole frames")
+    parser.add_argument("--ocr-frames-per-settle", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    labels = {}
+    if args.labels:
+        with open(args.labels) as labels_file:
+            labels = json.load(labels_file)
+
+    runs = []
+    for backend in args.backend or ["auto"]:
+        load_started = time.perf_counter()
+        reader = create_backend(backend, args.threads)
+        load_seconds = time.perf_counter() - load_started
+
+        results = []
+        for source in args.sources:
+            name = os.path.basename(os.path.normpath(source))
+            results.append(run_source(source, labels.get(name, []), reader, args))
+
+        runs.append({
+            "backend": resolve(backend),
+            "reader_load_s": round(load_seconds, 3),
+            "summary": summarize(results),
+            "results": results,
+        })
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config_snapshot(args),
+        "runs": runs,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
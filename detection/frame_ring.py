@@ -0,0 +1,112 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+# Header fields per slot, stored ahead of the frames
+SEQ, BUSY, HEIGHT, WIDTH = 0, 1, 2, 3
+HEADER_FIELDS = 4
+
+
+class FrameRing:
+    """
+    Fixed-size ring of frames in shared memory. The owner copies a frame in
+    once with write(); OCR processes claim a slot by (slot, seq) and read it
+    in place, so frames never go through pickle or a pipe.
+
+    A slot's seq header is 0 while it is being written. Claimed slots are
+    marked busy and skipped by the writer until released; a job whose slot
+    was overwritten before it was claimed is stale and claim() returns None.
+    Frames smaller than the ring's shape are stored top-left and read back
+    at their own size, so one ring can serve cameras of mixed resolution.
+    """
+
+    def __init__(self, slots: int, shape, lock, name: str = None, dtype=np.uint8):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.lock = lock
+        self.owner = name is None
+
+        header_bytes = slots * HEADER_FIELDS * 8 + slots * 8
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        size = header_bytes + slots * self.frame_bytes
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Workers are children of the owner and share its resource
+            # tracker, so attaching does not hand them the unlink
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        buf = self.shm.buf
+        self.header = np.ndarray((slots, HEADER_FIELDS), np.int64, buf, 0)
+        self.captured_at = np.ndarray((slots,), np.float64, buf, slots * HEADER_FIELDS * 8)
+        self.frames = np.ndarray((slots,) + self.shape, self.dtype, buf, header_bytes)
+        if self.owner:
+            self.header[:] = 0
+        self._next = 0
+        self.writes = 0
+        self.full = 0
+
+    @classmethod
+    def create(cls, context, slots: int, shape, dtype=np.uint8):
+        return cls(slots, shape, context.Lock(), dtype=dtype)
+
+    def __getstate__(self):
+        # Child processes re-attach by name instead of pickling the buffer
+        return self.slots, self.shape, self.lock, self.shm.name, self.dtype.str
+
+    def __setstate__(self, state):
+        slots, shape, lock, name, dtype = state
+        self.__init__(slots, shape, lock, name=name, dtype=dtype)
+
+    def fits(self, frame) -> bool:
+        height, width = frame.shape[:2]
+        return frame.shape[2:] == self.shape[2:] and height <= self.shape[0] and width <= self.shape[1]
+
+    def write(self, frame, seq: int, captured_at: float, hold: bool = False):
+        """
+        Copy frame into the next free slot; returns the slot, or None if every
+        slot is busy. With hold the slot stays busy until a worker releases
+        it, for callers that never drop a queued job.
+        """
+        if not self.fits(frame):
+            raise ValueError(f"Frame shape {frame.shape} does not fit ring shape {self.shape}")
+        height, width = frame.shape[:2]
+        with self.lock:
+            for offset in range(self.slots):
+                slot = (self._next + offset) % self.slots
+                if not self.header[slot, BUSY]:
+                    break
+            else:
+                self.full += 1
+                return None
+            self.header[slot, SEQ] = 0
+            self.header[slot, BUSY] = int(hold)
+        np.copyto(self.frames[slot, :height, :width], frame)
+        with self.lock:
+            self.captured_at[slot] = captured_at
+            self.header[slot, HEIGHT] = height
+            self.header[slot, WIDTH] = width
+            self.header[slot, SEQ] = seq
+        self._next = (slot + 1) % self.slots
+        self.writes += 1
+        return slot
+
+    def claim(self, slot: int, seq: int):
+        """View of the frame written as seq, held until release(); None if the slot moved on."""
+        with self.lock:
+            if self.header[slot, SEQ] != seq:
+                return None
+            self.header[slot, BUSY] = 1
+            height, width = self.header[slot, HEIGHT], self.header[slot, WIDTH]
+        return self.frames[slot, :height, :width]
+
+    def release(self, slot: int):
+        with self.lock:
+            self.header[slot, BUSY] = 0
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        del self.header, self.captured_at, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
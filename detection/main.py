@@ -1,66 +1,124 @@
 import cv2
-import easyocr
-import requests
+import multiprocessing as mp
+import os
+import queue
 import time
-
-# Setup EasyOCR
-reader = easyocr.Reader(['en'], gpu=True)
+from frame_ring import FrameRing
+from motion_gate import MotionGate
+from plate_tracker import PlateTracker
+from pipeline import (
+    LatestFrame, CaptureThread, Sender, StageMeter, put_drop_oldest, ring_slots,
+    start_ocr_workers, stop_ocr_workers, OCR_WORKERS, OCR_QUEUE_SIZE, RESULT_QUEUE_SIZE
+)
 
 # FastAPI Endpoint
 BACKEND_URL = "http://127.0.0.1:8000/api/webcam/"
 
+# easyocr-gpu, easyocr-cpu, onnx, service (a shared ocr_service.py), or auto
+# for the fastest local one testing.py found
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+# Crop to candidate plate regions before OCR instead of reading the whole frame
+PLATE_ROI = True
+
+# How often the motion gate's skip rate is printed
+GATE_REPORT_EVERY = 300
+# How often per-stage throughput and latency are printed
+METRICS_EVERY_SECONDS = 10
+
+# Frames sent to OCR per settled vehicle; the tracker votes across them
+OCR_FRAMES_PER_SETTLE = 5
+
+
+def print_metrics(meters):
+    for meter in meters:
+        print(f"[METRICS] {meter.summary()}")
+
+
 def detect_plate():
     cap = cv2.VideoCapture(0)
     print("[INFO] Starting camera... Press 'q' to quit.")
-    
-    last_detection_time = 0
-    cooldown_seconds = 10  # Cooldown period to avoid multiple detections
+
+    gate = MotionGate(ocr_frames_per_settle=OCR_FRAMES_PER_SETTLE)
+    # Confirms plates by per-character votes across frames; repeats of a
+    # sent plate are suppressed per plate rather than by a global cooldown
+    tracker = PlateTracker()
+
+    # Capture -> latest frame -> (gate) -> shared frame ring -> OCR processes -> results -> sender
+    frames = LatestFrame()
+    capture = CaptureThread(cap, frames)
+    capture.start()
+    first = frames.get(0, timeout=10)
+    if first is None:
+        print("[ERROR] Camera delivered no frames")
+        capture.stop()
+        cap.release()
+        return
+
+    context = mp.get_context("spawn")
+    # Gated frames are copied into shared memory once; jobs carry only the slot
+    ring = FrameRing.create(context, ring_slots(OCR_WORKERS), first[2].shape)
+    jobs = context.Queue(OCR_QUEUE_SIZE)
+    results = context.Queue(RESULT_QUEUE_SIZE)
+    workers = start_ocr_workers(context, jobs, results, ring, OCR_WORKERS, backend=OCR_BACKEND, use_roi=PLATE_ROI)
+    sender = Sender(BACKEND_URL)
+    sender.start()
+
+    display_meter = StageMeter("display")
+    ocr_meter = StageMeter("ocr")
+    meters = [capture.meter, display_meter, ocr_meter, sender.meter, sender.end_to_end]
+    next_metrics = time.monotonic() + METRICS_EVERY_SECONDS
+
+    seq = 0
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+        latest = frames.get(seq)
+        if latest is None:
+            if frames.closed:
+                break
+            continue
+        seq, captured_at, frame = latest
+        display_meter.record(time.monotonic() - captured_at)
+
+        # The gate sees every displayed frame so its background stays current
+        vehicle_settled = gate.update(frame)
+        if gate.frames % GATE_REPORT_EVERY == 0:
+            print(f"[GATE] {gate.report()}")
+
+        # Only process when a vehicle has settled in view
+        if vehicle_settled:
+            slot = ring.write(frame, seq, captured_at)
+            if slot is None or put_drop_oldest(jobs, (seq, captured_at, slot)):
+                ocr_meter.drop()
+
+        while True:
+            try:
+                job_seq, job_captured_at, started, finished, detections = results.get_nowait()
+            except queue.Empty:
+                break
+            ocr_meter.record(finished - started)
+
+            for plate, confidence, first_seen in tracker.update(detections, job_captured_at):
+                print(f"[CONFIRMED] Sending plate: {plate} (Confidence: {confidence:.2f})")
+                sender.submit(plate, first_seen)
 
-        current_time = time.time()
-
-        # Only process after cooldown
-        if current_time - last_detection_time >= cooldown_seconds:
-            results = reader.readtext(frame)
-
-            for (bbox, text, prob) in results:
-                plate = text.strip().replace(" ", "")
-                if 5 <= len(plate) <= 10 and prob > 0.5:
-                    print(f"[PLATE DETECTED] {plate} (Confidence: {prob:.2f})")
-
-                    # Wait 3 seconds before capturing final frame
-                    print("[INFO] Waiting 3 seconds before confirming plate...")
-                    time.sleep(3)
-
-                    # Re-capture for a stable image
-                    ret, confirm_frame = cap.read()
-                    if ret:
-                        confirm_results = reader.readtext(confirm_frame)
-                        for (_, confirm_text, confirm_prob) in confirm_results:
-                            confirm_plate = confirm_text.strip().replace(" ", "")
-                            if confirm_plate == plate:
-                                print(f"[CONFIRMED] Sending plate: {confirm_plate}")
-
-                                try:
-                                    res = requests.post(BACKEND_URL, json={"plate": confirm_plate})
-                                    print(f"[BACKEND RESPONSE] {res.json()}")
-                                except Exception as e:
-                                    print(f"[ERROR] Failed to send to backend: {e}")
-                                
-                                last_detection_time = time.time()  # Start cooldown
-                                break
-                    break  # Exit after one detection (to avoid multiple in loop)
+        now = time.monotonic()
+        if now >= next_metrics:
+            print_metrics(meters)
+            next_metrics = now + METRICS_EVERY_SECONDS
 
         cv2.imshow("Live Plate Detection", frame)
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
+    capture.stop()
+    capture.join(2)
+    stop_ocr_workers(jobs, workers)
+    ring.close()
+    sender.stop()
     cap.release()
     cv2.destroyAllWindows()
+    print(f"[GATE] {gate.report()}")
+    print_metrics(meters)
 
 if __name__ == "__main__":
     detect_plate()
@@ -0,0 +1,105 @@
+import cv2
+
+# Work on a small grayscale copy; the gate only needs coarse shapes
+GATE_WIDTH = 320
+# Per-pixel intensity change that counts as different
+DIFF_THRESHOLD = 25
+# Foreground must cover this fraction of the frame to be vehicle-sized
+MIN_VEHICLE_RATIO = 0.03
+# Frame-to-frame change below this fraction means the scene has settled
+SETTLED_MOTION_RATIO = 0.004
+# Consecutive still frames before a vehicle counts as settled
+SETTLE_FRAMES = 5
+# OCR frames granted per settled vehicle; motion re-arms the gate
+OCR_FRAMES_PER_SETTLE = 3
+# A vehicle still for this many frames becomes part of the background
+ABSORB_FRAMES = 900
+# How fast the empty-scene background follows lighting changes
+BACKGROUND_ALPHA = 0.05
+
+
+class MotionGate:
+    """
+    Cheap pre-filter in front of OCR. A frame is passed on only when a
+    vehicle-sized region differs from the learned background and the
+    scene has stopped moving.
+    """
+
+    def __init__(self, gate_width=GATE_WIDTH, diff_threshold=DIFF_THRESHOLD,
+                 min_vehicle_ratio=MIN_VEHICLE_RATIO, settled_motion_ratio=SETTLED_MOTION_RATIO,
+                 settle_frames=SETTLE_FRAMES, ocr_frames_per_settle=OCR_FRAMES_PER_SETTLE,
+                 absorb_frames=ABSORB_FRAMES, background_alpha=BACKGROUND_ALPHA):
+        self.gate_width = gate_width
+        self.diff_threshold = diff_threshold
+        self.min_vehicle_ratio = min_vehicle_ratio
+        self.settled_motion_ratio = settled_motion_ratio
+        self.settle_frames = settle_frames
+        self.ocr_frames_per_settle = ocr_frames_per_settle
+        self.absorb_frames = absorb_frames
+        self.background_alpha = background_alpha
+
+        self.background = None
+        self.previous = None
+        self.still_frames = 0
+        self.ocr_frames_left = ocr_frames_per_settle
+
+        self.frames = 0
+        self.passed = 0
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.gate_width, max(1, height * self.gate_width // width)),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _changed_ratio(self, a, b):
+        diff = cv2.absdiff(a, b)
+        _, mask = cv2.threshold(diff, self.diff_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def update(self, frame) -> bool:
+        """Feed every frame; True when this one should go to OCR."""
+        self.frames += 1
+        gray = self._prepare(frame)
+
+        if self.background is None:
+            self.background = gray.astype("float32")
+            self.previous = gray
+            return False
+
+        background = cv2.convertScaleAbs(self.background)
+        vehicle_present = self._changed_ratio(gray, background) >= self.min_vehicle_ratio
+        moving = self._changed_ratio(gray, self.previous) >= self.settled_motion_ratio
+        self.previous = gray
+
+        if not vehicle_present:
+            # Empty scene: follow slow lighting changes and re-arm
+            cv2.accumulateWeighted(gray, self.background, self.background_alpha)
+            self.still_frames = 0
+            self.ocr_frames_left = self.ocr_frames_per_settle
+            return False
+
+        if moving:
+            self.still_frames = 0
+            self.ocr_frames_left = self.ocr_frames_per_settle
+            return False
+
+        self.still_frames += 1
+        if self.still_frames >= self.absorb_frames:
+            # Something parked in view for good; stop treating it as a vehicle
+            self.background = gray.astype("float32")
+            self.still_frames = 0
+            return False
+
+        if self.still_frames >= self.settle_frames and self.ocr_frames_left > 0:
+            self.ocr_frames_left -= 1
+            self.passed += 1
+            return True
+        return False
+
+    def skipped_ratio(self) -> float:
+        return 1 - self.passed / self.frames if self.frames else 0.0
+
+    def report(self) -> str:
+        return f"{self.frames} frames, {self.passed} sent to OCR, {self.skipped_ratio():.1%} skipped"
@@ -0,0 +1,257 @@
+"""
+Headless plate detector for several cameras in one process.
+
+    python multi_camera.py cameras.json
+
+cameras.json lists the streams (see cameras.example.json):
+
+    [{"name": "entry-1", "source": 0, "lane": "entry", "gate_id": "gate-1"},
+     {"name": "exit-1", "source": "rtsp://192.168.1.40:554/stream1", "lane": "exit", "gate_id": "gate-1"}]
+
+Each source is captured on its own thread, reconnecting when it drops and
+keeping only the newest frame. Motion gating and plate tracking run per
+stream; OCR workers are shared and handed settled frames round-robin
+across streams, so one busy lane cannot starve the others.
+"""
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import cv2
+from frame_ring import FrameRing
+from motion_gate import MotionGate
+from plate_tracker import PlateTracker
+from pipeline import (
+    LatestFrame, StreamCapture, Sender, StageMeter,
+    start_ocr_workers, stop_ocr_workers, OCR_WORKERS, RESULT_QUEUE_SIZE
+)
+
+BACKEND_URL = "http://127.0.0.1:8000/api/webcam/"
+CAMERAS_CONFIG = os.getenv("CAMERAS_CONFIG", "cameras.json")
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+PLATE_ROI = True
+OCR_FRAMES_PER_SETTLE = 5
+
+# Largest frame any camera delivers; bigger frames are scaled down to fit
+MAX_FRAME_SHAPE = (1080, 1920, 3)
+# Loop wait when no stream has a new frame
+IDLE_WAIT_SECONDS = 0.005
+METRICS_EVERY_SECONDS = 10
+# A stream is flagged when the loop keeps up with less than this share of
+# its camera's frames, or when OCR results arrive later than this
+MIN_KEEP_UP_RATIO = 0.8
+MAX_OCR_LAG_SECONDS = 2.0
+# A job with no result by then is reclaimed, e.g. after its worker died
+JOB_TIMEOUT_SECONDS = 30
+
+# Prefer TCP for RTSP; UDP loss shows up as smeared frames and misreads
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "rtsp_transport;tcp")
+
+
+class Stream:
+    """Per-camera state: capture, gate, tracker, the pending OCR frame and gauges."""
+
+    def __init__(self, config: dict):
+        if "source" not in config:
+            raise ValueError(f"Camera entry without a source: {config}")
+        self.name = str(config.get("name", config["source"]))
+        self.lane = config.get("lane")
+        self.gate_id = config.get("gate_id")
+        self.frames = LatestFrame()
+        self.capture = StreamCapture(self.name, config["source"], self.frames, loop=config.get("loop", False))
+        self.gate = MotionGate(ocr_frames_per_settle=OCR_FRAMES_PER_SETTLE)
+        self.tracker = PlateTracker()
+        self.seq = 0
+        # Newest settled frame waiting for a free OCR worker: (seq, captured_at, frame)
+        self.pending = None
+        self.in_flight = 0
+
+        self.processed = StageMeter(f"{self.name}-gate")
+        self.ocr = StageMeter(f"{self.name}-ocr")
+        self.skipped = 0          # frames overwritten before the loop saw them
+        self._last_counts = (0, 0, time.monotonic())
+
+    def poll(self):
+        """Run the gate on this stream's newest frame, if there is one."""
+        latest = self.frames.get(self.seq, timeout=0)
+        if latest is None:
+            return False
+        seq, captured_at, frame = latest
+        self.skipped += seq - self.seq - 1 if self.seq else 0
+        self.seq = seq
+        self.processed.record(time.monotonic() - captured_at)
+        if self.gate.update(frame):
+            if self.pending is not None:
+                self.ocr.drop()
+            self.pending = latest
+        return True
+
+    def gauges(self) -> dict:
+        """Capture and processing fps since the last call, lag and health."""
+        captured, processed, since = self._last_counts
+        now = time.monotonic()
+        elapsed = max(now - since, 1e-9)
+        capture_fps = (self.capture.meter.count - captured) / elapsed
+        process_fps = (self.processed.count - processed) / elapsed
+        self._last_counts = (self.capture.meter.count, self.processed.count, now)
+
+        ocr = self.ocr.summary()
+        lag = self.processed.summary().get("p95_ms")
+        oversubscribed = (
+            capture_fps > 0 and process_fps < capture_fps * MIN_KEEP_UP_RATIO
+        ) or ocr.get("p95_ms", 0) > MAX_OCR_LAG_SECONDS * 1000
+        return {
+            "stream": self.name,
+            "lane": self.lane,
+            "connected": self.capture.connected,
+            "reconnects": self.capture.reconnects,
+            "capture_fps": round(capture_fps, 1),
+            "process_fps": round(process_fps, 1),
+            "skipped_frames": self.skipped,
+            "frame_lag_p95_ms": lag,
+            "ocr_lag_p50_ms": ocr.get("p50_ms"),
+            "ocr_lag_p95_ms": ocr.get("p95_ms"),
+            "ocr_superseded": ocr["dropped"],
+            "gate_skipped": round(self.gate.skipped_ratio(), 4),
+            "oversubscribed": oversubscribed,
+        }
+
+
+def load_config(path: str) -> list:
+    with open(path) as config_file:
+        cameras = json.load(config_file)
+    if not isinstance(cameras, list) or not cameras:
+        raise ValueError(f"{path} must be a non-empty list of cameras")
+    return cameras
+
+
+def fit_frame(frame):
+    """Scale a frame down to MAX_FRAME_SHAPE if it is larger, keeping its aspect."""
+    height, width = frame.shape[:2]
+    scale = min(MAX_FRAME_SHAPE[0] / height, MAX_FRAME_SHAPE[1] / width)
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def dispatch(streams, start: int, ring, jobs, job_map, next_job: int, workers: int):
+    """
+    Hand pending frames to free workers, one per stream per pass, starting
+    after the stream served last. Returns (start, next_job).
+    """
+    in_flight = sum(stream.in_flight for stream in streams)
+    while in_flight < workers:
+        for offset in range(len(streams)):
+            index = (start + offset) % len(streams)
+            if streams[index].pending is not None:
+                break
+        else:
+            break
+        stream = streams[index]
+        seq, captured_at, frame = stream.pending
+        stream.pending = None
+        frame = fit_frame(frame)
+        # Held slots stay busy until the worker releases them; never dropped
+        slot = ring.write(frame, next_job, captured_at, hold=True)
+        if slot is None:
+            stream.pending = (seq, captured_at, frame)
+            break
+        jobs.put((next_job, captured_at, slot))
+        job_map[next_job] = (index, slot, time.monotonic() + JOB_TIMEOUT_SECONDS)
+        stream.in_flight += 1
+        in_flight += 1
+        next_job += 1
+        start = index + 1
+    return start, next_job
+
+
+def reclaim_expired(streams, ring, job_map, now: float) -> int:
+    """Release the slot and worker share of jobs past their deadline. Returns how many."""
+    expired = [job for job, (_, _, deadline) in job_map.items() if deadline <= now]
+    for job in expired:
+        index, slot, _ = job_map.pop(job)
+        ring.release(slot)
+        streams[index].in_flight -= 1
+        streams[index].ocr.drop()
+        print(f"[WARN] OCR job {job} for {streams[index].name} timed out, slot {slot} reclaimed")
+    return len(expired)
+
+
+def print_gauges(streams, sender):
+    for stream in streams:
+        gauges = stream.gauges()
+        flag = " OVERSUBSCRIBED" if gauges["oversubscribed"] else ""
+        print(f"[STREAM]{flag} {gauges}")
+    print(f"[METRICS] {sender.meter.summary()} spooled={sender.spool.pending} retries={sender.retries}")
+
+
+def run(config_path: str = CAMERAS_CONFIG):
+    streams = [Stream(camera) for camera in load_config(config_path)]
+    print(f"[INFO] {len(streams)} streams, {OCR_WORKERS} OCR workers ({OCR_BACKEND})")
+
+    context = mp.get_context("spawn")
+    # Every job in flight holds one slot; one more is always free to write
+    ring = FrameRing.create(context, OCR_WORKERS + 1, MAX_FRAME_SHAPE)
+    # Jobs are only queued for free workers, so the queue never needs to drop;
+    # every worker can post its result without waiting on the loop
+    jobs = context.Queue(OCR_WORKERS)
+    results = context.Queue(max(RESULT_QUEUE_SIZE, OCR_WORKERS))
+    workers = start_ocr_workers(context, jobs, results, ring, OCR_WORKERS, backend=OCR_BACKEND, use_roi=PLATE_ROI)
+    sender = Sender(BACKEND_URL)
+    sender.start()
+    for stream in streams:
+        stream.capture.start()
+
+    job_map = {}
+    next_job = 1
+    start = 0
+    next_metrics = time.monotonic() + METRICS_EVERY_SECONDS
+    try:
+        while (any(stream.capture.is_alive() or stream.pending for stream in streams)
+               or (job_map and any(worker.is_alive() for worker in workers))):
+            polled = [stream.poll() for stream in streams]
+            reclaim_expired(streams, ring, job_map, time.monotonic())
+            start, next_job = dispatch(streams, start, ring, jobs, job_map, next_job, OCR_WORKERS)
+
+            try:
+                # Waiting on results doubles as the idle sleep
+                result = results.get(timeout=0 if any(polled) else IDLE_WAIT_SECONDS)
+            except queue.Empty:
+                result = None
+            while result is not None:
+                job, captured_at, started, finished, detections = result
+                # A job reclaimed after its deadline was already released
+                entry = job_map.pop(job, None)
+                if entry is not None:
+                    stream = streams[entry[0]]
+                    stream.in_flight -= 1
+                    stream.ocr.record(finished - captured_at)
+                    for plate, confidence, first_seen in stream.tracker.update(detections, captured_at):
+                        print(f"[CONFIRMED] {stream.name} ({stream.gate_id}): {plate} (Confidence: {confidence:.2f})")
+                        sender.submit(plate, first_seen, stream.gate_id)
+                try:
+                    result = results.get_nowait()
+                except queue.Empty:
+                    result = None
+
+            now = time.monotonic()
+            if now >= next_metrics:
+                print_gauges(streams, sender)
+                next_metrics = now + METRICS_EVERY_SECONDS
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stream in streams:
+            stream.capture.stop()
+        for stream in streams:
+            stream.capture.join(2)
+        stop_ocr_workers(jobs, workers)
+        ring.close()
+        sender.stop()
+        print_gauges(streams, sender)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else CAMERAS_CONFIG)
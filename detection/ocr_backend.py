@@ -0,0 +1,314 @@
+"""
+Plate OCR backends.
+
+    easyocr-gpu   EasyOCR on CUDA (falls back to CPU inside EasyOCR)
+    easyocr-cpu   EasyOCR on CPU with torch thread tuning
+    onnx          EasyOCR's recognizer exported to ONNX, int8 dynamic
+                  quantized, run by ONNX Runtime; reads ROI crops only
+    service       posts ROI crops to ocr_service.py, which batches them
+                  across cameras; no model is loaded in this process
+    auto          the backend testing.py measured fastest, else the first
+                  local one that is available
+
+Every backend has readtext(image) and recognize(crops), which reads each
+crop as one line of text in a single batch.
+
+Export the ONNX recognizer once with:
+
+    python ocr_backend.py export
+"""
+import json
+import math
+import os
+import sys
+
+DETECTION_DIR = os.path.dirname(os.path.abspath(__file__))
+ONNX_MODEL_PATH = os.getenv("OCR_ONNX_MODEL", os.path.join(DETECTION_DIR, "models", "recognizer_int8.onnx"))
+OCR_SERVICE_URL = os.getenv("OCR_SERVICE_URL", "http://127.0.0.1:8765")
+SERVICE_TIMEOUT_SECONDS = 5
+# Written by testing.py; read by the "auto" backend
+PROBE_PATH = os.path.join(DETECTION_DIR, "ocr_probe.json")
+
+BACKENDS = ("easyocr-gpu", "easyocr-cpu", "onnx", "service")
+# The recognizer was trained on 64 px high text lines
+RECOGNIZER_HEIGHT = 64
+RECOGNIZER_MAX_WIDTH = 512
+
+
+class EasyOcrBackend:
+    detects_text = True
+
+    def __init__(self, gpu: bool, threads: int = None):
+        import easyocr
+        if threads:
+            try:
+                import torch
+                torch.set_num_threads(threads)
+                torch.set_num_interop_threads(1)
+            except (ImportError, RuntimeError):
+                pass  # interop threads can only be set before the first parallel op
+        self.name = "easyocr-gpu" if gpu else "easyocr-cpu"
+        self.reader = easyocr.Reader(['en'], gpu=gpu)
+
+    def readtext(self, image):
+        return self.reader.readtext(image)
+
+    def recognize(self, crops):
+        """
+        Recognizer only, one batch: the crops are stacked into one grey
+        canvas and each is passed to EasyOCR as its own text box.
+        """
+        import cv2
+        import numpy as np
+
+        if not crops:
+            return []
+        greys = [cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop for crop in crops]
+        canvas = np.zeros((sum(grey.shape[0] for grey in greys), max(grey.shape[1] for grey in greys)), np.uint8)
+        boxes, tops = [], {}
+        top = 0
+        for index, grey in enumerate(greys):
+            height, width = grey.shape
+            canvas[top:top + height, :width] = grey
+            boxes.append([0, width, top, top + height])
+            tops[top] = index
+            top += height
+
+        results = [[] for _ in crops]
+        reads = self.reader.recognize(canvas, horizontal_list=boxes, free_list=[], batch_size=len(crops))
+        for points, text, prob in reads:
+            top = int(points[0][1])
+            if text and top in tops:
+                results[tops[top]].append(([[x, y - top] for x, y in points], text, prob))
+        return results
+
+
+class OnnxRecognizerBackend:
+    """
+    Runs only the recognition half of EasyOCR. There is no text detector,
+    so each image passed in is read as a single line of text; plate_roi
+    supplies those crops.
+    """
+    detects_text = False
+
+    def __init__(self, model_path: str = ONNX_MODEL_PATH, threads: int = None):
+        import onnxruntime
+
+        with open(_characters_path(model_path)) as characters_file:
+            # Index 0 is the CTC blank
+            self.characters = ["[blank]"] + list(json.load(characters_file)["characters"])
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.name = "onnx"
+
+    def _preprocess(self, image):
+        import cv2
+        import numpy as np
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        height, width = gray.shape[:2]
+        new_width = min(RECOGNIZER_MAX_WIDTH, max(1, math.ceil(RECOGNIZER_HEIGHT * width / max(height, 1))))
+        resized = cv2.resize(gray, (new_width, RECOGNIZER_HEIGHT), interpolation=cv2.INTER_CUBIC)
+        return (resized.astype(np.float32) / 255.0 - 0.5) / 0.5
+
+    def _batch(self, images):
+        """(N, 1, H, W) tensor; narrower lines are padded with their last column, as EasyOCR does."""
+        import numpy as np
+
+        lines = [self._preprocess(image) for image in images]
+        width = max(line.shape[1] for line in lines)
+        batch = np.empty((len(lines), 1, RECOGNIZER_HEIGHT, width), np.float32)
+        for index, line in enumerate(lines):
+            batch[index, 0, :, :line.shape[1]] = line
+            batch[index, 0, :, line.shape[1]:] = line[:, -1:]
+        return batch
+
+    def _decode(self, logits):
+        import numpy as np
+
+        # Greedy CTC: best class per step, collapse repeats, drop blanks
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probs = exp / exp.sum(axis=-1, keepdims=True)
+        best = probs.argmax(axis=-1)
+        best_probs = probs.max(axis=-1)
+
+        text, kept = [], []
+        previous = 0
+        for index, prob in zip(best, best_probs):
+            if index != 0 and index != previous:
+                text.append(self.characters[index])
+                kept.append(prob)
+            previous = index
+        if not kept:
+            return "", 0.0
+        # EasyOCR's confidence: product of step maxima, softened for long strings
+        confidence = float(np.prod(kept) ** (2.0 / math.sqrt(len(kept))))
+        return "".join(text), confidence
+
+    def readtext(self, image):
+        return self.recognize([image])[0]
+
+    def recognize(self, crops):
+        if not crops:
+            return []
+        logits = self.session.run(None, {self.input_name: self._batch(crops)})[0]
+        results = []
+        for crop, line_logits in zip(crops, logits):
+            height, width = crop.shape[:2]
+            text, confidence = self._decode(line_logits)
+            results.append([([[0, 0], [width, 0], [width, height], [0, height]], text, confidence)] if text else [])
+        return results
+
+
+class ServiceBackend:
+    """Thin client for ocr_service.py; crops are sent raw, shapes in a header."""
+    detects_text = False
+
+    def __init__(self, url: str = OCR_SERVICE_URL):
+        import requests
+
+        self.url = url.rstrip("/") + "/recognize"
+        self.session = requests.Session()
+        self.name = "service"
+
+    def readtext(self, image):
+        return self.recognize([image])[0]
+
+    def recognize(self, crops):
+        import numpy as np
+
+        if not crops:
+            return []
+        crops = [np.ascontiguousarray(crop, np.uint8) for crop in crops]
+        res = self.session.post(
+            self.url,
+            data=b"".join(crop.tobytes() for crop in crops),
+            headers={"Content-Type": "application/octet-stream", "X-Shapes": encode_shapes(crops)},
+            timeout=SERVICE_TIMEOUT_SECONDS,
+        )
+        res.raise_for_status()
+        return [[(points, text, prob) for points, text, prob in reads] for reads in res.json()["results"]]
+
+
+def encode_shapes(crops) -> str:
+    return ";".join(",".join(str(size) for size in crop.shape) for crop in crops)
+
+
+def decode_crops(body: bytes, shapes: str):
+    """Inverse of the ServiceBackend request body: views into body, one per shape."""
+    import numpy as np
+
+    crops, offset = [], 0
+    for shape in shapes.split(";"):
+        dims = tuple(int(size) for size in shape.split(","))
+        size = int(np.prod(dims))
+        if offset + size > len(body):
+            raise ValueError("Request body is shorter than X-Shapes")
+        crops.append(np.frombuffer(body, np.uint8, size, offset).reshape(dims))
+        offset += size
+    if offset != len(body):
+        raise ValueError("Request body is longer than X-Shapes")
+    return crops
+
+
+def _characters_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".json"
+
+
+def available_backends() -> list:
+    """Backends whose dependencies (and model files) are present on this host."""
+    available = []
+    try:
+        import easyocr  # noqa: F401
+        import torch
+        if torch.cuda.is_available():
+            available.append("easyocr-gpu")
+        available.append("easyocr-cpu")
+    except ImportError:
+        pass
+    try:
+        import onnxruntime  # noqa: F401
+        if os.path.exists(ONNX_MODEL_PATH) and os.path.exists(_characters_path(ONNX_MODEL_PATH)):
+            available.append("onnx")
+    except ImportError:
+        pass
+    return available
+
+
+def resolve(name: str = "auto") -> str:
+    if name != "auto":
+        return name
+    available = available_backends()
+    if os.path.exists(PROBE_PATH):
+        with open(PROBE_PATH) as probe_file:
+            fastest = json.load(probe_file).get("fastest")
+        if fastest in available:
+            return fastest
+    if not available:
+        raise RuntimeError("No OCR backend available; install easyocr or export the ONNX recognizer")
+    return available[0]
+
+
+def create_backend(name: str = "auto", threads: int = None):
+    name = resolve(name)
+    if name == "easyocr-gpu":
+        return EasyOcrBackend(gpu=True, threads=threads)
+    if name == "easyocr-cpu":
+        return EasyOcrBackend(gpu=False, threads=threads)
+    if name == "onnx":
+        return OnnxRecognizerBackend(threads=threads)
+    if name == "service":
+        return ServiceBackend()
+    raise ValueError(f"Unknown OCR backend {name}; choose one of {', '.join(BACKENDS)} or auto")
+
+
+def export_onnx(model_path: str = ONNX_MODEL_PATH, quantize: bool = True):
+    """Export EasyOCR's English recognizer to ONNX and quantize its weights to int8."""
+    import easyocr
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    reader = easyocr.Reader(['en'], gpu=False)
+    recognizer = getattr(reader.recognizer, "module", reader.recognizer).eval()
+
+    class RecognizerOnly(torch.nn.Module):
+        # The CTC recognizer ignores its text argument
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    float_path = os.path.splitext(model_path)[0] + "_fp32.onnx"
+    torch.onnx.export(
+        RecognizerOnly(recognizer),
+        torch.zeros(1, 1, RECOGNIZER_HEIGHT, 256),
+        float_path,
+        input_names=["image"],
+        output_names=["logits"],
+        dynamic_axes={"image": {0: "batch", 3: "width"}, "logits": {0: "batch", 1: "steps"}},
+        opset_version=17,
+    )
+    if quantize:
+        quantize_dynamic(float_path, model_path, weight_type=QuantType.QInt8)
+    else:
+        os.replace(float_path, model_path)
+
+    with open(_characters_path(model_path), "w") as characters_file:
+        json.dump({"characters": reader.character}, characters_file)
+    print(f"[INFO] Exported recognizer to {model_path}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["export"]:
+        export_onnx()
+    else:
+        print(__doc__)
@@ -0,0 +1,216 @@
+"""
+Local plate-recognition service.
+
+Loads one OCR model and serves every camera on the host. Crops that arrive
+from different cameras within MAX_WAIT_MS are recognized together in one
+batch of up to MAX_BATCH, so throughput grows with batch size instead of
+with the number of loaded models.
+
+    python ocr_service.py --backend onnx --max-batch 16 --max-wait-ms 8
+
+Cameras then run with OCR_BACKEND=service (and OCR_SERVICE_URL if the
+service is not on the default port).
+
+    POST /recognize   raw uint8 crops back to back, "X-Shapes: h,w,c;h,w,c"
+                      -> {"results": [[[points, text, prob], ...], ...]}
+    GET  /stats       batch sizes and latency
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from ocr_backend import create_backend, decode_crops
+from pipeline import StageMeter
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+# Largest batch handed to the recognizer at once
+MAX_BATCH = 16
+# How long the first crop of a batch waits for others to join it
+MAX_WAIT_MS = 8
+# Requests beyond this are refused instead of queueing unbounded latency
+MAX_PENDING = 256
+REQUEST_TIMEOUT_SECONDS = 5
+
+
+class Request:
+    def __init__(self, crops):
+        self.crops = crops
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+        self.received = time.monotonic()
+
+
+class MicroBatcher(threading.Thread):
+    """Collects crops from concurrent requests and recognizes them in batches."""
+
+    def __init__(self, backend, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        super().__init__(name="batcher", daemon=True)
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.pending = queue.Queue(MAX_PENDING)
+        self.latency = StageMeter("request")
+        self.batch_sizes = {}
+        self.batches = 0
+        self.crops = 0
+        self._lock = threading.Lock()
+
+    def submit(self, crops, timeout: float = REQUEST_TIMEOUT_SECONDS):
+        request = Request(crops)
+        try:
+            self.pending.put_nowait(request)
+        except queue.Full:
+            self.latency.drop()
+            raise RuntimeError("Recognition queue is full")
+        if not request.done.wait(timeout):
+            raise TimeoutError("Recognition timed out")
+        if request.error:
+            raise request.error
+        self.latency.record(time.monotonic() - request.received)
+        return request.results
+
+    def _collect(self):
+        """Block for one request, then take more until the batch is full or the wait is over."""
+        batch = [self.pending.get()]
+        size = len(batch[0].crops)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.crops)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self._collect()
+            crops = [crop for request in batch for crop in request.crops]
+            try:
+                results = []
+                for start in range(0, len(crops), self.max_batch):
+                    chunk = crops[start:start + self.max_batch]
+                    results.extend(self.backend.recognize(chunk))
+                    self._count(len(chunk))
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+
+            offset = 0
+            for request in batch:
+                request.results = results[offset:offset + len(request.crops)]
+                offset += len(request.crops)
+                request.done.set()
+
+    def _count(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self.crops += size
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend.name,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "crops": self.crops,
+                "mean_batch": round(self.crops / self.batches, 2) if self.batches else None,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "pending": self.pending.qsize(),
+                "requests": self.latency.summary(),
+            }
+
+
+def make_handler(batcher: MicroBatcher):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/stats":
+                self._reply(200, batcher.stats())
+            else:
+                self._reply(404, {"detail": "Not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/recognize":
+                self._reply(404, {"detail": "Not found"})
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                crops = decode_crops(body, self.headers.get("X-Shapes", ""))
+            except ValueError as e:
+                self._reply(400, {"detail": str(e)})
+                return
+            try:
+                results = batcher.submit(crops)
+            except RuntimeError as e:
+                self._reply(503, {"detail": str(e)})
+                return
+            except TimeoutError as e:
+                self._reply(504, {"detail": str(e)})
+                return
+            except Exception as e:
+                self._reply(500, {"detail": str(e)})
+                return
+            self._reply(200, {"results": [
+                [[[[float(x), float(y)] for x, y in points], text, float(prob)] for points, text, prob in reads]
+                for reads in results
+            ]})
+
+        def log_message(self, format, *args):
+            pass  # one line per crop would drown the stats
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve batched plate recognition to local cameras.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--backend", default="auto", help="easyocr-gpu, easyocr-cpu, onnx or auto")
+    parser.add_argument("--threads", type=int, help="inference threads")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    if args.backend == "service":
+        parser.error("the service needs a local backend")
+    backend = create_backend(args.backend, args.threads)
+    batcher = MicroBatcher(backend, args.max_batch, args.max_wait_ms)
+    batcher.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    server.daemon_threads = True
+    print(f"[INFO] OCR service ({backend.name}) listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[INFO] {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+import requests
+from ocr_backend import create_backend
+from plate_roi import propose_rois, crops
+from plate_spool import PlateSpool, SPOOL_PATH
+
+# One OCR process per two cores leaves room for capture, display and torch's own threads
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# Small queues: a stale frame is worth less than a fresh one
+OCR_QUEUE_SIZE = 2
+RESULT_QUEUE_SIZE = 16
+# Pause after a failed OCR job so an unreachable OCR service is not hammered
+OCR_ERROR_BACKOFF_MIN_SECONDS = 0.5
+OCR_ERROR_BACKOFF_MAX_SECONDS = 10
+SEND_QUEUE_SIZE = 32
+# Strict per-request limits; an unreachable backend fails fast into the spool
+SEND_CONNECT_TIMEOUT_SECONDS = 1
+SEND_TIMEOUT_SECONDS = 5
+SEND_RETRY_MIN_SECONDS = 0.5
+SEND_RETRY_MAX_SECONDS = 30
+# Backoff between attempts to reopen a lost camera stream
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+
+def put_drop_oldest(q, item) -> bool:
+    """Put without blocking, evicting the oldest entries when full. True if any were dropped."""
+    dropped = False
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped = True
+            except queue.Empty:
+                pass
+
+
+class StageMeter:
+    """Throughput, drops and recent latencies of one pipeline stage."""
+
+    def __init__(self, name: str, window: int = 256):
+        self.name = name
+        self.count = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=window)
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, latency: float = None):
+        with self._lock:
+            self.count += 1
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            latencies = sorted(self.latencies)
+        summary = {"stage": self.name, "count": self.count, "per_second": round(self.count / elapsed, 2), "dropped": self.dropped}
+        if latencies:
+            summary["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+            summary["p95_ms"] = round(latencies[int(len(latencies) * 0.95)] * 1000, 1)
+        return summary
+
+
+class LatestFrame:
+    """Single-slot mailbox: the capture thread overwrites, readers always get the newest frame."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.captured_at = None
+        self.closed = False
+
+    def put(self, frame):
+        with self._condition:
+            self.frame = frame
+            self.seq += 1
+            self.captured_at = time.monotonic()
+            self._condition.notify_all()
+
+    def get(self, after_seq: int, timeout: float = 1.0):
+        """(seq, captured_at, frame) newer than after_seq, or None on timeout or close."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.seq > after_seq or self.closed, timeout)
+            if self.seq <= after_seq:
+                return None
+            return self.seq, self.captured_at, self.frame
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class CaptureThread(threading.Thread):
+    """Reads the camera as fast as it delivers so its buffer never backs up."""
+
+    def __init__(self, cap, frames: LatestFrame):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.frames = frames
+        self.meter = StageMeter("capture")
+        self._stopping = threading.Event()
+
+    def run(self):
+        while not self._stopping.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.frames.put(frame)
+            self.meter.record()
+        self.frames.close()
+
+    def stop(self):
+        self._stopping.set()
+
+
+class StreamCapture(threading.Thread):
+    """
+    Capture for one configured source (device index, file or RTSP URL) that
+    reopens the source with backoff when it fails, keeping only the newest
+    frame. Files are paced to their own frame rate and end the stream
+    unless loop is set.
+    """
+
+    def __init__(self, name: str, source, frames: LatestFrame, loop: bool = False):
+        super().__init__(name=f"capture-{name}", daemon=True)
+        self.source = int(source) if str(source).isdigit() else source
+        self.frames = frames
+        self.loop = loop
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.meter = StageMeter(f"capture-{name}")
+        self.connected = False
+        self.reconnects = 0
+        self._stopping = threading.Event()
+
+    def _open(self):
+        import cv2
+        cap = cv2.VideoCapture(self.source)
+        if cap.isOpened():
+            # Network and device buffers hold stale frames; keep just one
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            return cap
+        cap.release()
+        return None
+
+    def run(self):
+        import cv2
+        backoff = RECONNECT_MIN_SECONDS
+        while not self._stopping.is_set():
+            cap = self._open()
+            if cap is None:
+                print(f"[WARN] {self.name}: cannot open {self.source}; retrying in {backoff:.0f}s")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+                continue
+
+            self.connected = True
+            backoff = RECONNECT_MIN_SECONDS
+            frame_interval = 1 / (cap.get(cv2.CAP_PROP_FPS) or 30) if self.is_file else 0
+            next_frame = time.monotonic()
+            while not self._stopping.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames.put(frame)
+                self.meter.record()
+                if frame_interval:
+                    next_frame += frame_interval
+                    self._stopping.wait(max(0.0, next_frame - time.monotonic()))
+            cap.release()
+            self.connected = False
+
+            if self.is_file and not self.loop:
+                break
+            if not self._stopping.is_set() and not self.is_file:
+                self.reconnects += 1
+                print(f"[WARN] {self.name}: stream lost; reconnecting")
+        self.frames.close()
+
+    def stop(self):
+        self._stopping.set()
+
+
+def read_plates(reader, frame, use_roi: bool = True, fallback_full_frame: bool = True):
+    """
+    OCR only the candidate plate regions; the whole frame is read when
+    localization finds nothing and fallback_full_frame is set. Returns
+    (box, text, prob) with boxes as (x0, y0, x1, y1) in frame coordinates.
+    """
+    height, width = frame.shape[:2]
+    # Recognizer-only backends cannot find text in a whole frame
+    use_roi = use_roi or not reader.detects_text
+    fallback_full_frame = fallback_full_frame and reader.detects_text
+    rois = propose_rois(frame) if use_roi else []
+    if not rois and (fallback_full_frame or not use_roi):
+        rois = [(0, 0, width, height)]
+
+    regions = crops(frame, rois)
+    # Recognizer-only backends read every crop in one batch
+    reads = reader.recognize(regions) if not reader.detects_text else [reader.readtext(region) for region in regions]
+
+    detections = []
+    for (x, y, _, _), region_reads in zip(rois, reads):
+        for (points, text, prob) in region_reads:
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            box = (x + min(xs), y + min(ys), x + max(xs), y + max(ys))
+            detections.append((tuple(float(v) for v in box), text, float(prob)))
+    return detections
+
+
+def ring_slots(workers: int = OCR_WORKERS) -> int:
+    """Enough frame slots that a write always finds one no worker holds or has queued."""
+    return OCR_QUEUE_SIZE + workers + 1
+
+
+def ocr_worker(jobs, results, ring, backend: str, threads: int, use_roi: bool = True):
+    """
+    Worker process body: load one OCR backend, then OCR jobs until a None
+    arrives. Jobs are (seq, captured_at, slot); the frame is read in place
+    from the shared ring.
+    """
+    reader = create_backend(backend, threads)
+    backoff = OCR_ERROR_BACKOFF_MIN_SECONDS
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        seq, captured_at, slot = job
+        started = time.monotonic()
+        detections = []
+        failed = False
+        frame = ring.claim(slot, seq)
+        if frame is not None:
+            try:
+                detections = read_plates(reader, frame, use_roi)
+            except Exception as e:
+                # e.g. the OCR service is restarting, full (503) or slow (504)
+                print(f"[ERROR] OCR job {seq} failed: {e}")
+                failed = True
+            finally:
+                ring.release(slot)
+        # Every job gets a result, even an empty one, so callers can release its
+        # slot; a dropped result would leave that slot held for good
+        results.put((seq, captured_at, started, time.monotonic(), detections))
+        if failed:
+            time.sleep(backoff)
+            backoff = min(backoff * 2, OCR_ERROR_BACKOFF_MAX_SECONDS)
+        else:
+            backoff = OCR_ERROR_BACKOFF_MIN_SECONDS
+    ring.close()
+
+
+def start_ocr_workers(context, jobs, results, ring, workers: int = OCR_WORKERS, backend: str = "auto", use_roi: bool = True):
+    # Inference threads are split so the workers do not oversubscribe the cores
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    processes = []
+    for index in range(workers):
+        process = context.Process(target=ocr_worker, args=(jobs, results, ring, backend, threads, use_roi),
+                                  name=f"ocr-{index}", daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_ocr_workers(jobs, processes, timeout: float = 5.0):
+    # Pending jobs are discarded so there is room for one sentinel per worker;
+    # a blocking put never evicts a sentinel already queued for another worker
+    while True:
+        try:
+            jobs.get_nowait()
+        except queue.Empty:
+            break
+    for _ in processes:
+        try:
+            jobs.put(None, timeout=timeout)
+        except queue.Full:
+            break
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+
+
+class Sender(threading.Thread):
+    """
+    Posts confirmed plates off the detection thread, in order. submit() only
+    enqueues; every plate is written to the spool before it is sent and
+    leaves it once the backend accepts it, so a slow or unreachable backend
+    delays delivery but never blocks detection or loses a plate.
+    """
+
+    def __init__(self, url: str, spool_path: str = SPOOL_PATH):
+        super().__init__(name="sender", daemon=True)
+        self.url = url
+        self.queue = queue.Queue(SEND_QUEUE_SIZE)
+        self.spool = PlateSpool(spool_path)
+        self.meter = StageMeter("send")
+        self.end_to_end = StageMeter("end-to-end")
+        self.retries = 0
+        self.rejected = 0
+
+    def submit(self, plate: str, captured_at: float, gate_id: str = None):
+        # Wall-clock capture time survives a restart; monotonic time does not
+        captured_wall = time.time() - (time.monotonic() - captured_at)
+        if put_drop_oldest(self.queue, (plate, captured_wall, gate_id)):
+            self.meter.drop()
+
+    def _post(self, session, record: dict) -> bool:
+        """True once the backend has the record (or refused it for good), False to retry."""
+        payload = {"plate": record["plate"], "captured_at": record["captured_at"]}
+        if record.get("gate_id"):
+            payload["gate_id"] = record["gate_id"]
+        started = time.monotonic()
+        try:
+            res = session.post(self.url, json=payload, timeout=(SEND_CONNECT_TIMEOUT_SECONDS, SEND_TIMEOUT_SECONDS))
+        except requests.RequestException as e:
+            print(f"[ERROR] Failed to send {record['plate']} to backend: {e}")
+            return False
+        self.meter.record(time.monotonic() - started)
+        if res.status_code >= 500:
+            print(f"[ERROR] Backend returned {res.status_code} for {record['plate']}")
+            return False
+        if res.status_code >= 400:
+            # Resending a request the backend refuses would block every plate behind it
+            self.rejected += 1
+            print(f"[ERROR] Backend rejected {record['plate']}: {res.status_code} {res.text}")
+        else:
+            print(f"[BACKEND RESPONSE] {res.text}")
+        self.end_to_end.record(time.time() - record["captured_wall"])
+        return True
+
+    def run(self):
+        session = requests.Session()
+        retry_at = 0.0
+        delay = SEND_RETRY_MIN_SECONDS
+        stopping = False
+        if self.spool.pending:
+            print(f"[INFO] Replaying {self.spool.pending} spooled plates")
+
+        while True:
+            if stopping and not self.spool.pending:
+                break
+            # Spool whatever was submitted; wait only when nothing is due to send
+            if not self.spool.pending:
+                wait = None
+            else:
+                # On shutdown the backoff is skipped: one last attempt, then the spool keeps the rest
+                wait = 0.0 if stopping else max(0.0, retry_at - time.monotonic())
+            try:
+                item = self.queue.get(timeout=wait)
+            except queue.Empty:
+                item = False
+            if item is None:
+                stopping = True
+                continue
+            if item:
+                plate, captured_wall, gate_id = item
+                self.spool.append({
+                    "plate": plate,
+                    "gate_id": gate_id,
+                    "captured_wall": captured_wall,
+                    "captured_at": datetime.fromtimestamp(captured_wall, timezone.utc).isoformat(),
+                })
+                continue
+
+            record, next_offset = self.spool.peek()
+            if record is None:
+                continue
+            if self._post(session, record):
+                self.spool.advance(next_offset)
+                delay = SEND_RETRY_MIN_SECONDS
+            else:
+                if stopping:
+                    print(f"[INFO] {self.spool.pending} plates left in the spool for the next run")
+                    break
+                self.retries += 1
+                retry_at = time.monotonic() + delay
+                delay = min(delay * 2, SEND_RETRY_MAX_SECONDS)
+        self.spool.close()
+
+    def stop(self, timeout: float = SEND_TIMEOUT_SECONDS):
+        # Queued plates are spooled, and sent if the backend answers in time
+        self.queue.put(None)
+        self.join(timeout)
@@ -0,0 +1,69 @@
+import cv2
+
+# Aspect of the character band (not the plate outline): two-line plates
+# sit near 2:1, a single line of 7-8 characters reaches about 9:1
+MIN_ASPECT = 1.8
+MAX_ASPECT = 9.0
+# Candidate area as a fraction of the frame
+MIN_AREA_RATIO = 0.002
+MAX_AREA_RATIO = 0.15
+# Localization runs on a copy this wide; boxes are scaled back up
+LOCATE_WIDTH = 640
+# Crops are padded so characters at the edge survive
+PAD_RATIO = 0.12
+MAX_ROIS = 3
+
+
+def propose_rois(frame, max_rois: int = MAX_ROIS):
+    """
+    Candidate plate boxes (x, y, w, h) in frame coordinates, best first.
+    Plates are dense clusters of vertical strokes on a plain background,
+    so a horizontal closing over Sobel-x edges turns each into a blob.
+    """
+    height, width = frame.shape[:2]
+    scale = LOCATE_WIDTH / width if width > LOCATE_WIDTH else 1.0
+    small = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale != 1.0 else frame
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    # Black-hat lifts dark characters off a light plate (and the reverse for
+    # light-on-dark via the top-hat), flattening uneven lighting
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (17, 5))
+    strokes = cv2.max(cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel),
+                      cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, kernel))
+    edges = cv2.convertScaleAbs(cv2.Sobel(strokes, cv2.CV_16S, 1, 0, ksize=3))
+    edges = cv2.GaussianBlur(edges, (5, 5), 0)
+    _, mask = cv2.threshold(edges, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (21, 5)))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (5, 3)))
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    frame_area = mask.shape[0] * mask.shape[1]
+    candidates = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area_ratio = (w * h) / frame_area
+        if not MIN_ASPECT <= w / max(h, 1) <= MAX_ASPECT:
+            continue
+        if not MIN_AREA_RATIO <= area_ratio <= MAX_AREA_RATIO:
+            continue
+        # Plates fill their box; stray text lines and edges of objects do not
+        fill = cv2.countNonZero(mask[y:y + h, x:x + w]) / (w * h)
+        if fill < 0.45:
+            continue
+        density = cv2.mean(edges[y:y + h, x:x + w])[0]
+        candidates.append((density * fill, (x, y, w, h)))
+
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    rois = []
+    for _, (x, y, w, h) in candidates[:max_rois]:
+        pad_x, pad_y = int(w * PAD_RATIO), int(h * PAD_RATIO * 2)
+        x0 = max(0, int((x - pad_x) / scale))
+        y0 = max(0, int((y - pad_y) / scale))
+        x1 = min(width, int((x + w + pad_x) / scale))
+        y1 = min(height, int((y + h + pad_y) / scale))
+        rois.append((x0, y0, x1 - x0, y1 - y0))
+    return rois
+
+
+def crops(frame, rois):
+    return [frame[y:y + h, x:x + w] for (x, y, w, h) in rois]
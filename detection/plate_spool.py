@@ -0,0 +1,92 @@
+import json
+import os
+
+DETECTION_DIR = os.path.dirname(os.path.abspath(__file__))
+SPOOL_PATH = os.getenv("PLATE_SPOOL", os.path.join(DETECTION_DIR, "plate_spool.jsonl"))
+
+
+class PlateSpool:
+    """
+    Append-only JSON-lines file of plates not yet accepted by the backend.
+    Records are read back in the order written; the position of the first
+    unsent record lives in a sidecar .offset file, so a restart resumes
+    where the last run stopped. Once everything is sent the file is
+    truncated, so it only grows while the backend is unreachable.
+    """
+
+    def __init__(self, path: str = SPOOL_PATH):
+        self.path = path
+        self.offset_path = path + ".offset"
+        # Append mode: writes always land at the end, reads can seek anywhere
+        self.file = open(path, "ab+")
+        self._drop_torn_tail()
+        self.offset = self._load_offset()
+        self.pending = self._count_pending()
+
+    def _drop_torn_tail(self):
+        """Cut a last line left without its newline by a crash, so the next append starts clean."""
+        size = os.path.getsize(self.path)
+        if not size:
+            return
+        self.file.seek(size - 1)
+        if self.file.read(1) == b"\n":
+            return
+        # Walk back in blocks to the last complete line
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            self.file.seek(start)
+            newline = self.file.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        print(f"[WARN] Dropping {size - end} bytes of a partly written spool record")
+        self.file.truncate(end)
+
+    def _load_offset(self) -> int:
+        try:
+            with open(self.offset_path) as offset_file:
+                offset = int(offset_file.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+        return min(offset, os.path.getsize(self.path))
+
+    def _count_pending(self) -> int:
+        self.file.seek(self.offset)
+        return sum(1 for line in self.file if line.endswith(b"\n"))
+
+    def append(self, record: dict):
+        self.file.write(json.dumps(record).encode() + b"\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending += 1
+
+    def peek(self):
+        """(record, next_offset) for the oldest unsent record, or (None, offset) if there is none."""
+        while True:
+            self.file.seek(self.offset)
+            line = self.file.readline()
+            if not line.endswith(b"\n"):
+                self.pending = 0
+                return None, self.offset
+            try:
+                return json.loads(line), self.offset + len(line)
+            except ValueError:
+                print(f"[WARN] Skipping unreadable spool record at byte {self.offset}")
+                self.advance(self.offset + len(line))
+
+    def advance(self, next_offset: int):
+        """Mark everything before next_offset as sent."""
+        self.offset = next_offset
+        self.pending = max(0, self.pending - 1)
+        if self.pending == 0 and self.offset >= os.path.getsize(self.path):
+            self.file.truncate(0)
+            self.offset = 0
+        temp_path = self.offset_path + ".tmp"
+        with open(temp_path, "w") as offset_file:
+            offset_file.write(str(self.offset))
+        os.replace(temp_path, self.offset_path)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,123 @@
+from collections import Counter, defaultdict
+
+# Boxes overlapping at least this much belong to the same plate
+IOU_THRESHOLD = 0.3
+# Reads of the leading length needed before a plate can be emitted
+MIN_READS = 2
+# Summed confidence each character position needs
+CONFIRM_SCORE = 1.2
+# Share of a position's votes the winning character must hold
+CONFIRM_MARGIN = 0.6
+# A track with no new read for this long is dropped
+TRACK_TTL_SECONDS = 1.5
+# An emitted plate is not sent again for this long
+SUPPRESS_SECONDS = 60
+# Reads below this confidence are too noisy to vote
+MIN_READ_PROB = 0.2
+
+
+def normalize(text: str) -> str:
+    return "".join(ch for ch in text.upper() if ch.isalnum() or ch == "-")
+
+
+def similarity(a: str, b: str) -> float:
+    """Share of matching positions; plates of different lengths do not match."""
+    if len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def iou(a, b) -> float:
+    """Intersection over union of two (x0, y0, x1, y1) boxes."""
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    def __init__(self, box, now: float):
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+        self.reads = []          # (plate, prob)
+        self.emitted = None      # plate sent for this track
+
+    def add(self, box, plate: str, prob: float, now: float):
+        self.box = box
+        self.last_seen = now
+        self.reads.append((plate, prob))
+
+    def consensus(self):
+        """(plate, confidence) from per-character votes, or (None, 0) if undecided."""
+        lengths = Counter()
+        for plate, prob in self.reads:
+            lengths[len(plate)] += prob
+        length = lengths.most_common(1)[0][0]
+        votes = [plate_prob for plate_prob in self.reads if len(plate_prob[0]) == length]
+        if len(votes) < MIN_READS:
+            return None, 0.0
+
+        positions = [defaultdict(float) for _ in range(length)]
+        for plate, prob in votes:
+            for index, ch in enumerate(plate):
+                positions[index][ch] += prob
+
+        plate, confidence = [], 1.0
+        for scores in positions:
+            ch, score = max(scores.items(), key=lambda item: item[1])
+            share = score / sum(scores.values())
+            if score < CONFIRM_SCORE or share < CONFIRM_MARGIN:
+                return None, 0.0
+            plate.append(ch)
+            confidence = min(confidence, share)
+        return "".join(plate), confidence
+
+
+class PlateTracker:
+    """
+    Associates plate reads across frames by box overlap and emits a plate
+    once its per-character votes agree, instead of sleeping and re-reading.
+    """
+
+    def __init__(self):
+        self.tracks = []
+        self.suppressed = {}     # plate -> time it may be sent again
+
+    def update(self, detections, now: float):
+        """
+        Feed the (box, text, prob) reads of one frame taken at `now`;
+        returns [(plate, confidence, first_seen)] that just confirmed.
+        """
+        self.tracks = [track for track in self.tracks if now - track.last_seen <= TRACK_TTL_SECONDS]
+        self.suppressed = {plate: until for plate, until in self.suppressed.items() if until > now}
+
+        confirmed = []
+        for box, text, prob in detections:
+            plate = normalize(text)
+            if not 5 <= len(plate) <= 10 or prob < MIN_READ_PROB:
+                continue
+
+            track = max(self.tracks, key=lambda candidate: iou(candidate.box, box), default=None)
+            matched = track is not None and iou(track.box, box) >= IOU_THRESHOLD
+            if matched and track.emitted and similarity(track.emitted, plate) < 0.5:
+                # A different plate in the same spot is the next car, not more votes
+                self.tracks.remove(track)
+                matched = False
+            if not matched:
+                track = Track(box, now)
+                self.tracks.append(track)
+            track.add(box, plate, prob, now)
+
+            if track.emitted:
+                continue
+            consensus, confidence = track.consensus()
+            if consensus is None:
+                continue
+            track.emitted = consensus
+            if consensus in self.suppressed:
+                continue
+            self.suppressed[consensus] = now + SUPPRESS_SECONDS
+            confirmed.append((consensus, confidence, track.first_seen))
+        return confirmed
@@ -0,0 +1,81 @@
+"""
+Synthetic camera footage for the detector benchmarks, for hosts without
+recorded clips: a driveway where a car enters, parks and leaves under
+sensor noise and slow lighting drift, and single frames with a plate
+among distracting text. Real footage goes through benchmark.py instead.
+"""
+import random
+import cv2
+import numpy as np
+
+FRAME_SHAPE = (720, 1280, 3)
+FPS = 30
+# Seconds per phase of one car visit
+PHASES = (("empty", 15), ("enter", 1), ("parked", 3), ("leave", 1))
+PLATE_LETTERS = "ABCDEFGHKLMNPRSTUVWXYZ"
+
+
+def driveway(visits: int = 3, seed: int = 0):
+    """(phase, frame) for `visits` car visits to an otherwise empty driveway."""
+    rng = np.random.default_rng(seed)
+    height, width = FRAME_SHAPE[:2]
+    background = cv2.GaussianBlur(rng.integers(0, 255, FRAME_SHAPE, dtype=np.uint8), (31, 31), 0)
+    car = np.zeros((260, 420, 3), np.uint8)
+    car[:] = (40, 40, 160)
+    cv2.rectangle(car, (130, 180), (290, 230), (240, 240, 240), -1)
+
+    frame_index = 0
+    for _ in range(visits):
+        for phase, seconds in PHASES:
+            count = int(seconds * FPS)
+            for index in range(count):
+                frame = background.copy()
+                light = int(8 * np.sin(frame_index / 300))
+                if light > 0:
+                    frame = cv2.add(frame, np.full_like(frame, light))
+                if phase != "empty":
+                    x = {"enter": int(-420 + index / count * 850), "parked": 430,
+                         "leave": int(430 + index / count * 900)}[phase]
+                    x0, x1 = max(x, 0), min(x + 420, width)
+                    if x1 > x0:
+                        frame[300:560, x0:x1] = car[:, x0 - x:x1 - x]
+                noise = rng.integers(-6, 7, FRAME_SHAPE, dtype=np.int16)
+                frame_index += 1
+                yield phase, np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def plate_frame(rng: random.Random):
+    """
+    A frame with one car and its plate, plus a sign and noise.
+    Returns (frame, plate_text, plate_box) with the box as (x, y, w, h).
+    """
+    noise = np.random.default_rng(rng.randrange(1 << 30))
+    height, width = FRAME_SHAPE[:2]
+    frame = cv2.GaussianBlur(noise.integers(30, 200, FRAME_SHAPE, dtype=np.uint8), (41, 41), 0)
+
+    cx, cy = rng.randint(300, 900), rng.randint(250, 450)
+    car_color = tuple(int(value) for value in noise.integers(20, 200, 3))
+    cv2.rectangle(frame, (cx - 250, cy - 180), (cx + 250, cy + 170), car_color, -1)
+
+    text = "".join(rng.choice(PLATE_LETTERS) for _ in range(3)) + "-" + "".join(rng.choice("0123456789") for _ in range(4))
+    light = rng.random() < 0.8
+    plate_width = rng.randint(150, 260)
+    (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+    scale = plate_width * 0.88 / text_width
+    text_width, text_height = int(text_width * scale), int(text_height * scale)
+    plate_height = int(text_height * 1.9)
+    px, py = cx - plate_width // 2, cy + 60
+    cv2.rectangle(frame, (px, py), (px + plate_width, py + plate_height),
+                  (235, 235, 235) if light else (25, 25, 25), -1)
+    tx, ty = px + (plate_width - text_width) // 2, py + (plate_height + text_height) // 2
+    cv2.putText(frame, text, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, scale,
+                (15, 15, 15) if light else (230, 230, 230), max(2, int(scale * 2.5)))
+
+    # Text that is not a plate
+    sx, sy = rng.randint(20, 200), rng.randint(20, 150)
+    cv2.rectangle(frame, (sx, sy), (sx + 300, sy + 160), (30, 120, 30), -1)
+    cv2.putText(frame, "NO PARKING", (sx + 10, sy + 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    cv2.putText(frame, "MON - FRI 8-5", (sx + 10, sy + 120), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+
+    frame = np.clip(frame.astype(np.int16) + noise.integers(-8, 9, FRAME_SHAPE, dtype=np.int16), 0, 255).astype(np.uint8)
+    return frame, text, (tx, ty - text_height, text_width, text_height)
@@ -1,3 +1,126 @@
-import torch
-print("CUDA Available:", torch.cuda.is_available())
-print("Torch Version:", torch.__version__)
+"""
+Capability probe for the OCR backends.
+
+Reports what this host can run (CUDA, ONNX Runtime providers, the exported
+recognizer), times every available backend on synthetic plate crops and
+writes the fastest to ocr_probe.json, which OCR_BACKEND=auto then uses.
+
+    python testing.py [--runs 20] [--threads N]
+"""
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+import cv2
+import numpy as np
+from ocr_backend import ONNX_MODEL_PATH, PROBE_PATH, available_backends, create_backend
+from plate_tracker import normalize
+
+PROBE_PLATES = ("CAB-1234", "WP-KA-4521", "NB-7781", "KX-0932")
+
+
+def host_capabilities() -> dict:
+    capabilities = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": None,
+        "cuda": False,
+        "onnxruntime": None,
+        "onnx_providers": [],
+        "onnx_model": os.path.exists(ONNX_MODEL_PATH),
+    }
+    try:
+        import torch
+        capabilities["torch"] = torch.__version__
+        capabilities["cuda"] = torch.cuda.is_available()
+        if capabilities["cuda"]:
+            capabilities["cuda_device"] = torch.cuda.get_device_name(0)
+    except ImportError:
+        pass
+    try:
+        import onnxruntime
+        capabilities["onnxruntime"] = onnxruntime.__version__
+        capabilities["onnx_providers"] = onnxruntime.get_available_providers()
+    except ImportError:
+        pass
+    return capabilities
+
+
+def plate_crop(text: str):
+    """A dark-on-white plate crop, roughly what plate_roi hands to OCR."""
+    font, scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 1.4, 3
+    (w, h), baseline = cv2.getTextSize(text, font, scale, thickness)
+    crop = np.full((h + baseline + 24, w + 32, 3), 235, np.uint8)
+    cv2.putText(crop, text, (16, h + 12), font, scale, (20, 20, 20), thickness, cv2.LINE_AA)
+    return crop
+
+
+def probe_backend(name: str, runs: int, threads: int = None) -> dict:
+    load_started = time.perf_counter()
+    backend = create_backend(name, threads)
+    load_seconds = time.perf_counter() - load_started
+
+    crops = [(normalize(text), plate_crop(text)) for text in PROBE_PLATES]
+    backend.readtext(crops[0][1])  # warm-up: first call allocates and autotunes
+
+    timings, correct = [], 0
+    for index in range(runs):
+        expected, crop = crops[index % len(crops)]
+        started = time.perf_counter()
+        reads = backend.readtext(crop)
+        timings.append(time.perf_counter() - started)
+        correct += any(normalize(text) == expected for _, text, _ in reads)
+
+    timings.sort()
+    return {
+        "backend": name,
+        "load_s": round(load_seconds, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "p90_ms": round(timings[int(len(timings) * 0.9)] * 1000, 2),
+        "accuracy": round(correct / runs, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest OCR backend on this host.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--threads", type=int, help="inference threads per backend")
+    args = parser.parse_args()
+
+    capabilities = host_capabilities()
+    for key, value in capabilities.items():
+        print(f"{key:>16}: {value}")
+
+    results = []
+    for name in available_backends():
+        try:
+            results.append(probe_backend(name, args.runs, args.threads))
+        except Exception as e:
+            print(f"[WARN] {name} failed: {e}")
+
+    if not results:
+        print("[ERROR] No OCR backend could run; install easyocr or export the ONNX recognizer")
+        return
+
+    print(f"\n{'backend':<12} {'load s':>8} {'p50 ms':>8} {'p90 ms':>8} {'accuracy':>9}")
+    for result in results:
+        print(f"{result['backend']:<12} {result['load_s']:>8} {result['p50_ms']:>8} {result['p90_ms']:>8} {result['accuracy']:>9}")
+
+    # A backend that cannot read the probe plates is not a candidate however fast it is
+    readable = [result for result in results if result["accuracy"] >= 0.5] or results
+    fastest = min(readable, key=lambda result: result["p50_ms"])["backend"]
+    with open(PROBE_PATH, "w") as probe_file:
+        json.dump({
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "capabilities": capabilities,
+            "results": results,
+            "fastest": fastest,
+        }, probe_file, indent=2)
+    print(f"\n[INFO] Fastest backend: {fastest} (written to {PROBE_PATH})")
+
+
+if __name__ == "__main__":
+    main()
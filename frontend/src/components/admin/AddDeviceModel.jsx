@@ -7,6 +7,8 @@ const AddUserModal = ({ isOpen, onClose, onSubmit, device }) => {
     const [formData, setFormData] = useState({
         name: "",
         type_id: "",
+        ip_address: "",
+        gate_id: "",
     });
 
     const [devicetypes, setDeviceTypes] = useState([]);
@@ -30,11 +32,15 @@ const AddUserModal = ({ isOpen, onClose, onSubmit, device }) => {
             setFormData({
                 name: device.name || "",
                 type_id: device.type_id || "",
+                ip_address: device.ip_address || "",
+                gate_id: device.gate_id || "",
             });
         } else {
             setFormData({
                 name: "",
                 type_id: "",
+                ip_address: "",
+                gate_id: "",
             });
         }
     }, [device]);
@@ -131,6 +137,29 @@ const AddUserModal = ({ isOpen, onClose, onSubmit, device }) => {
                                 </select>
                             </div>
 
+                            <div>
+                                <label className="block mb-2 text-sm font-medium text-gray-700">IP Address (ESP32)</label>
+                                <input
+                                    type="text"
+                                    name="ip_address"
+                                    value={formData.ip_address}
+                                    onChange={handleChange}
+                                    placeholder="http://192.168.60.111"
+                                    className="w-full p-2 border border-gray-300 rounded-lg"
+                                />
+                            </div>
+
+                            <div>
+                                <label className="block mb-2 text-sm font-medium text-gray-700">Gate ID</label>
+                                <input
+                                    type="text"
+                                    name="gate_id"
+                                    value={formData.gate_id}
+                                    onChange={handleChange}
+                                    className="w-full p-2 border border-gray-300 rounded-lg"
+                                />
+                            </div>
+
                             <button
                                 type="submit"
                                 disabled={loading}
@@ -31,6 +31,22 @@ const SlotTable = ({ slots, onEdit, onDelete }) => {
                     </span>
                 ),
             },
+            {
+                Header: "Occupancy",
+                accessor: "occupancy", // Live IR state: empty / occupied
+                Cell: ({ value }) => (
+                    <span
+                        className={`px-3 py-1 rounded-full text-sm font-medium ${value === "occupied"
+                            ? "bg-red-500 text-white"
+                            : value === "empty"
+                                ? "bg-green-500 text-white"
+                                : "bg-gray-300 text-gray-700"
+                            }`}
+                    >
+                        {value ? value.charAt(0).toUpperCase() + value.slice(1) : "Unknown"}
+                    </span>
+                ),
+            },
             {
                 Header: "Created At",
                 accessor: "created_at", // Access the `created_at` field
@@ -47,7 +47,7 @@ const ApiReport = () => {
     const requestsPerEndpoint = useMemo(() => {
         return filteredData.reduce((acc, entry) => {
             const endpoint = entry.endpoint || "unknown";
-            acc[endpoint] = (acc[endpoint] || 0) + 1;
+            acc[endpoint] = (acc[endpoint] || 0) + (entry.count || 0);
             return acc;
         }, {});
     }, [filteredData]);
@@ -65,13 +65,19 @@ const ApiReport = () => {
             { Header: "Endpoint", accessor: "endpoint" },
             { Header: "Method", accessor: "method" },
             { Header: "Status Code", accessor: "status_code" },
+            { Header: "Requests", accessor: "count" },
             {
-                Header: "Duration (s)",
+                Header: "Avg (s)",
                 accessor: "duration_seconds",
                 Cell: ({ value }) => value.toFixed(2),
             },
             {
-                Header: "Timestamp",
+                Header: "p95 (s)",
+                accessor: "p95_seconds",
+                Cell: ({ value }) => value.toFixed(2),
+            },
+            {
+                Header: "Last Seen",
                 accessor: "timestamp",
                 Cell: ({ value }) => new Date(value).toLocaleString(),
             },
@@ -108,8 +114,12 @@ const ApiReport = () => {
         { label: "Endpoint", key: "endpoint" },
         { label: "Method", key: "method" },
         { label: "Status Code", key: "status_code" },
-        { label: "Duration (s)", key: "duration_seconds" },
-        { label: "Timestamp", key: "timestamp" },
+        { label: "Requests", key: "count" },
+        { label: "Avg (s)", key: "duration_seconds" },
+        { label: "p50 (s)", key: "p50_seconds" },
+        { label: "p95 (s)", key: "p95_seconds" },
+        { label: "p99 (s)", key: "p99_seconds" },
+        { label: "Last Seen", key: "timestamp" },
     ];
 
     // PDF export function
@@ -125,12 +135,14 @@ const ApiReport = () => {
             doc.text("API Usage Report", 14, 20);
 
             // Define table columns and rows
-            const tableColumns = ["Endpoint", "Method", "Status Code", "Duration (s)", "Timestamp"];
+            const tableColumns = ["Endpoint", "Method", "Status Code", "Requests", "Avg (s)", "p95 (s)", "Last Seen"];
             const tableRows = filteredData.map((entry) => [
                 entry.endpoint || "",
                 entry.method || "",
                 entry.status_code || "",
+                entry.count || 0,
                 entry.duration_seconds.toFixed(2) || "",
+                entry.p95_seconds.toFixed(2) || "",
                 new Date(entry.timestamp).toLocaleString() || "",
             ]);
 
@@ -1,5 +1,5 @@
 import fetchWithToken from "@/Validation/fetchWithToken";
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { toast } from "react-toastify";
 
 const AddBookingModal = ({ isOpen, onClose, onSubmit }) => {
@@ -20,10 +20,12 @@ const AddBookingModal = ({ isOpen, onClose, onSubmit }) => {
     });
 
     const [loading, setLoading] = useState(false);
+    const idempotencyKey = useRef(null); // Reused when the same booking is resubmitted
 
     // Fetch user's vehicles, packages, and slots when the modal opens
     useEffect(() => {
         if (isOpen) {
+            idempotencyKey.current = crypto.randomUUID();
             fetchVehicles();
             fetchPackages();
             fetchSlots();
@@ -116,7 +118,10 @@ const AddBookingModal = ({ isOpen, onClose, onSubmit }) => {
         try {
             const response = await fetchWithToken("http://127.0.0.1:8000/api/booking/create/", {
                 method: "POST",
-                headers: { "Content-Type": "application/json" },
+                headers: {
+                    "Content-Type": "application/json",
+                    "Idempotency-Key": idempotencyKey.current,
+                },
                 body: JSON.stringify(formData),
             });
             const data = await response.json();
@@ -26,6 +26,14 @@ const Alerts = () => {
             }
         };
         fetchAlerts();
+
+        // New alerts are pushed instead of re-fetching the whole list
+        const source = new EventSource("http://127.0.0.1:8000/api/live/stream");
+        source.addEventListener("alert", (e) => {
+            const alert = JSON.parse(e.data).data;
+            setAlerts((prev) => [alert, ...prev]);
+        });
+        return () => source.close();
     }, []);
 
 
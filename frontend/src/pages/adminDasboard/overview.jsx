@@ -123,7 +123,7 @@ const Overview = () => {
                                 <StatCard
                                     icon={<FaChartBar />}
                                     label="API Usage"
-                                    value={apiUsageData.length}
+                                    value={apiUsageData.reduce((total, entry) => total + (entry.count || 0), 0)}
                                     color="teal"
                                 />
 
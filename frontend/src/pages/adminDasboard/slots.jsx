@@ -26,6 +26,29 @@ const Slots = () => {
         };
 
         fetchSlots();
+
+        // Live occupancy and slot changes pushed by the backend
+        const source = new EventSource("http://127.0.0.1:8000/api/live/stream");
+        source.addEventListener("snapshot", (e) => {
+            setSlots(JSON.parse(e.data).data.slots);
+        });
+        source.addEventListener("slot", (e) => {
+            const change = JSON.parse(e.data).data;
+            if (change.created) {
+                fetchSlots();
+            } else if (change.deleted) {
+                setSlots((prev) => prev.filter((slot) => slot.id !== change.id));
+            } else {
+                setSlots((prev) =>
+                    prev.map((slot) =>
+                        slot.id === change.id
+                            ? { ...slot, occupancy: change.occupancy, occupancy_changed_at: change.changed_at }
+                            : slot
+                    )
+                );
+            }
+        });
+        return () => source.close();
     }, []);
 
     const handleAddSlot = () => {
@@ -4,6 +4,7 @@
 #include <ArduinoJson.h>
 #include <LiquidCrystal_I2C.h>
 #include <HTTPClient.h>
+#include <WebSocketsClient.h>
 
 // WiFi credentials
 const char* ssid = "Galaxy";
@@ -14,6 +15,18 @@ const char* backend_match_url = "http://192.168.60.105:8000/api/iot/status";
 const char* backend_mismatch_url = "http://192.168.60.105:8000/api/iot/mismatch";
 const char* backend_exit_url = "http://192.168.60.105:8000/api/iot/exit";
 
+// Persistent hub connection (ws://backend_host:backend_port/api/iot/ws/<device_id>?gate_id=<gate_id>)
+const char* backend_host = "192.168.60.105";
+const uint16_t backend_port = 8000;
+// Set device_id to this controller's Device document id (Admin > Devices) so
+// commands for that Device use the socket; gate_id must match the Device's
+// gate_id and also routes commands when no Device document exists yet
+const char* device_id = "gate-1";
+const char* gate_id = "gate-1";
+
+WebSocketsClient webSocket;
+unsigned long nextEventId = 1;
+
 // Server and peripherals
 AsyncWebServer server(80);
 Servo gateServo;
@@ -27,6 +40,7 @@ String irSlotNames[4] = {"SLOT2", "SLOT3", "SLOT5", "+6"};
 String bookingIds[4] = {"", "", "", ""};
 bool vehicleInside[4] = {false, false, false, false};
 bool pendingParking[4] = {false, false, false, false};
+int lastIrState[4] = {-1, -1, -1, -1};
 
 // Timing constants
 const int SERVO_OPEN = 5;
@@ -44,8 +58,42 @@ void showDefaultScreen() {
   lcd.print("Salman Faris");
 }
 
+// Send an event over the hub socket; false when it is down and HTTP must be used
+bool sendEvent(String event, String bookingId, String detectedSlot) {
+  if (!webSocket.isConnected()) return false;
+
+  StaticJsonDocument<256> doc;
+  doc["type"] = "event";
+  doc["id"] = nextEventId++;
+  doc["event"] = event;
+  doc["bookingId"] = bookingId;
+  doc["detectedSlot"] = detectedSlot;
+  String payload;
+  serializeJson(doc, payload);
+  return webSocket.sendTXT(payload);
+}
+
+// Raw IR transitions feed the backend's occupancy state machine; it does
+// the debouncing, so readings are only sent while the hub is up
+void sendIrSample(int index, int level) {
+  if (!webSocket.isConnected()) return;
+
+  StaticJsonDocument<192> doc;
+  doc["type"] = "event";
+  doc["id"] = nextEventId++;
+  doc["event"] = "ir";
+  doc["detectedSlot"] = irSlotNames[index];
+  doc["state"] = level;
+  doc["device_time_ms"] = millis();
+  String payload;
+  serializeJson(doc, payload);
+  webSocket.sendTXT(payload);
+}
+
 // Notify backend
 void notifyBackend(String slotNo, String bookingId) {
+  if (sendEvent("matched", bookingId, slotNo)) return;
+
   HTTPClient http;
   http.begin(backend_match_url);
   http.addHeader("Content-Type", "application/json");
@@ -55,6 +103,8 @@ void notifyBackend(String slotNo, String bookingId) {
 }
 
 void notifyMismatch(String bookingId, String detectedSlot) {
+  if (sendEvent("mismatch", bookingId, detectedSlot)) return;
+
   HTTPClient http;
   http.begin(backend_mismatch_url);
   http.addHeader("Content-Type", "application/json");
@@ -69,6 +119,11 @@ void notifyExit(String bookingId) {
     return;
   }
 
+  if (sendEvent("exit", bookingId, "")) {
+    Serial.println("📤 Exit sent over hub for " + bookingId);
+    return;
+  }
+
   HTTPClient http;
   http.begin(backend_exit_url);
   http.addHeader("Content-Type", "application/json");
@@ -87,6 +142,108 @@ void notifyExit(String bookingId) {
   http.end();
 }
 
+struct CommandResult {
+  int code;
+  String message;
+};
+
+CommandResult reply(int code, String message) {
+  return CommandResult{code, message};
+}
+
+// Shared by the hub socket and the HTTP /command fallback
+CommandResult handleCommand(JsonDocument &doc) {
+  String action = doc["action"];
+  String requestedSlot = doc["slot"];
+  String plate = doc["plate"];
+  String bookingId = doc["booking_id"];
+  String status = doc["status"];
+
+  int requestedSlotIndex = -1;
+  for (int i = 0; i < 4; i++) {
+    if (irSlotNames[i] == requestedSlot) {
+      requestedSlotIndex = i;
+      break;
+    }
+  }
+
+  lcd.clear();
+
+  if (status == "notregistered") {
+    lcd.print("Vehicle Not");
+    lcd.setCursor(0, 1);
+    lcd.print("Registered");
+    showDefaultScreen();
+    return reply(200, "Vehicle not registered");
+  }
+
+  if (status == "notactive") {
+    lcd.print("Booking Not");
+    lcd.setCursor(0, 1);
+    lcd.print("Found");
+    showDefaultScreen();
+    return reply(200, "Booking not active");
+  }
+
+  if (status == "active" && action == "open" && requestedSlotIndex != -1) {
+    if (!vehicleInside[requestedSlotIndex] && !pendingParking[requestedSlotIndex]) {
+      pendingParking[requestedSlotIndex] = true;
+      bookingIds[requestedSlotIndex] = bookingId;
+
+      lcd.setCursor(0, 0);
+      lcd.print("Slot: " + requestedSlot);
+      lcd.setCursor(0, 1);
+      lcd.print("Plate: " + plate);
+
+      gateServo.write(SERVO_OPEN);
+      delay(4000);
+      gateServo.write(SERVO_CLOSED);
+
+      return reply(200, "Gate opened, waiting IR");
+    } else {
+      lcd.clear();
+      lcd.print("Slot Occupied");
+      showDefaultScreen();
+      return reply(400, "Slot already occupied or pending");
+    }
+  } else {
+    return reply(400, "Invalid request.");
+  }
+}
+
+void onHubEvent(WStype_t type, uint8_t *payload, size_t length) {
+  if (type == WStype_CONNECTED) {
+    Serial.println("🔌 Hub connected");
+    // Resend every slot's current level so the backend state is fresh
+    for (int i = 0; i < 4; i++) lastIrState[i] = -1;
+    return;
+  }
+  if (type == WStype_DISCONNECTED) {
+    Serial.println("🔌 Hub disconnected");
+    return;
+  }
+  if (type != WStype_TEXT) return;
+
+  StaticJsonDocument<300> doc;
+  if (deserializeJson(doc, payload, length)) return;
+
+  String kind = doc["type"];
+  if (kind != "command") return;
+
+  // Ack with the same id so the backend can match the reply
+  long messageId = doc["id"];
+  CommandResult result = handleCommand(doc);
+
+  StaticJsonDocument<200> ack;
+  ack["type"] = "ack";
+  ack["id"] = messageId;
+  ack["result"]["code"] = result.code;
+  ack["result"]["message"] = result.message;
+  String out;
+  serializeJson(ack, out);
+  webSocket.sendTXT(out);
+}
+
 void setup() {
   Serial.begin(115200);
 
@@ -124,73 +281,28 @@ void setup() {
         return;
       }
 
-      String action = doc["action"];
-      String requestedSlot = doc["slot"];
-      String plate = doc["plate"];
-      String bookingId = doc["booking_id"];
-      String status = doc["status"];
-
-      int requestedSlotIndex = -1;
-      for (int i = 0; i < 4; i++) {
-        if (irSlotNames[i] == requestedSlot) {
-          requestedSlotIndex = i;
-          break;
-        }
-      }
-
-      lcd.clear();
-
-      if (status == "notregistered") {
-        lcd.print("Vehicle Not");
-        lcd.setCursor(0, 1);
-        lcd.print("Registered");
-        showDefaultScreen();
-        request->send(200, "text/plain", "Vehicle not registered");
-        return;
-      }
-
-      if (status == "notactive") {
-        lcd.print("Booking Not");
-        lcd.setCursor(0, 1);
-        lcd.print("Found");
-        showDefaultScreen();
-        request->send(200, "text/plain", "Booking not active");
-        return;
-      }
-
-      if (status == "active" && action == "open" && requestedSlotIndex != -1) {
-        if (!vehicleInside[requestedSlotIndex] && !pendingParking[requestedSlotIndex]) {
-          pendingParking[requestedSlotIndex] = true;
-          bookingIds[requestedSlotIndex] = bookingId;
-
-          lcd.setCursor(0, 0);
-          lcd.print("Slot: " + requestedSlot);
-          lcd.setCursor(0, 1);
-          lcd.print("Plate: " + plate);
-
-          gateServo.write(SERVO_OPEN);
-          delay(4000);
-          gateServo.write(SERVO_CLOSED);
-
-          request->send(200, "text/plain", "Gate opened, waiting IR");
-        } else {
-          lcd.clear();
-          lcd.print("Slot Occupied");
-          showDefaultScreen();
-          request->send(400, "text/plain", "Slot already occupied or pending");
-        }
-      } else {
-        request->send(400, "text/plain", "Invalid request.");
-      }
+      CommandResult result = handleCommand(doc);
+      request->send(result.code, "text/plain", result.message);
     }
   );
 
+  webSocket.begin(backend_host, backend_port, String("/api/iot/ws/") + device_id + "?gate_id=" + gate_id);
+  webSocket.onEvent(onHubEvent);
+  webSocket.setReconnectInterval(2000);
+  webSocket.enableHeartbeat(15000, 3000, 2);
+
   server.begin();
 }
 
 void loop() {
+  webSocket.loop();
+
   for (int i = 0; i < 4; i++) {
     int irState = digitalRead(irPins[i]);
+    if (irState != lastIrState[i]) {
+      lastIrState[i] = irState;
+      sendIrSample(i, irState);
+    }
 
     if (pendingParking[i]) {
       for (int j = 0; j < 4; j++) {